@@ -8,15 +8,20 @@ way of factory methods.
 """
 
 from __future__ import unicode_literals
+import collections
+import copy
 import datetime
+import json
 import logging
+from multiprocessing.pool import ThreadPool
 import os
 import sys
 import textwrap
 
 import pynsot
-from . import client
-from .util import get_result
+from . import client, constants
+from .journal import Journal
+from .util import chunked, get_result, slugify
 
 from .vendor import click, netaddr, prettytable
 from .vendor.slumber.exceptions import (HttpClientError, HttpServerError)
@@ -50,6 +55,24 @@ NATURAL_KEYS = {
     'interfaces': ['name', 'device'],
 }
 
+# Mapping of resource_names to the fields which make up the natural key used to
+# address a single object directly (e.g. /api/sites/1/devices/foo-bar1/). If
+# there is more than one field, the values are joined with ':'.
+NATURAL_KEY_IDS = {
+    'devices': ['hostname'],
+    'networks': ['cidr'],
+    'interfaces': ['device_hostname', 'name'],
+    'circuits': ['name'],
+}
+
+# Resources whose natural keys must be slugified for use in URLs.
+SLUGGED_NATURAL_KEYS = ('interfaces', 'circuits')
+
+# Lookup strategies chosen by App.plan_lookup() for App.list().
+LOOKUP_DETAIL = 'id'
+LOOKUP_NATURAL_KEY = 'natural_key'
+LOOKUP_LIST = 'params'
+
 # Mapping of resource_names to what we want objects to look like when formatted
 # to stdout for grep-friendliness. These are string interpolation style.
 GREP_FORMATS = {
@@ -63,12 +86,39 @@ GREP_FORMATS = {
     'sites': '%(name)s',
 }
 
+# Field prepended to display fields when listing objects from multiple sites.
+SITE_FIELD = ('site_id', 'Site')
+
+# Related objects that may be prefetched when listing, and displayed by their
+# natural key in place of their IDs. Maps a resource name to tuples of (display
+# field, related resource name, local field, related field, many).
+PREFETCH_RELATIONS = {
+    'circuits': (
+        ('endpoint_a', 'interfaces', 'endpoint_a', 'id', False),
+        ('endpoint_z', 'interfaces', 'endpoint_z', 'id', False),
+    ),
+    'devices': (
+        ('interfaces', 'interfaces', 'id', 'device', True),
+    ),
+}
+
 
 __all__ = (
     'NsotCLI', 'App', 'app'
 )
 
 
+def is_not_found(err):
+    """
+    Return whether ``err`` is an HTTP 404 response.
+
+    :param err:
+        Exception object
+    """
+    resp = getattr(err, 'response', None)
+    return getattr(resp, 'status_code', None) == 404
+
+
 class NsotCLI(click.MultiCommand):
     """
     Base command object used to define object-specific command-line parsers.
@@ -102,7 +152,7 @@ class NsotCLI(click.MultiCommand):
 
 class App(object):
     """Context object for holding state data for the CLI app."""
-    def __init__(self, ctx, client_args=None, verbose=False):
+    def __init__(self, ctx, client_args=None, verbose=False, journal=None):
         if client_args is None:
             client_args = {}
 
@@ -115,7 +165,10 @@ class App(object):
         self.resource_name = self.ctx.invoked_subcommand
         self.grep_name = self.resource_name
         self.site_id = None  # This is populated later.
+        self.site_ids = None  # Populated when listing multiple sites.
         self.rebase_done = False  # So that we only rebase once.
+        self.journal = journal  # Journal used to resume bulk actions.
+        self.journal_skipped = 0  # Objects skipped as already journaled.
 
     @property
     def api(self):
@@ -132,15 +185,27 @@ class App(object):
             resource_name = resource_name[:-1]
         return resource_name
 
+    @property
+    def site_api(self):
+        """
+        Return the API client scoped to ``site_id``.
+
+        Until a ``site_id`` has been selected by ``rebase()`` this is just the
+        API client itself.
+        """
+        if self.site_id is None:
+            return self.api
+        return self.api.site(self.site_id)
+
     @property
     def resource(self):
         """
         Return an API resource method for calling endpoints.
 
-        For example if ``resource_name`` is ``networks``, this is equivalent to
-        calling ``self.api.networks``.
+        For example if ``resource_name`` is ``networks`` and ``site_id`` is
+        ``1``, this is equivalent to calling ``self.api.sites(1).networks``.
         """
-        return self.api.get_resource(self.resource_name)
+        return self.site_api.get_resource(self.resource_name)
 
     @staticmethod
     def pretty_dict(data, delim='=', sep=', ', joiner='\n'):
@@ -359,6 +424,8 @@ class App(object):
         output = []
         for obj in objects:
             prefix = self.format_object_for_grep(obj)
+            if self.site_ids:
+                prefix = '%s %s' % (obj['site_id'], prefix)
             attrs = obj.get('attributes', {})
             keys = sorted(attrs)
             for k in keys:
@@ -378,16 +445,20 @@ class App(object):
         """
         output = []
         for obj in objects:
-            output.append(self.format_object_for_grep(obj))
+            key = self.format_object_for_grep(obj)
 
-        # Networks results must be specially sorted.
-        if self.grep_name != 'networks':
-            output = sorted(output)
-        else:
-            networks = sorted(
-                netaddr.IPNetwork(d) for d in output
-            )
-            output = (str(n) for n in networks)
+            # Networks results must be specially sorted.
+            if self.grep_name == 'networks':
+                key = netaddr.IPNetwork(key)
+
+            # When listing multiple sites, group and prefix by site_id.
+            site_id = obj['site_id'] if self.site_ids else None
+            output.append((site_id, key))
+
+        output = (
+            '%s %s' % (site_id, key) if site_id is not None else '%s' % key
+            for site_id, key in sorted(output)
+        )
 
         click.echo(delimiter.join(output))
 
@@ -450,7 +521,10 @@ class App(object):
 
     def rebase(self, data):
         """
-        If this is not a Site object, then rebase the API URL.
+        If this is not a Site object, then scope API calls to a Site.
+
+        The shared API client is never modified; instead ``site_id`` is set,
+        which is then used by ``site_api`` to select a site-scoped view.
 
         :param data:
             Dict of query arguments
@@ -466,19 +540,93 @@ class App(object):
         # Prefer site_id from args.
         site_id = data.pop('site_id', None)
 
+        # Only list() and set_query() know how to fan out across sites.
+        if isinstance(site_id, list):
+            raise click.UsageError(
+                'Multiple sites may only be used when listing objects.'
+            )
+
         # Default to client's default_site provided in user's config or at CLI.
         if site_id is None and self.resource_name != 'sites':
             site_id = self.api.default_site
 
         log.debug('rebase: Got site_id: %s' % site_id)
         if site_id is not None:
-            log.debug('rebase: Site_id found; rebasing API URL!')
+            log.debug('rebase: Site_id found; scoping API to site!')
             self.site_id = site_id
-            self.api._store['base_url'] += '/sites/%s' % site_id
 
         # Mark rebase as done.
         self.rebase_done = True
 
+    def fan_out(self, site_ids, func):
+        """
+        Call ``func`` concurrently once for each Site.
+
+        Each call is passed a site-scoped view of the API client, so all
+        requests share the client's session and connection pool.
+
+        :param site_ids:
+            List of Site IDs
+
+        :param func:
+            Callable that takes a ``SiteClient``
+
+        :returns:
+            List of results in the same order as ``site_ids``
+        """
+        api = self.api
+        return self.run_concurrently(
+            lambda site_id: func(api.site(site_id)), site_ids
+        )
+
+    def run_concurrently(self, func, items):
+        """
+        Call ``func`` for each item using a bounded pool of threads.
+
+        :param func:
+            Callable that takes a single item
+
+        :param items:
+            List of items
+
+        :returns:
+            List of results in the same order as ``items``
+        """
+        if not items:
+            return []
+
+        pool = ThreadPool(min(len(items), constants.MAX_CONCURRENCY))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_multi_site(self, data, query=False):
+        """
+        GET objects from each Site in ``data['site_id']`` and merge them.
+
+        :param data:
+            Dict of query parameters where ``site_id`` is a list
+
+        :param query:
+            Whether to perform a set query
+        """
+        self.site_ids = data.pop('site_id')
+        resource_name = self.resource_name
+
+        def fetch(site_api):
+            resource = site_api.get_resource(resource_name)
+            if query:
+                resource = resource.query
+            objects = get_result(resource.get(**data))
+            for obj in objects:
+                obj.setdefault('site_id', site_api.site_id)
+            return objects
+
+        results = self.fan_out(self.site_ids, fetch)
+        return [obj for objects in results for obj in objects]
+
     def add(self, data):
         """POST"""
         action = 'add'
@@ -492,10 +640,44 @@ class App(object):
         else:
             self.handle_response(action, data, result)
 
-    def get_single_object(self, data, resource=None, natural_keys=None):
+    def get_natural_key(self, data, resource_name=None):
+        """
+        Return the natural key that addresses a single object directly.
+
+        If ``data`` doesn't contain every field of the natural key, or the
+        resource doesn't support natural key addressing, ``None`` is returned.
+
+        :param data:
+            Dict of query parameters
+
+        :param resource_name:
+            (Optional) API resource name. Defaults to ``resource_name``.
+        """
+        if resource_name is None:
+            resource_name = self.resource_name
+
+        fields = NATURAL_KEY_IDS.get(resource_name)
+        if fields is None:
+            return None
+
+        values = [data.get(field) for field in fields]
+        if not all(values):
+            return None
+
+        natural_key = ':'.join('%s' % v for v in values)
+        if resource_name in SLUGGED_NATURAL_KEYS:
+            natural_key = slugify(natural_key)
+        return natural_key
+
+    def get_single_object(self, data, resource=None, natural_keys=None,
+                          resource_name=None):
         """
         Get a single object based on the natural key for this resource.
 
+        If the natural key can address the object directly, it is retrieved
+        from the detail endpoint (e.g. ``/api/sites/1/devices/foo-bar1/``).
+        Otherwise a filtered list lookup is performed.
+
         :param data:
             Dict of query parameters
 
@@ -506,9 +688,31 @@ class App(object):
             (Optional) List of natural keys. If not provided, they are derived
             automatically from the resource.
 
+        :param resource_name:
+            (Optional) API resource name used for natural key addressing.
+            Defaults to ``resource_name`` unless ``resource`` is provided.
+
         :returns:
             None
         """
+        if resource_name is None and resource is None:
+            resource_name = self.resource_name
+
+        # Rebase before we toilet face.
+        if resource is None:
+            resource = self.resource
+
+        # Address the object directly by natural key if we can.
+        natural_key = None
+        if resource_name is not None:
+            natural_key = self.get_natural_key(data, resource_name)
+        if natural_key is not None:
+            log.debug('get_single_object: Retrieving by %r' % natural_key)
+            try:
+                return get_result(resource(natural_key).get())
+            except HTTP_ERRORS:
+                return None
+
         # Should be a list of natural keys for the resource
         if natural_keys is None:
             natural_keys = NATURAL_KEYS.get(self.resource_name, [])
@@ -523,10 +727,6 @@ class App(object):
             if natural_value is not None:
                 params[natural_key] = natural_value
 
-        # Rebase before we toilet face.
-        if resource is None:
-            resource = self.resource
-
         # Get the results
         try:
             r = resource.get(**params)
@@ -578,6 +778,12 @@ class App(object):
         :param resource:
             (Optional) API resource object
         """
+        # Fan out the set query across sites.
+        if isinstance(data.get('site_id'), list) and resource is None:
+            try:
+                return self.get_multi_site(data, query=True)
+            except HTTP_ERRORS as err:
+                self.handle_error('list', data, err)
 
         self.rebase(data)
 
@@ -606,7 +812,7 @@ class App(object):
         self.print_by_natural_key(objects, delimiter)
 
     def list(self, data, display_fields=None, resource=None,
-             verbose_fields=None):
+             verbose_fields=None, prefetch=False):
         """
         GET objects and display them to stdout.
 
@@ -622,6 +828,10 @@ class App(object):
         :param verbose_fields:
             (Optional) Mapping of field_names to verbose detail display. If not
             provided, ``display_fields`` is used.
+
+        :param prefetch:
+            Whether to fetch related objects in bulk and display them in place
+            of their IDs. See ``prefetch_related()``.
         """
         action = 'list'
         log.debug('listing %s' % data)
@@ -630,59 +840,215 @@ class App(object):
         grep = data.pop('grep', False)
         by_natural_key = data.pop('natural_key', False)
 
+        # Fan out across sites and display the merged results w/ the site_id.
+        if isinstance(data.get('site_id'), list) and resource is None:
+            if obj_id:
+                raise click.UsageError(
+                    '-i/--id may only be used with a single site.'
+                )
+            display_fields = (SITE_FIELD,) + tuple(display_fields)
+            try:
+                objects = self.get_multi_site(data)
+            except HTTP_ERRORS as err:
+                self.handle_error(action, data, err)
+            if prefetch:
+                objects = self.prefetch_related(objects)
+            self.print_objects(
+                objects, data, display_fields, grep, by_natural_key
+            )
+            return None
+
+        # Natural keys only address objects on top-level resources, not on
+        # nested resources such as /api/sites/1/networks/5/subnets/.
+        nested = resource is not None
+
         # If a resource object is provided, call it instead, and only rebase if
         # we haven't provided our own resource.
         if resource is None:
             self.rebase(data)  # Rebase first
             resource = self.resource
 
-        obj = None
+        # Decide up front how to retrieve the objects in a single request.
+        lookup, key = self.plan_lookup(data, nested=nested)
+        log.debug('Retrieving by %s=%r' % (lookup, key))
+
         try:
-            # Try getting a single object first
-            if obj_id:
-                log.debug('Retrieving by obj_id=%r' % obj_id)
-                result = resource(obj_id).get()
-                obj = get_result(result)
-
-            # If we still don't have an object try param-based lookup.
-            if obj is None:
-                log.debug('Retrieving by single_object')
-                obj = self.get_single_object(data, resource)
-
-            # If obj is STILL None...
-            if obj is not None:
-                # Set display_fields to verbose
-                display_fields = verbose_fields or display_fields
+            if lookup == LOOKUP_LIST:
+                result = get_result(resource.get(**data))
             else:
-                log.debug('Retrieving by params=%r' % data)
-                result = resource.get(**data)
+                result = get_result(resource(key).get())
 
         except HTTP_ERRORS as err:
-            self.handle_error(action, data, err)
+            # A missing natural key just means there is nothing to display.
+            if lookup == LOOKUP_NATURAL_KEY and is_not_found(err):
+                result = []
+            else:
+                self.handle_error(action, data, err)
 
+        # A single object (e.g. a detail or /networks/:id/parent/ lookup, or
+        # a filtered list with one match) is displayed using the verbose
+        # fields.
+        if isinstance(result, dict):
+            objects = [result]
         else:
-            objects = []
+            objects = result or []
+        if len(objects) == 1:
+            display_fields = verbose_fields or display_fields
 
-            # Turn a single object into a list
-            if obj:
-                objects = [obj]
+        if prefetch and not nested:
+            objects = self.prefetch_related(objects)
 
-            # Or just list all of them.
-            elif result:
-                objects = get_result(result)
+        self.print_objects(
+            objects, data, display_fields, grep, by_natural_key
+        )
 
-            if objects:
-                if grep:
-                    self.print_grep(objects)
-                elif by_natural_key:
-                    self.print_by_natural_key(objects)
-                else:
-                    self.print_list(objects, display_fields)
+    def prefetch_related(self, objects):
+        """
+        Replace the related IDs of objects with the related objects' natural
+        keys.
+
+        Each related resource is fetched with one request per Site,
+        concurrently across Sites, and joined locally. If the listed objects
+        of a Site only refer to one related object (e.g. a single listed
+        Device), the request is filtered to it. Otherwise every related object
+        of the Site is fetched, because the API can't filter on many keys at
+        once.
+
+        :param objects:
+            List of object dicts of this resource
+
+        :returns:
+            The same list, updated in place
+        """
+        relations = PREFETCH_RELATIONS.get(self.resource_name, ())
+        if not objects or not relations:
+            return objects
+
+        # Some objects (e.g. Circuits) don't include their site_id.
+        def site_of(obj):
+            return obj.get('site_id', self.site_id)
+
+        # Keys of the related objects to look up, by site, related resource
+        # and the related field they match.
+        wanted = collections.OrderedDict()
+        for field, name, local, remote, many in relations:
+            for obj in objects:
+                if obj.get(local) is not None:
+                    group = (site_of(obj), name, remote)
+                    wanted.setdefault(group, set()).add(obj[local])
+
+        # Each task is (site_id, name, remote, key), with a key of None to
+        # fetch every related object of the site.
+        tasks = []
+        for (site_id, name, remote), keys in wanted.iteritems():
+            key = list(keys)[0] if len(keys) == 1 else None
+            tasks.append((site_id, name, remote, key))
+
+        api = self.api
+
+        def fetch(task):
+            site_id, name, remote, key = task
+            resource = api.site(site_id).get_resource(name)
+            if key is None:
+                return get_result(resource.get())
+            if remote == 'id':
+                return [get_result(resource(key).get())]
+            return get_result(resource.get(**{remote: key}))
+
+        try:
+            results = self.run_concurrently(fetch, tasks)
+        except HTTP_ERRORS as err:
+            self.handle_error('list', {}, err)
+
+        # Related objects by site and resource, each only once.
+        related = {}
+        for (site_id, name, _, _), rels in zip(tasks, results):
+            by_id = related.setdefault((site_id, name), {})
+            for rel in rels:
+                by_id[rel['id']] = rel
+
+        for field, name, local, remote, many in relations:
+            index = {}
+            for (site_id, rel_name), by_id in related.iteritems():
+                if rel_name != name:
+                    continue
+                for rel in by_id.itervalues():
+                    key = (site_id, rel[remote])
+                    index.setdefault(key, []).append(
+                        GREP_FORMATS[name] % rel
+                    )
+
+            for obj in objects:
+                matches = index.get((site_of(obj), obj[local]), [])
+                if many:
+                    obj[field] = sorted(matches)
+                elif matches:
+                    obj[field] = matches[0]
+
+        return objects
+
+    def plan_lookup(self, data, nested=False):
+        """
+        Decide how ``list()`` will retrieve objects using a single request.
+
+        Returns a 2-tuple of ``(lookup, key)`` where ``lookup`` is one of:
+
+        + ``LOOKUP_DETAIL``: GET the detail endpoint for the ``id`` in ``key``
+        + ``LOOKUP_NATURAL_KEY``: GET the detail endpoint for the natural key
+          in ``key``
+        + ``LOOKUP_LIST``: GET the list endpoint filtered by ``data``; ``key``
+          is ``None``
+
+        :param data:
+            Dict of query parameters
+
+        :param nested:
+            Whether the resource is nested under another resource, in which
+            case objects can't be addressed by natural key.
+        """
+        obj_id = data.get('id')
+        if obj_id:
+            return LOOKUP_DETAIL, obj_id
+
+        if not nested:
+            natural_key = self.get_natural_key(data)
+            if natural_key is not None:
+                return LOOKUP_NATURAL_KEY, natural_key
+
+        return LOOKUP_LIST, None
+
+    def print_objects(self, objects, data, display_fields, grep=False,
+                      by_natural_key=False):
+        """
+        Display a list of objects to stdout in the requested format.
+
+        :param objects:
+            List of object dicts
+
+        :param data:
+            Dict of query parameters (used when nothing was found)
+
+        :param display_fields:
+            Ordered list of 2-tuples of (field, display_name)
+
+        :param grep:
+            Whether to display in a grep-friendly format
+
+        :param by_natural_key:
+            Whether to display by natural key
+        """
+        if objects:
+            if grep:
+                self.print_grep(objects)
+            elif by_natural_key:
+                self.print_by_natural_key(objects)
             else:
-                pretty_dict = self.pretty_dict(data)
-                t_ = 'No %s found matching args: %s!'
-                msg = t_ % (self.singular, pretty_dict)
-                click.echo(msg)
+                self.print_list(objects, display_fields)
+        else:
+            pretty_dict = self.pretty_dict(data)
+            t_ = 'No %s found matching args: %s!'
+            msg = t_ % (self.singular, pretty_dict)
+            click.echo(msg)
 
     def remove(self, **data):
         """DELETE"""
@@ -764,76 +1130,442 @@ class App(object):
         return attrs
 
     def update(self, data):
-        """PUT"""
+        """PATCH"""
 
         action = 'update'
         obj_id = data.pop('id')
         attr_action = data.pop('attr_action', None)
-        multi = data.get('multi', False)
+
+        # For resources w/ attributes, multi is a CLI flag and not a field.
+        if 'attributes' in data:
+            multi = data.pop('multi', False)
+        else:
+            multi = data.get('multi', False)
+
         log.debug('updating %s' % data)
         self.rebase(data)
 
-        # Get the original object by id first so that we can keep any existing
-        # values without resetting them.
-        try:
-            if obj_id:
-                log.debug('Retrieving by obj_id=%r' % obj_id)
-                result = self.resource(obj_id).get()
-                obj = get_result(result)
+        # The object is addressed by id, or else by natural key, in which case
+        # the natural key fields are used for lookup and are not changes.
+        lookup_fields = []
+        key = obj_id
+        if not obj_id:
+            key = self.get_natural_key(data)
+            lookup_fields = NATURAL_KEY_IDS.get(self.resource_name, [])
+
+        # The server replaces attributes wholesale, so attribute changes must
+        # be reconciled w/ the existing attributes.
+        cli_attributes = getattr(self.ctx, '_attributes', [])
+
+        # Only get the original object if we must, either to find its id or to
+        # reconcile attributes.
+        obj = None
+        if key is None or cli_attributes:
+            try:
+                if obj_id:
+                    log.debug('Retrieving by obj_id=%r' % obj_id)
+                    result = self.resource(obj_id).get()
+                    obj = get_result(result)
+                else:
+                    obj = self.get_single_object(data)
+            except HTTP_ERRORS as err:
+                self.handle_error(action, data, err)
             else:
-                obj = self.get_single_object(data)
+                # FIXME(jathan) This error case needs work. It needs to be as
+                # descriptive as when a lookup by id fails.
+                if obj is None:
+                    self.handle_error(
+                        action, data,
+                        'Update failed. Try again with --verbose for more '
+                        'info.'
+                    )
+
+                key = obj['id']
+
+        log.debug('EXISTING: %r', obj)
+
+        payload = self.get_changes(
+            data, obj, attr_action, multi=multi, exclude=lookup_fields
+        )
+        log.debug('PAYLOAD [out]: %r', payload)
+        if not payload:
+            log.debug('Nothing changed; skipping PATCH.')
+            self.handle_response(action, data, obj)
+            return None
+
+        # And now we call PATCH
+        try:
+            result = self.resource(key).patch(payload)
+            log.debug('RESULT [out]: %r', result)
         except HTTP_ERRORS as err:
             self.handle_error(action, data, err)
         else:
-            # FIXME(jathan) This error case needs work. It needs to be as
-            # descriptive as when a lookup by id fails.
-            if obj is None:
-                self.handle_error(
-                    action, data,
-                    'Update failed. Try again with --verbose for more info.'
-                )
+            self.handle_response(action, data, result)
 
-            obj_id = obj.pop('id')  # We don't want id when doing a PUT
-            payload = obj
+    def get_changes(self, data, obj=None, attr_action=None, multi=False,
+                    exclude=None):
+        """
+        Return a dict of the fields in ``data`` that would change ``obj``.
 
-        log.debug('PAYLOAD [in]: %r', payload)
+        :param data:
+            Dict of CLI params
 
-        # Update the payload from the CLI params if the value isn't null.
-        for key, val in data.iteritems():
+        :param obj:
+            (Optional) Dict of the existing object. If not provided, all
+            provided fields are considered to be changes.
+
+        :param attr_action:
+            The action to perform against the existing attributes
+
+        :param multi:
+            Whether to treat the incoming attributes as list types
+
+        :param exclude:
+            (Optional) List of field names that are never changes
+        """
+        if exclude is None:
+            exclude = []
+
+        payload = {}
+        for field, val in data.iteritems():
             # If we're updating attributes, reconcile with existing attributes
-            if key == 'attributes':
-                attrs = payload['attributes']
-                payload['attributes'] = self.process_attributes(
-                    attrs, attr_action, multi=multi
-                )
+            if field == 'attributes':
+                if getattr(self.ctx, '_attributes', None):
+                    attrs = copy.deepcopy(obj['attributes'])
+                    payload['attributes'] = self.process_attributes(
+                        attrs, attr_action, multi=multi
+                    )
 
             # Otherwise, if the value was provided, replace it outright
-            elif val is not None:
-                payload[key] = val
+            elif val is not None and val != () and field not in exclude:
+                if isinstance(val, tuple):
+                    val = list(val)
+                payload[field] = val
+
+        # Only keep the fields that actually changed.
+        if obj is not None:
+            payload = dict(
+                (field, val) for (field, val) in payload.iteritems()
+                if obj.get(field) != val
+            )
 
-        log.debug('PAYLOAD [out]: %r', payload)
-        # And now we call PUT
+        return payload
+
+    def bulk_objects(self, data):
+        """
+        Return the objects targeted by a bulk action.
+
+        :param data:
+            Either an iterable of object dicts (from a bulk file) each
+            identified by ``id`` or natural key, or a dict of CLI params
+            containing a set ``query`` used to select the objects.
+        """
+        if not isinstance(data, dict):
+            self.rebase({})
+            return data
+
+        query_data = {
+            'query': data.pop('query'),
+            'site_id': data.pop('site_id', None),
+        }
+        log.debug('BULK QUERY: %r', query_data)
+        return self.set_query(query_data)
+
+    def print_progress(self, action, count, done=False):
+        """
+        Display the number of objects processed by a bulk action.
+
+        :param action:
+            The action name
+
+        :param count:
+            Number of objects processed so far
+
+        :param done:
+            Whether this is the final count
+        """
+        if action.endswith('e'):
+            action = action[:-1]  # "remove" -> "remov"
+        action = action.title() + 'ed'  # "remove" -> "removed"
+        name = self.singular if count == 1 else self.resource_name
+        msg = '%s %s %s' % (action, count, name)
+
+        if done:
+            click.echo('\r', err=True, nl=False)
+            click.echo(click.style('[SUCCESS] ', fg='green') + msg + '!')
+        else:
+            click.echo('\r' + msg + '...', err=True, nl=False)
+
+    def bulk_execute(self, action, tasks):
+        """
+        Run ``(objects, func)`` tasks concurrently and report the results.
+
+        Tasks are taken from ``tasks`` lazily, with at most ``MAX_CONCURRENCY``
+        in flight, so that a streamed input is never read far ahead of the
+        requests being made. Results are reported in order as they land; in a
+        terminal, a running count is displayed instead of a line per object.
+
+        Upon the first failure no further tasks are started, and the error is
+        reported once the tasks in flight have finished.
+
+        If a ``journal`` is set, the outcome for each object is recorded.
+
+        :param action:
+            The action name
+
+        :param tasks:
+            Iterable of 2-tuples of (list of object dicts, callable)
+        """
+        def run(task):
+            objects, func = task
+            try:
+                func()
+            except HTTP_ERRORS as err:
+                return objects, err
+            return objects, None
+
+        interactive = click.get_text_stream('stderr').isatty()
+        state = {'count': 0, 'error': None}
+
+        def finish(pending_result):
+            objects, err = pending_result.get()
+            if self.journal is not None:
+                keys = [self.journal_key(obj) for obj in objects]
+                self.journal.record(action, self.resource_name, keys, err)
+
+            if err is not None:
+                if state['error'] is None:
+                    state['error'] = (objects, err)
+                return None
+
+            state['count'] += len(objects)
+            if interactive:
+                self.print_progress(action, state['count'])
+            else:
+                self.handle_response(action, objects, None)
+
+        pool = ThreadPool(constants.MAX_CONCURRENCY)
+        pending = collections.deque()
         try:
-            result = self.resource(obj_id).put(payload)
-            log.debug('RESULT [out]: %r', result)
-        except HTTP_ERRORS as err:
-            self.handle_error(action, data, err)
+            for task in tasks:
+                pending.append(pool.apply_async(run, (task,)))
+                if len(pending) >= constants.MAX_CONCURRENCY:
+                    finish(pending.popleft())
+                if state['error'] is not None:
+                    break
+        finally:
+            while pending:
+                finish(pending.popleft())
+            pool.close()
+            pool.join()
+
+        if interactive and state['count']:
+            self.print_progress(action, state['count'], done=True)
+
+        if self.journal_skipped:
+            click.echo(
+                'Skipped %d %s already completed in journal %s.' % (
+                    self.journal_skipped, self.resource_name, self.journal.path
+                ),
+                err=True
+            )
+
+        if state['error'] is not None:
+            objects, err = state['error']
+            self.handle_error(action, objects, err)
+
+    def journal_key(self, obj):
+        """
+        Return the key identifying an object in the ``journal``.
+
+        This is the ``id`` or natural key of the object, falling back to the
+        object itself (e.g. when adding objects w/out a natural key). It is
+        prefixed by the site of the object, so that a journal doesn't skip
+        objects when the same file is used against another site.
+
+        :param obj:
+            Dict of an object
+        """
+        key = obj.get('id') or self.get_natural_key(obj)
+        if key is None:
+            key = json.dumps(obj, sort_keys=True)
+        site_id = obj.get('site_id', self.site_id)
+        if site_id is None:
+            return '%s' % (key,)
+        return '%s:%s' % (site_id, key)
+
+    def skip_journaled(self, action, objects):
+        """
+        Generate the objects that are not already completed in the ``journal``.
+
+        :param action:
+            The action name
+
+        :param objects:
+            Iterable of object dicts
+        """
+        if self.journal is None:
+            for obj in objects:
+                yield obj
+            return
+
+        for obj in objects:
+            key = self.journal_key(obj)
+            if self.journal.is_done(action, self.resource_name, key):
+                self.journal_skipped += 1
+                continue
+            yield obj
+
+    def bulk_add(self, objects):
+        """
+        POST objects in chunks as they are read.
+
+        :param objects:
+            Iterable of object dicts
+        """
+        self.rebase({})
+        resource = self.resource
+        objects = self.skip_journaled('add', objects)
+        tasks = (
+            (chunk, lambda chunk=chunk: resource.post(chunk))
+            for chunk in chunked(objects, constants.BULK_CHUNK_SIZE)
+        )
+        self.bulk_execute('add', tasks)
+
+    def bulk_update(self, data):
+        """
+        PATCH many objects.
+
+        Objects with an ``id`` are PATCHed in chunks against the list endpoint.
+        Objects identified by natural key are PATCHed individually against
+        their detail endpoint. Empty fields are left unchanged.
+
+        :param data:
+            Either an iterable of object dicts, or a dict of CLI params
+            containing a set ``query``. See ``bulk_objects()``.
+        """
+        if isinstance(data, dict):
+            tasks = self.query_update_tasks(data)
         else:
-            self.handle_response(action, data, result)
+            objects = self.skip_journaled('update', self.bulk_objects(data))
+            tasks = self.file_update_tasks(objects)
+        self.bulk_execute('update', tasks)
+
+    def query_update_tasks(self, data):
+        """
+        Generate update tasks for the objects matching a set query.
+
+        The changes for each object are computed locally, and only objects
+        that would change are PATCHed.
+
+        :param data:
+            Dict of CLI params containing a set ``query``
+        """
+        attr_action = data.pop('attr_action', None)
+        multi = data.pop('multi', False)
+
+        changed = []
+        objects = self.skip_journaled('update', self.bulk_objects(data))
+        for obj in objects:
+            changes = self.get_changes(data, obj, attr_action, multi)
+            if changes:
+                changes['id'] = obj['id']
+                changed.append(changes)
+
+        resource = self.resource
+        for chunk in chunked(changed, constants.BULK_CHUNK_SIZE):
+            yield chunk, lambda chunk=chunk: resource.patch(chunk)
+
+    def file_update_tasks(self, objects):
+        """
+        Generate update tasks for objects as they are read.
+
+        :param objects:
+            Iterable of object dicts, each identified by ``id`` or natural key
+        """
+        resource = self.resource
+        resource_fields = NATURAL_KEY_IDS.get(self.resource_name, [])
+        chunk_size = constants.BULK_CHUNK_SIZE
+
+        by_id = []
+        for obj in objects:
+            if obj.get('id'):
+                by_id.append(
+                    dict((f, v) for (f, v) in obj.iteritems() if v != '')
+                )
+                if len(by_id) >= chunk_size:
+                    yield by_id, lambda chunk=by_id: resource.patch(chunk)
+                    by_id = []
+                continue
+
+            key = self.get_natural_key(obj)
+            if key is None:
+                raise click.UsageError(
+                    'Bulk update requires an id or natural key for each '
+                    '%s.' % (self.singular,)
+                )
+            changes = dict(
+                (f, v) for (f, v) in obj.iteritems()
+                if f != 'id' and f not in resource_fields and v != ''
+            )
+            yield (
+                [obj],
+                lambda key=key, changes=changes: resource(key).patch(changes)
+            )
+
+        if by_id:
+            yield by_id, lambda chunk=by_id: resource.patch(chunk)
+
+    def bulk_remove(self, data):
+        """
+        DELETE many objects, each by ``id`` or natural key.
+
+        :param data:
+            Either an iterable of object dicts, or a dict of CLI params
+            containing a set ``query``. See ``bulk_objects()``.
+        """
+        objects = self.skip_journaled('remove', self.bulk_objects(data))
+        resource = self.resource
+
+        def tasks(objects):
+            for obj in objects:
+                key = obj.get('id') or self.get_natural_key(obj)
+                if key is None:
+                    raise click.UsageError(
+                        'Bulk remove requires an id or natural key for each '
+                        '%s.' % (self.singular,)
+                    )
+                yield [obj], lambda key=key: resource(key).delete()
+
+        self.bulk_execute('remove', tasks(objects))
 
 
 @click.command(cls=NsotCLI, context_settings=CONTEXT_SETTINGS)
+@click.option(
+    '-j',
+    '--journal',
+    metavar='FILENAME',
+    help=(
+        'Record the progress of bulk actions in this file, and skip objects '
+        'it records as completed.'
+    ),
+    type=click.Path(dir_okay=False, writable=True),
+)
 @click.option('-v', '--verbose', is_flag=True, help='Toggle verbosity.')
 @click.version_option(version=pynsot.__version__)
 @click.pass_context
-def app(ctx, verbose):
+def app(ctx, journal, verbose):
     """
     Network Source of Truth (NSoT) command-line utility.
 
     For detailed documentation, please visit https://nsot.readthedocs.io
     """
+    if journal is not None:
+        journal = Journal(journal)
+        ctx.call_on_close(journal.close)
+
     # This is the "app" object attached to all contexts.
-    ctx.obj = App(ctx=ctx, verbose=verbose)
+    ctx.obj = App(ctx=ctx, verbose=verbose, journal=journal)
 
     # Store the invoked_subcommand (e.g. 'networks') name as
     # parent_resource_name so that descendent sub-commands can reference where
@@ -22,9 +22,13 @@ import os
 from .vendor import click
 from .vendor.requests.auth import AuthBase
 from .vendor import slumber
-from .vendor.slumber.exceptions import HttpClientError
+from .vendor.slumber.exceptions import HttpClientError, HttpServerError
+from .vendor.slumber.serialize import Serializer
 
-from .util import get_result
+from .limiter import get_limiters
+from .serializers import CodecSerializer
+from .transport import ForkSafeSession, TransportAdapter, get_session
+from .util import get_result, iter_json_results, parse_bool
 from . import constants, dotfile
 
 
@@ -39,9 +43,16 @@ log = logging.getLogger(__name__)
 
 
 __all__ = (
-    'ClientError', 'LoginFailed', 'BaseClient', 'EmailHeaderAuthentication',
-    'EmailHeaderClient', 'AuthTokenAuthentication', 'AuthTokenClient',
-    'get_auth_client_info', 'get_api_client'
+    'ClientError', 'LoginFailed', 'BaseClient', 'SiteClient',
+    'EmailHeaderAuthentication', 'EmailHeaderClient',
+    'AuthTokenAuthentication', 'AuthTokenClient', 'get_auth_client_info',
+    'get_api_client', 'stream_results'
+)
+
+
+#: Client settings used to build its sessions
+SESSION_SETTINGS = tuple(
+    name for name in constants.TUNING_FIELDS if name != 'json_codec'
 )
 
 
@@ -56,6 +67,11 @@ class LoginFailed(ClientError):
 class BaseClient(slumber.API):
     """
     Magic REST API client for NSoT.
+
+    A client may be shared by the threads of a process, and by the processes
+    forked after it was created (e.g. a ``multiprocessing.Pool``), without
+    authenticating again: each process sends its requests through its own
+    session. See :class:`pynsot.transport.ForkSafeSession`.
     """
     authentication_class = None
 
@@ -66,6 +82,22 @@ class BaseClient(slumber.API):
         self.api_version = kwargs.pop('api_version', None)  # API version
         log.debug('Using api_version = %s' % self.api_version)
 
+        # JSON codec used to (de)serialize requests and responses
+        json_codec = kwargs.pop('json_codec', None)
+        if kwargs.get('serializer') is None:
+            kwargs['serializer'] = Serializer(
+                default='json', serializers=[CodecSerializer(json_codec)]
+            )
+
+        # One tuned session per process is used for every request, including
+        # auth, unless a session is given. A given session is used as-is.
+        if kwargs.get('session') is None:
+            kwargs['session'] = self.get_session(kwargs)
+        else:
+            for name in SESSION_SETTINGS:
+                kwargs.pop(name, None)
+        self._session = kwargs['session']
+
         # Override the auth method if we have defined .get_auth()
         if auth is None:
             # Set these as object attributes so that they can be mutated in the
@@ -78,16 +110,83 @@ class BaseClient(slumber.API):
         kwargs['append_slash'] = True  # Append slashes!
         super(BaseClient, self).__init__(base_url, **kwargs)
 
-        # Store auth and headers for use later.
+        # Store auth for use later.
         self._auth = auth
-        self._headers = self._store['session'].headers
+
+    @property
+    def _headers(self):
+        """Headers sent with every request of the current process."""
+        return self._session.headers
+
+    @property
+    def _adapter(self):
+        """Transport adapter of the current process."""
+        return self._session.get_adapter(self._base_url)
+
+    @property
+    def transfer_stats(self):
+        """
+        :class:`pynsot.transport.TransferStats` of the current process, or
+        None if the client was given a session of its own.
+        """
+        return getattr(self._adapter, 'stats', None)
+
+    @property
+    def limiters(self):
+        """
+        Limiters of requests in flight of the current process, or None if the
+        client was given a session of its own. See :mod:`pynsot.limiter`.
+        """
+        return getattr(self._adapter, 'limiters', None)
+
+    def get_session(self, kwargs):
+        """
+        Return a session tuned by the settings in ``kwargs``, which are popped.
+
+        Each process gets a new session built from the same settings. See
+        :func:`pynsot.transport.get_session` and :mod:`pynsot.limiter`.
+
+        :param kwargs:
+            Client keyword arguments
+        """
+        settings = dict(
+            (name, kwargs.pop(name, None)) for name in SESSION_SETTINGS
+        )
+        return ForkSafeSession(lambda: self.new_session(settings))
+
+    def new_session(self, settings):
+        """
+        Return a new session, with its own limiters and transfer stats.
+
+        :param settings:
+            Mapping of session setting to value, or None for the default
+        """
+        limiters = get_limiters(
+            read_concurrency=settings['read_concurrency'],
+            write_concurrency=settings['write_concurrency'],
+            read_rate=settings['read_rate'],
+            write_rate=settings['write_rate'],
+            read_latency=settings['read_latency'],
+            write_latency=settings['write_latency'],
+        )
+        keep_alive = settings['keep_alive']
+        coalesce = settings['coalesce']
+        return get_session(
+            compress=parse_bool(settings['compress'] or False),
+            compress_threshold=settings['compress_threshold'],
+            pool_connections=settings['pool_connections'],
+            pool_maxsize=settings['pool_maxsize'],
+            max_retries=settings['max_retries'],
+            timeout=settings['timeout'],
+            keep_alive=keep_alive is None or parse_bool(keep_alive),
+            limiters=limiters,
+            coalesce=coalesce is None or parse_bool(coalesce),
+        )
 
     def _fetch_resources(self):
         """Fetch resources from API"""
-        headers = self._headers
-        auth = self._auth
         api_root = self._base_url + '/'
-        r = slumber.requests.get(api_root, auth=auth, headers=headers)
+        r = self._session.get(api_root)
 
         if r.ok:
             return r.json()
@@ -158,11 +257,82 @@ class BaseClient(slumber.API):
         """
         return getattr(self, resource_name)
 
+    def site(self, site_id):
+        """
+        Return a view of this client scoped to a single Site.
+
+        The client itself is not modified, so any number of views for any
+        number of sites may be used at the same time.
+
+        :param site_id:
+            Unique ID of the Site
+        """
+        return SiteClient(self, site_id)
+
     def __repr__(self):
         cls_name = self.__class__.__name__
         return '<%s(url=%s)>' % (cls_name, self._store['base_url'])
 
 
+class SiteClient(object):
+    """
+    Immutable view of an API client scoped to a single Site.
+
+    Resources are resolved relative to ``/api/sites/:site_id/`` and share the
+    session, auth and serializer of the parent client::
+
+        >>> site = api.site(1)
+        >>> site.networks.get()  # GET /api/sites/1/networks/
+
+    :param client:
+        Parent client instance
+
+    :param site_id:
+        Unique ID of the Site
+    """
+    __slots__ = ('_client', '_site_id', '_site')
+
+    def __init__(self, client, site_id):
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_site_id', site_id)
+        object.__setattr__(self, '_site', client.sites(site_id))
+
+    @property
+    def client(self):
+        """The parent client."""
+        return self._client
+
+    @property
+    def site_id(self):
+        """Unique ID of the Site this view is scoped to."""
+        return self._site_id
+
+    @property
+    def default_site(self):
+        return self._site_id
+
+    def get_resource(self, resource_name):
+        """
+        Return a single resource object under this Site.
+
+        :param resource_name:
+            Name of resource
+        """
+        return getattr(self._site, resource_name)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.get_resource(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is read-only' % self.__class__.__name__)
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '<%s(url=%s)>' % (cls_name, self._site.url())
+
+
 class BaseClientAuth(AuthBase):
     def __init__(self, client):
         """
@@ -274,7 +444,7 @@ class AuthTokenAuthentication(BaseClientAuth):
         try:
             url = base_url + '/authenticate/'
             headers = {'content-type': 'application/json'}
-            resp = slumber.requests.post(
+            resp = self.client._session.post(
                 url, data=json.dumps(data), headers=headers
             )
         except Exception as err:
@@ -323,6 +493,58 @@ def get_auth_client_info(auth_method):
     return AUTH_CLIENTS[auth_method]
 
 
+def stream_results(resource, chunk_size=64 * 1024, **params):
+    """
+    GET a list resource and lazily decode its results one object at a time.
+
+    Unlike ``get_result(resource.get())``, the response body is streamed and
+    never held in memory as a whole, so memory use stays flat no matter how
+    many objects are returned::
+
+        >>> for device in stream_results(api.sites(1).devices, limit=100000):
+        ...     print device['hostname']
+
+    :param resource:
+        API resource object (e.g. ``api.sites(1).devices``)
+
+    :param chunk_size:
+        Number of bytes read from the response at a time
+
+    :param params:
+        Query parameters
+    """
+    session = resource._store['session']
+    url = resource.url()
+    response = session.get(url, params=params, stream=True)
+    size = [0]
+
+    def counted(chunks):
+        for chunk in chunks:
+            size[0] += len(chunk)
+            yield chunk
+
+    try:
+        if 400 <= response.status_code <= 499:
+            raise HttpClientError(
+                'Client Error %s: %s' % (response.status_code, url),
+                response=response, content=response.content
+            )
+        elif 500 <= response.status_code <= 599:
+            raise HttpServerError(
+                'Server Error %s: %s' % (response.status_code, url),
+                response=response, content=response.content
+            )
+
+        chunks = counted(response.iter_content(chunk_size))
+        for obj in iter_json_results(chunks):
+            yield obj
+    finally:
+        adapter = session.get_adapter(url)
+        if isinstance(adapter, TransportAdapter):
+            adapter.record_response(response, raw=size[0])
+        response.close()
+
+
 def get_api_client(auth_method=None, url=None, extra_args=None,
                    use_dotfile=True):
     """
@@ -375,9 +597,9 @@ def get_api_client(auth_method=None, url=None, extra_args=None,
 
     arg_names = client_class.required_arguments
 
-    # Allow optional arguments in arg_names
+    # Allow optional and tuning arguments in arg_names
     optional_args = tuple(constants.OPTIONAL_FIELDS)
-    arg_names += optional_args
+    arg_names += optional_args + constants.TUNING_FIELDS
 
     # Remove non-relavant args
     for client_arg in client_args.keys():
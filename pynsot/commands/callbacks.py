@@ -7,9 +7,12 @@ Callbacks used in handling command plugins.
 from __future__ import unicode_literals
 import ast
 import csv
+import json
 import logging
+import os
 
 from ..vendor import click
+from ..util import get_result
 
 
 log = logging.getLogger(__name__)
@@ -17,6 +20,17 @@ log = logging.getLogger(__name__)
 # Objects that do not have attribtues
 NO_ATTRIBUTES = ('attributes',)
 
+# Formats of bulk files by file extension. Any other file is colon-delimited.
+BULK_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'jsonl',
+    '.jsonl': 'jsonl',
+}
+
+# Fields that hold a list of values, which are comma-separated in delimited
+# bulk files.
+LIST_FIELDS = ('addresses',)
+
 
 def process_site_id(ctx, param, value):
     """
@@ -38,6 +52,34 @@ def process_site_id(ctx, param, value):
     return value
 
 
+def process_site_ids(ctx, param, value):
+    """
+    Callback like ``process_site_id()`` that also accepts a comma-separated
+    list of site IDs, or ``all``, for commands that can fan out across Sites.
+
+    A single site_id is returned as-is, otherwise a list of site_ids.
+    """
+    if value is None:
+        return process_site_id(ctx, param, value)
+
+    if value == 'all':
+        sites = get_result(ctx.obj.api.sites.get())
+        return [site['id'] for site in sites]
+
+    try:
+        site_ids = [int(site_id) for site_id in value.split(',') if site_id]
+    except ValueError:
+        site_ids = None
+    if not site_ids:
+        raise click.BadParameter(
+            'Must be a site ID, a comma-separated list of site IDs, or "all".'
+        )
+
+    if ',' not in value:
+        return process_site_id(ctx, param, value)
+    return site_ids
+
+
 def process_constraints(data, constraint_fields):
     """
     Callback to move constrained fields from incoming data into a 'constraints'
@@ -52,11 +94,11 @@ def process_constraints(data, constraint_fields):
     # Always use a list so that we can handle bulk operations
     objects = data if isinstance(data, list) else [data]
 
-    # Enforce that pattern is a string.
-    if data['pattern'] is None:
-        data['pattern'] = ''
-
     for obj in objects:
+        # Enforce that pattern is a string.
+        if obj.get('pattern') is None:
+            obj['pattern'] = ''
+
         constraints = {}
         for c_field in constraint_fields:
             try:
@@ -72,11 +114,13 @@ def process_constraints(data, constraint_fields):
     return data
 
 
-def transform_attributes(ctx, param, value):
-    """Callback to turn attributes arguments into a dict."""
-    attrs = {}
-    log.debug('TRANSFORM_ATTRIBUTES [IN]: %r' % (value,))
+def parse_attributes(value):
+    """
+    Turn attributes arguments into a list of (key, value) pairs.
 
+    :param value:
+        An attribute string (format: key=value), or a list of them
+    """
     # If this is a simple string, make it a list.
     if isinstance(value, basestring):
         value = [value]
@@ -84,11 +128,7 @@ def transform_attributes(ctx, param, value):
     # Flatten the attributes using a set to eliminate any duplicates.
     items = set(value)
 
-    # Prepare the context object for storing attribute actions
-    parent = ctx.find_root()
-    if not hasattr(parent, '_attributes'):
-        parent._attributes = []
-
+    pairs = []
     for attr in items:
         key, _, val = attr.partition('=')
         if not key:
@@ -101,9 +141,23 @@ def transform_attributes(ctx, param, value):
 
         log.debug(' name = %r', key)
         log.debug('value = %r', val)
-        parent._attributes.append((key, val))
-        attrs[key] = val
+        pairs.append((key, val))
+
+    return pairs
+
 
+def transform_attributes(ctx, param, value):
+    """Callback to turn attributes arguments into a dict."""
+    log.debug('TRANSFORM_ATTRIBUTES [IN]: %r' % (value,))
+    pairs = parse_attributes(value)
+
+    # Store the attribute actions on the context object
+    parent = ctx.find_root()
+    if not hasattr(parent, '_attributes'):
+        parent._attributes = []
+    parent._attributes.extend(pairs)
+
+    attrs = dict(pairs)
     log.debug('TRANSFORM_ATTRIBUTES [OUT]: %r' % (attrs,))
     return attrs
 
@@ -124,23 +178,84 @@ def transform_resource_name(ctx, param, value):
 
 def process_bulk_add(ctx, param, value):
     """
-    Callback to parse bulk addition of objects from a colon-delimited file.
+    Callback to parse bulk operations on objects from a file.
+
+    The format is determined by the file extension: ``.jsonl`` (or ``.json``)
+    files contain one JSON object per line, ``.csv`` files are
+    comma-delimited, and any other file is colon-delimited.
 
-    Format:
+    Delimited format:
 
     + The first line of the file must be the field names.
     + Attribute pairs must be commma-separated, and in format k=v
+    + Addresses must be comma-separated
     + The attributes must exist!
+
+    The file is parsed lazily: an iterator of dicts is returned, and each line
+    is only read and validated as the objects are consumed.
     """
     if value is None:
         return value
 
     # This is our object name (e.g. 'devices')
     parent_resource_name = ctx.obj.parent_resource_name
-    objects = []
 
-    # Value is already an open file handle
-    reader = csv.DictReader(value, delimiter=b':')
+    ext = os.path.splitext(getattr(value, 'name', ''))[1].lower()
+    bulk_format = BULK_FORMATS.get(ext)
+    log.debug('BULK FORMAT: %r', bulk_format)
+
+    if bulk_format == 'jsonl':
+        return iter_json_rows(value)
+
+    delimiter = b',' if bulk_format == 'csv' else b':'
+    return iter_bulk_rows(value, parent_resource_name, delimiter)
+
+
+def iter_json_rows(fh):
+    """
+    Generate object dicts from a file containing one JSON object per line.
+
+    Blank lines are skipped.
+
+    :param fh:
+        Open file handle
+    """
+    for lineno, line in enumerate(fh, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError:
+            msg = 'Invalid JSON on line %d' % (lineno,)
+            raise click.BadParameter(msg)
+
+        if not isinstance(row, dict):
+            msg = 'Expected a JSON object on line %d' % (lineno,)
+            raise click.BadParameter(msg)
+
+        log.debug('FILE ROW: %r', row)
+        yield row
+
+
+def iter_bulk_rows(fh, resource_name, delimiter=b':'):
+    """
+    Generate object dicts from a delimited file.
+
+    Attributes are parsed w/out being recorded on the context object, so that
+    memory use doesn't grow with the size of the file.
+
+    :param fh:
+        Open file handle
+
+    :param resource_name:
+        API resource name (e.g. 'devices')
+
+    :param delimiter:
+        Field delimiter
+    """
+    reader = csv.DictReader(fh, delimiter=delimiter)
     for row in reader:
         lineno = reader.line_num
 
@@ -150,21 +265,24 @@ def process_bulk_add(ctx, param, value):
             raise click.BadParameter(msg)
 
         # Transform attributes for eligible resource types
-        if parent_resource_name not in NO_ATTRIBUTES:
+        if resource_name not in NO_ATTRIBUTES and 'attributes' in row:
             # FIXME(jathan): This IS going to break at some point. We need to
             # considered how to take in complex a/v pairs in this context.
-            # Naively split on ',' for now.
+            # Naively split on ',' for now. Use a .jsonl file for anything
+            # more complex.
             incoming_attributes = row['attributes'].split(',')
-            outgoing_attributes = transform_attributes(
-                ctx, param, incoming_attributes
-            )
-            row['attributes'] = outgoing_attributes
+            row['attributes'] = dict(parse_attributes(incoming_attributes))
+
+        # Split list fields
+        for field in LIST_FIELDS:
+            if isinstance(row.get(field), basestring):
+                row[field] = [v for v in row[field].split(',') if v]
 
         # Transform True, False into booleans
         log.debug('FILE ROW: %r', row)
         for key, val in row.iteritems():
-            # Don't evaluate dicts
-            if isinstance(val, dict):
+            # Don't evaluate dicts or lists
+            if isinstance(val, (dict, list)):
                 continue
 
             # Evaluate strings and if they are booleans, convert them.
@@ -173,18 +291,17 @@ def process_bulk_add(ctx, param, value):
                 raise click.BadParameter(msg)
             if val.title() in ('True', 'False'):
                 row[key] = ast.literal_eval(val)
-        objects.append(row)
 
-    log.debug('PARSED BULK DATA = %r' % (objects,))
-
-    # Return a list of dicts
-    return objects
+        yield row
 
 
 def get_resource_by_natural_key(ctx, data, resource_name, resource=None):
     """
     Attempt to return the reource_id for an object.
 
+    If the natural key (e.g. hostname or cidr) can address the object directly,
+    it is returned as-is so that no lookup is required.
+
     :param ctx:
         Context from the calling command
 
@@ -197,10 +314,15 @@ def get_resource_by_natural_key(ctx, data, resource_name, resource=None):
     :param resource:
         The API resource client object
     """
+    # Use the natural key (e.g. cidr) as the resource_id
+    natural_key = ctx.obj.get_natural_key(data, resource_name)
+    if natural_key is not None:
+        return natural_key
+
     resource_id = None
     obj = None
 
-    # Look up the object by natural key (e.g. cidr)
+    # Otherwise look up the object by its natural key fields
     obj = ctx.obj.get_single_object(data, resource=resource)
 
     # If the object was found, get its id
@@ -267,7 +389,7 @@ def list_subcommand(ctx, display_fields=None, my_name=None, grep_name=None,
     # This will be used for resource lookup for detail routes.
     parent_resource_id = data.pop('id')
 
-    # Prepare the app and rebase the API to include site_id.
+    # Prepare the app and scope the API to the site_id.
     app = ctx.obj
     app.rebase(data)
 
@@ -281,7 +403,7 @@ def list_subcommand(ctx, display_fields=None, my_name=None, grep_name=None,
         my_name = ctx.info_name  # e.g. 'supernets'
 
     # e.g. /api/sites/1/networks/
-    parent_resource = getattr(app.api, parent_resource_name)
+    parent_resource = app.site_api.get_resource(parent_resource_name)
 
     # Make sure that parent_resource_id is provided. This seems complicated
     # because we want to maintain dynamism across resource types.
@@ -74,7 +74,10 @@ def cli(ctx):
     '-b',
     '--bulk-add',
     metavar='FILENAME',
-    help='Bulk add Attributes from the specified colon-delimited file.',
+    help=(
+        'Bulk add Attributes from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
     type=click.File('rb'),
     callback=callbacks.process_bulk_add,
 )
@@ -148,18 +151,23 @@ def add(ctx, allow_empty, bulk_add, description, display, multi, name, pattern,
     When adding a new Attribute, you must provide a value for the -n/--name
     and -r/--resource-name options.
     """
-    data = bulk_add or ctx.params
+    # Handle the constraint fields for each row as it is read.
+    if bulk_add is not None:
+        return ctx.obj.bulk_add(
+            callbacks.process_constraints(
+                row, constraint_fields=CONSTRAINT_FIELDS
+            ) for row in bulk_add
+        )
 
     # Enforce required options
-    if bulk_add is None:
-        if name is None:
-            raise click.UsageError('Missing option "-n" / "--name".')
-        if resource_name is None:
-            raise click.UsageError('Missing option "-r" / "--resource-name".')
+    if name is None:
+        raise click.UsageError('Missing option "-n" / "--name".')
+    if resource_name is None:
+        raise click.UsageError('Missing option "-r" / "--resource-name".')
 
     # Handle the constraint fields
     data = callbacks.process_constraints(
-        data, constraint_fields=CONSTRAINT_FIELDS
+        ctx.params, constraint_fields=CONSTRAINT_FIELDS
     )
     ctx.obj.add(data)
 
@@ -226,9 +234,12 @@ def add(ctx, allow_empty, bulk_add, description, display, multi, name, pattern,
     '-s',
     '--site-id',
     metavar='SITE_ID',
-    type=int,
-    help='Unique ID of the Site this Attribute is under.  [required]',
-    callback=callbacks.process_site_id,
+    help=(
+        'Unique ID of the Site this Attribute is under. May also be a '
+        'comma-separated list of IDs, or "all" for every Site.  '
+        '[required]'
+    ),
+    callback=callbacks.process_site_ids,
 )
 @click.pass_context
 def list(ctx, id, display, limit, multi, name, natural_key, offset, required,
@@ -238,6 +249,9 @@ def list(ctx, id, display, limit, multi, name, natural_key, offset, required,
 
     You must provide a Site ID using the -s/--site-id option.
 
+    You may list Attributes across several Sites at once by providing a
+    comma-separated list of Site IDs, or "all", to -s/--site-id.
+
     When listing Attributes, all objects are displayed by default. You may
     optionally lookup a single Attribute by name using the -n/--name option or
     by ID using the -i/--id option.
@@ -60,9 +60,19 @@ def cli(ctx):
     '-A',
     '--endpoint-a',
     metavar='INTERFACE_ID',
-    required=True,
     type=int,
-    help='Unique ID of the interface of the A side of the Circuit',
+    help='Unique ID of the interface of the A side of the Circuit  [required]',
+)
+@click.option(
+    '-b',
+    '--bulk-add',
+    metavar='FILENAME',
+    help=(
+        'Bulk add Circuits from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
 )
 @click.option(
     '-n',
@@ -87,7 +97,7 @@ def cli(ctx):
     help='Unique ID of the interface on the Z side of the Circuit',
 )
 @click.pass_context
-def add(ctx, attributes, endpoint_a, name, site_id, endpoint_z):
+def add(ctx, attributes, endpoint_a, bulk_add, name, site_id, endpoint_z):
     """
     Add a new Circuit.
 
@@ -102,9 +112,17 @@ def add(ctx, attributes, endpoint_a, name, site_id, endpoint_z):
 
     If you wish to add attributes, you may specify the -a/--attributes
     option once for each key/value pair.
+
+    You may add many Circuits at once from a file using -b/--bulk-add.
     """
+    if bulk_add is not None:
+        return ctx.obj.bulk_add(bulk_add)
+
+    if endpoint_a is None:
+        raise click.UsageError('Missing option "-A" / "--endpoint-a".')
 
     data = ctx.params
+    data.pop('bulk_add')
 
     # Remove empty values to facilitate default assignment
     if name is None:
@@ -170,6 +188,16 @@ def add(ctx, attributes, endpoint_a, name, site_id, endpoint_z):
     metavar='OFFSET',
     help='Skip the first N resources.',
 )
+@click.option(
+    '--prefetch',
+    is_flag=True,
+    help=(
+        'Fetch the endpoint Interfaces of all Circuits at once and display '
+        'them by natural key instead of ID.'
+    ),
+    default=False,
+    show_default=True,
+)
 @click.option(
     '-q',
     '--query',
@@ -180,8 +208,12 @@ def add(ctx, attributes, endpoint_a, name, site_id, endpoint_z):
     '-s',
     '--site-id',
     metavar='SITE_ID',
-    help='Unique ID of the Site this Circuit is under.',
-    callback=callbacks.process_site_id,
+    help=(
+        'Unique ID of the Site this Circuit is under. May also be a '
+        'comma-separated list of IDs, or "all" for every Site.  '
+        '[required]'
+    ),
+    callback=callbacks.process_site_ids,
 )
 @click.option(
     '-Z',
@@ -191,26 +223,36 @@ def add(ctx, attributes, endpoint_a, name, site_id, endpoint_z):
 )
 @click.pass_context
 def list(ctx, attributes, endpoint_a, endpoint_z, grep, id, limit, name,
-         natural_key, offset, query, site_id):
+         natural_key, offset, prefetch, query, site_id):
     """
     List existing Circuits for a Site.
 
     You must either have a Site ID configured in your .pysnotrc file or specify
     one using the -s/--site-id option.
 
+    You may list Circuits across several Sites at once by providing a
+    comma-separated list of Site IDs, or "all", to -s/--site-id.
+
     When listing Circuits, all objects are displayed by default. You optionally
     may look up a single Circuit by ID or Name using the -i/--id option.
 
     You may limit the number of results using the -l/--limit option.
+
+    You may display endpoints as Interface natural keys instead of IDs using
+    the --prefetch option.
     """
 
     # If we get a name as an identifier, slugify it
     if ctx.params.get('id') and not ctx.params['id'].isdigit():
         ctx.params['id'] = slugify(ctx.params['id'])
 
+    ctx.params.pop('prefetch')
+
     # Don't list interfaces if a subcommand is invoked
     if ctx.invoked_subcommand is None:
-        ctx.obj.list(ctx.params, display_fields=DISPLAY_FIELDS)
+        ctx.obj.list(
+            ctx.params, display_fields=DISPLAY_FIELDS, prefetch=prefetch
+        )
 
 
 @list.command()
@@ -260,12 +302,22 @@ def interfaces(ctx, *args, **kwargs):
     type=int,
     help='Unique ID of the interface of the A side of the Circuit',
 )
+@click.option(
+    '-b',
+    '--bulk-update',
+    metavar='FILENAME',
+    help=(
+        'Bulk update Circuits from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-i',
     '--id',
     metavar='ID',
     help='Unique ID of the Circuit being retrieved.',
-    required=True,
 )
 @click.option(
     '-n',
@@ -274,6 +326,12 @@ def interfaces(ctx, *args, **kwargs):
     type=str,
     help='The name of the Circuit.',
 )
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Update Circuits matching this set query.',
+)
 @click.option(
     '-s',
     '--site-id',
@@ -319,8 +377,8 @@ def interfaces(ctx, *args, **kwargs):
     ),
 )
 @click.pass_context
-def update(ctx, attributes, endpoint_a, id, name, site_id, endpoint_z,
-           attr_action):
+def update(ctx, attributes, endpoint_a, bulk_update, id, name, query, site_id,
+           endpoint_z, attr_action):
     """
     Update a Circuit.
 
@@ -343,7 +401,17 @@ def update(ctx, attributes, endpoint_a, id, name, site_id, endpoint_z,
     * Replace (--replace-attributes). This will cause attributes to
     replaced. If combined with --multi and multiple attributes of the same
     name are provided, only the last value provided will be used.
+
+    You may instead update many Circuits at once, either from a file of
+    Circuits identified by id or name (-b/--bulk-update), or every Circuit
+    matching a set query (-q/--query). Attributes provided in a file replace
+    the existing attributes.
     """
+    data = ctx.params
+    data.pop('bulk_update')
+
+    if bulk_update is not None:
+        return ctx.obj.bulk_update(bulk_update)
 
     # If we get a name as an identifier, slugify it
     if ctx.params.get('id') and not ctx.params['id'].isdigit():
@@ -353,17 +421,41 @@ def update(ctx, attributes, endpoint_a, id, name, site_id, endpoint_z,
         msg = 'You must supply at least one of the optional arguments.'
         raise click.UsageError(msg)
 
-    ctx.obj.update(ctx.params)
+    if query is not None:
+        data.pop('id')
+        return ctx.obj.bulk_update(data)
+
+    if id is None:
+        raise click.UsageError('Missing option "-i" / "--id".')
+
+    data.pop('query')
+    ctx.obj.update(data)
 
 
 # Remove
 @cli.command()
+@click.option(
+    '-b',
+    '--bulk-remove',
+    metavar='FILENAME',
+    help=(
+        'Bulk remove Circuits from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-i',
     '--id',
     metavar='ID',
     help='Unique ID of the Circuit being deleted.',
-    required=True,
+)
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Remove Circuits matching this set query.',
 )
 @click.option(
     '-s',
@@ -374,7 +466,7 @@ def update(ctx, attributes, endpoint_a, id, name, site_id, endpoint_z,
     callback=callbacks.process_site_id,
 )
 @click.pass_context
-def remove(ctx, id, site_id):
+def remove(ctx, bulk_remove, id, query, site_id):
     """
     Remove a Circuit.
 
@@ -384,10 +476,24 @@ def remove(ctx, id, site_id):
     When removing Circuits, all objects are displayed by default. You
     optionally may look up a single Circuit by ID or Name using the -i/--id
     option.
+
+    You may instead remove many Circuits at once, either from a file of
+    Circuits identified by id or name (-b/--bulk-remove), or every Circuit
+    matching a set query (-q/--query).
     """
+    data = ctx.params
+
+    if bulk_remove is not None:
+        return ctx.obj.bulk_remove(bulk_remove)
+    if query is not None:
+        return ctx.obj.bulk_remove(data)
+    if id is None:
+        raise click.UsageError('Missing option "-i" / "--id".')
 
     # If we get a name as an identifier, slugify it
-    if ctx.params.get('id') and not ctx.params['id'].isdigit():
-        ctx.params['id'] = slugify(ctx.params['id'])
+    if not id.isdigit():
+        data['id'] = slugify(id)
 
-    ctx.obj.remove(**ctx.params)
+    data.pop('bulk_remove')
+    data.pop('query')
+    ctx.obj.remove(**data)
@@ -57,7 +57,10 @@ def cli(ctx):
     '-b',
     '--bulk-add',
     metavar='FILENAME',
-    help='Bulk add Devices from the specified colon-delimited file.',
+    help=(
+        'Bulk add Devices from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
     type=click.File('rb'),
     callback=callbacks.process_bulk_add,
 )
@@ -88,14 +91,14 @@ def add(ctx, attributes, bulk_add, hostname, site_id):
     If you wish to add attributes, you may specify the -a/--attributes
     option once for each key/value pair.
     """
-    data = bulk_add or ctx.params
+    if bulk_add is not None:
+        return ctx.obj.bulk_add(bulk_add)
 
     # Enforce required options
-    if bulk_add is None:
-        if hostname is None:
-            raise click.UsageError('Missing option "-H" / "--hostname".')
+    if hostname is None:
+        raise click.UsageError('Missing option "-H" / "--hostname".')
 
-    ctx.obj.add(data)
+    ctx.obj.add(ctx.params)
 
 
 # List
@@ -158,6 +161,13 @@ def add(ctx, attributes, bulk_add, hostname, site_id):
     metavar='OFFSET',
     help='Skip the first N resources.',
 )
+@click.option(
+    '--prefetch',
+    is_flag=True,
+    help='Fetch the Interfaces of all Devices at once and display them.',
+    default=False,
+    show_default=True,
+)
 @click.option(
     '-q',
     '--query',
@@ -168,31 +178,46 @@ def add(ctx, attributes, bulk_add, hostname, site_id):
     '-s',
     '--site-id',
     metavar='SITE_ID',
-    type=int,
-    help='Unique ID of the Site this Device is under.  [required]',
-    callback=callbacks.process_site_id,
+    help=(
+        'Unique ID of the Site this Device is under. May also be a '
+        'comma-separated list of IDs, or "all" for every Site.  '
+        '[required]'
+    ),
+    callback=callbacks.process_site_ids,
 )
 @click.pass_context
 def list(ctx, attributes, delimited, grep, hostname, id, limit, natural_key,
-         offset, query, site_id):
+         offset, prefetch, query, site_id):
     """
     List existing Devices for a Site.
 
     You must provide a Site ID using the -s/--site-id option.
 
+    You may list Devices across several Sites at once by providing a
+    comma-separated list of Site IDs, or "all", to -s/--site-id.
+
     When listing Devices, all objects are displayed by default. You may
     optionally lookup a single Device by ID using the -i/--id option.
 
     You may limit the number of results using the -l/--limit option.
+
+    You may display the Interfaces of each Device using the --prefetch option,
+    which fetches them all at once instead of one Device at a time.
     """
     data = ctx.params
     data.pop('delimited')  # We don't want this going to the server.
+    data.pop('prefetch')
 
     if ctx.invoked_subcommand is None:
         if query is not None:
             ctx.obj.natural_keys_by_query(data, delimited)
         else:
-            ctx.obj.list(data, display_fields=DISPLAY_FIELDS)
+            display_fields = DISPLAY_FIELDS
+            if prefetch:
+                display_fields += (('interfaces', 'Interfaces'),)
+            ctx.obj.list(
+                data, display_fields=display_fields, prefetch=prefetch
+            )
 
 
 @list.command()
@@ -207,6 +232,17 @@ def interfaces(ctx, *args, **kwargs):
 
 # Remove
 @cli.command()
+@click.option(
+    '-b',
+    '--bulk-remove',
+    metavar='FILENAME',
+    help=(
+        'Bulk remove Devices from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-H',
     '--hostname',
@@ -220,7 +256,12 @@ def interfaces(ctx, *args, **kwargs):
     '--id',
     metavar='ID',
     help='Unique ID of the Device being deleted.',
-    required=True,
+)
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Remove Devices matching this set query.',
 )
 @click.option(
     '-s',
@@ -231,7 +272,7 @@ def interfaces(ctx, *args, **kwargs):
     callback=callbacks.process_site_id,
 )
 @click.pass_context
-def remove(ctx, id, site_id):
+def remove(ctx, bulk_remove, id, query, site_id):
     """
     Remove a Device.
 
@@ -241,9 +282,23 @@ def remove(ctx, id, site_id):
     -i/--id, or the hostname of the Device using -H/--hostname.
 
     If both are provided, -H/--hostname will be ignored.
+
+    You may instead remove many Devices at once, either from a file of
+    Devices identified by id or hostname (-b/--bulk-remove), or every
+    Device matching a set query (-q/--query).
     """
     data = ctx.params
-    ctx.obj.remove(**data)
+
+    if bulk_remove is not None:
+        ctx.obj.bulk_remove(bulk_remove)
+    elif query is not None:
+        ctx.obj.bulk_remove(data)
+    elif id is None:
+        raise click.UsageError('Missing option "-i" / "--id".')
+    else:
+        data.pop('bulk_remove')
+        data.pop('query')
+        ctx.obj.remove(**data)
 
 
 # Update
@@ -256,6 +311,17 @@ def remove(ctx, id, site_id):
     multiple=True,
     callback=callbacks.transform_attributes,
 )
+@click.option(
+    '-b',
+    '--bulk-update',
+    metavar='FILENAME',
+    help=(
+        'Bulk update Devices from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-H',
     '--hostname',
@@ -269,6 +335,12 @@ def remove(ctx, id, site_id):
     type=int,
     help='Unique ID of the Device being updated.',
 )
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Update Devices matching this set query.',
+)
 @click.option(
     '-s',
     '--site-id',
@@ -312,7 +384,8 @@ def remove(ctx, id, site_id):
     help='Treat the specified attributes as a list type.',
 )
 @click.pass_context
-def update(ctx, attributes, hostname, id, site_id, attr_action, multi):
+def update(ctx, attributes, bulk_update, hostname, id, query, site_id,
+           attr_action, multi):
     """
     Update a Device.
 
@@ -341,7 +414,26 @@ def update(ctx, attributes, hostname, id, site_id, attr_action, multi):
     * Replace (--replace-attributes). This will cause attributes to
     replaced. If combined with --multi and multiple attributes of the same
     name are provided, only the last value provided will be used.
+
+    You may instead update many Devices at once, either from a file of
+    Devices identified by id or hostname (-b/--bulk-update), or every Device
+    matching a set query (-q/--query). Attributes provided in a file replace
+    the existing attributes.
     """
+    data = ctx.params
+    data.pop('bulk_update')
+
+    if bulk_update is not None:
+        return ctx.obj.bulk_update(bulk_update)
+
+    if query is not None:
+        if not attributes:
+            msg = 'You must supply at least one of the optional arguments.'
+            raise click.UsageError(msg)
+        data.pop('id')
+        data.pop('hostname')
+        return ctx.obj.bulk_update(data)
+
     if not any([attributes, hostname]):
         msg = 'You must supply at least one of the optional arguments.'
         raise click.UsageError(msg)
@@ -351,5 +443,5 @@ def update(ctx, attributes, hostname, id, site_id, attr_action, multi):
             'You must provide -H/--hostname when not providing -i/--id.'
         )
 
-    data = ctx.params
+    data.pop('query')
     ctx.obj.update(data)
@@ -75,6 +75,17 @@ def cli(ctx):
     multiple=True,
     callback=callbacks.transform_attributes,
 )
+@click.option(
+    '-b',
+    '--bulk-add',
+    metavar='FILENAME',
+    help=(
+        'Bulk add Interfaces from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-c',
     '--addresses',
@@ -142,7 +153,7 @@ def cli(ctx):
     help='The Interface type ID (e.g. 6 for ethernet).',
 )
 @click.pass_context
-def add(ctx, attributes, addresses, device, description, mac_address,
+def add(ctx, attributes, bulk_add, addresses, device, description, mac_address,
         name, parent_id, speed, site_id, type):
     """
     Add a new Interface.
@@ -157,8 +168,15 @@ def add(ctx, attributes, addresses, device, description, mac_address,
 
     If you wish to assign addresses, you may specify the -c/--addresses
     option once for each IP address.
+
+    You may add many Interfaces at once from a file using -b/--bulk-add. In a
+    delimited file, multiple addresses are comma-separated.
     """
+    if bulk_add is not None:
+        return ctx.obj.bulk_add(bulk_add)
+
     data = ctx.params
+    data.pop('bulk_add')
 
     # Required option
     if name is None:
@@ -276,8 +294,12 @@ def add(ctx, attributes, addresses, device, description, mac_address,
     '-s',
     '--site-id',
     metavar='SITE_ID',
-    help='Unique ID of the Site this Interface is under.  [required]',
-    callback=callbacks.process_site_id,
+    help=(
+        'Unique ID of the Site this Interface is under. May also be a '
+        'comma-separated list of IDs, or "all" for every Site.  '
+        '[required]'
+    ),
+    callback=callbacks.process_site_ids,
 )
 @click.option(
     '-t',
@@ -295,6 +317,9 @@ def list(ctx, attributes, delimited, device, description, grep, id, limit,
 
     You must provide a Site ID using the -s/--site-id option.
 
+    You may list Interfaces across several Sites at once by providing a
+    comma-separated list of Site IDs, or "all", to -s/--site-id.
+
     When listing Interfaces, all objects are displayed by default. You
     optionally may lookup a single Interfaces by ID using the -i/--id option.
     The ID can either be the numeric ID of the Interface, or the combination of
@@ -425,12 +450,28 @@ def networks(ctx, *args, **kwargs):
 
 # Remove
 @cli.command()
+@click.option(
+    '-b',
+    '--bulk-remove',
+    metavar='FILENAME',
+    help=(
+        'Bulk remove Interfaces from the specified file (colon-delimited, '
+        '.csv or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-i',
     '--id',
     metavar='ID',
     help='Unique ID of the Interface being deleted.',
-    required=True,
+)
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Remove Interfaces matching this set query.',
 )
 @click.option(
     '-s',
@@ -441,7 +482,7 @@ def networks(ctx, *args, **kwargs):
     callback=callbacks.process_site_id,
 )
 @click.pass_context
-def remove(ctx, id, site_id):
+def remove(ctx, bulk_remove, id, query, site_id):
     """
     Remove an Interface.
 
@@ -458,9 +499,23 @@ def remove(ctx, id, site_id):
     Interfaces for a given Site:
 
         nsot interfaces list --site-id <site_id> | grep <interface>
+
+    You may instead remove many Interfaces at once, either from a file of
+    Interfaces identified by id or by device_hostname and name
+    (-b/--bulk-remove), or every Interface matching a set query (-q/--query).
     """
     data = ctx.params
-    ctx.obj.remove(**data)
+
+    if bulk_remove is not None:
+        ctx.obj.bulk_remove(bulk_remove)
+    elif query is not None:
+        ctx.obj.bulk_remove(data)
+    elif id is None:
+        raise click.UsageError('Missing option "-i" / "--id".')
+    else:
+        data.pop('bulk_remove')
+        data.pop('query')
+        ctx.obj.remove(**data)
 
 
 # Update
@@ -473,6 +528,17 @@ def remove(ctx, id, site_id):
     multiple=True,
     callback=callbacks.transform_attributes,
 )
+@click.option(
+    '-b',
+    '--bulk-update',
+    metavar='FILENAME',
+    help=(
+        'Bulk update Interfaces from the specified file (colon-delimited, '
+        '.csv or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-c',
     '--addresses',
@@ -492,7 +558,6 @@ def remove(ctx, id, site_id):
     '--id',
     metavar='ID',
     help='Unique ID of the Interface being updated.',
-    required=True,
 )
 @click.option(
     '-m',
@@ -515,6 +580,12 @@ def remove(ctx, id, site_id):
     type=int,
     help='Unique ID of the parent interface.',
 )
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Update Interfaces matching this set query.',
+)
 @click.option(
     '-S',
     '--speed',
@@ -572,8 +643,9 @@ def remove(ctx, id, site_id):
     help='Treat the specified attributes as a list type.',
 )
 @click.pass_context
-def update(ctx, attributes, addresses, description, id, mac_address, name,
-           parent_id, speed, site_id, type, attr_action, multi):
+def update(ctx, attributes, bulk_update, addresses, description, id,
+           mac_address, name, parent_id, query, speed, site_id, type,
+           attr_action, multi):
     """
     Update an Interface.
 
@@ -605,11 +677,29 @@ def update(ctx, attributes, addresses, description, id, mac_address, name,
     * Replace (--replace-attributes). This will cause attributes to
     replaced. If combined with --multi and multiple attributes of the same
     name are provided, only the last value provided will be used.
+
+    You may instead update many Interfaces at once, either from a file of
+    Interfaces identified by id or by device_hostname and name
+    (-b/--bulk-update), or every Interface matching a set query (-q/--query).
+    Attributes provided in a file replace the existing attributes.
     """
+    data = ctx.params
+    data.pop('bulk_update')
+
+    if bulk_update is not None:
+        return ctx.obj.bulk_update(bulk_update)
+
     if not any([name, addresses, attributes, description, mac_address,
                 parent_id, speed, type]):
         msg = 'You must supply at least one of the optional arguments.'
         raise click.UsageError(msg)
 
-    data = ctx.params
+    if query is not None:
+        data.pop('id')
+        return ctx.obj.bulk_update(data)
+
+    if id is None:
+        raise click.UsageError('Missing option "-i" / "--id".')
+
+    data.pop('query')
     ctx.obj.update(data)
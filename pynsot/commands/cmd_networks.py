@@ -93,7 +93,10 @@ def cli(ctx):
     '-b',
     '--bulk-add',
     metavar='FILENAME',
-    help='Bulk add Networks from the specified colon-delimited file.',
+    help=(
+        'Bulk add Networks from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
     type=click.File('rb'),
     callback=callbacks.process_bulk_add,
 )
@@ -131,17 +134,18 @@ def add(ctx, attributes, bulk_add, cidr, state, site_id):
     If you wish to add attributes, you may specify the -a/--attributes
     option once for each key/value pair.
     """
-    data = bulk_add or ctx.params
+    if bulk_add is not None:
+        return ctx.obj.bulk_add(bulk_add)
+
+    data = ctx.params
 
-    # Additional handling for non-bulk requests only, as bulk_add is a list
-    if bulk_add is None:
-        # Required option
-        if cidr is None:
-            raise click.UsageError('Missing option "-c" / "--cidr"')
+    # Required option
+    if cidr is None:
+        raise click.UsageError('Missing option "-c" / "--cidr"')
 
-        # Remove if empty; allow default assignment
-        if state is None:
-            data.pop('state', None)
+    # Remove if empty; allow default assignment
+    if state is None:
+        data.pop('state', None)
 
     ctx.obj.add(data)
 
@@ -266,8 +270,12 @@ def add(ctx, attributes, bulk_add, cidr, state, site_id):
     '-s',
     '--site-id',
     metavar='SITE_ID',
-    help='Unique ID of the Site this Network is under.  [required]',
-    callback=callbacks.process_site_id,
+    help=(
+        'Unique ID of the Site this Network is under. May also be a '
+        'comma-separated list of IDs, or "all" for every Site.  '
+        '[required]'
+    ),
+    callback=callbacks.process_site_ids,
 )
 @click.pass_context
 def list(ctx, attributes, cidr, delimited, grep, id, include_ips,
@@ -278,6 +286,9 @@ def list(ctx, attributes, cidr, delimited, grep, id, include_ips,
 
     You must provide a Site ID using the -s/--site-id option.
 
+    You may list Networks across several Sites at once by providing a
+    comma-separated list of Site IDs, or "all", to -s/--site-id.
+
     When listing Networks, all objects are displayed by default. You optionally
     may lookup a single Network by ID using the -i/--id option.
 
@@ -406,9 +417,7 @@ def closest_parent(ctx, *args, **kwargs):
     Get the closest matching parent of a Network even if it doesn't exist in
     the database.
     """
-    # FIXME(jathan): This is a workaround until we remove the natural_key
-    # machinery that predates the builtin support for natural_key lookups on
-    # the backend from the CLI app.
+    # The Network may not exist, so it can only be addressed by its CIDR.
     data = ctx.parent.params
     obj_id = data.get('id')
     cidr = data.get('cidr')
@@ -417,9 +426,6 @@ def closest_parent(ctx, *args, **kwargs):
             '-i/--id is invalid for this subcommand. Use -c/--cidr.'
         )
 
-    data['id'] = data['cidr']
-    # End workaround
-
     callbacks.list_subcommand(
         ctx, display_fields=DISPLAY_FIELDS, grep_name='networks'
     )
@@ -514,6 +520,17 @@ def next_address(ctx, *args, **kwargs):
 
 # Remove
 @cli.command()
+@click.option(
+    '-b',
+    '--bulk-remove',
+    metavar='FILENAME',
+    help=(
+        'Bulk remove Networks from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-c',
     '--cidr',
@@ -527,7 +544,12 @@ def next_address(ctx, *args, **kwargs):
     metavar='ID',
     type=types.NETWORK_ID,
     help='Unique ID or CIDR of the Network being deleted.',
-    required=True,
+)
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Remove Networks matching this set query.',
 )
 @click.option(
     '-s',
@@ -538,7 +560,7 @@ def next_address(ctx, *args, **kwargs):
     callback=callbacks.process_site_id,
 )
 @click.pass_context
-def remove(ctx, id, site_id):
+def remove(ctx, bulk_remove, id, query, site_id):
     """
     Remove a Network.
 
@@ -548,9 +570,23 @@ def remove(ctx, id, site_id):
     -i/--id, or the CIDR of the Network using -c/--cidr.
 
     If both are provided, -c/--cidr will be ignored.
+
+    You may instead remove many Networks at once, either from a file of
+    Networks identified by id or cidr (-b/--bulk-remove), or every Network
+    matching a set query (-q/--query).
     """
     data = ctx.params
-    ctx.obj.remove(**data)
+
+    if bulk_remove is not None:
+        ctx.obj.bulk_remove(bulk_remove)
+    elif query is not None:
+        ctx.obj.bulk_remove(data)
+    elif id is None:
+        raise click.UsageError('Missing option "-i" / "--id".')
+    else:
+        data.pop('bulk_remove')
+        data.pop('query')
+        ctx.obj.remove(**data)
 
 
 # Update
@@ -563,6 +599,17 @@ def remove(ctx, id, site_id):
     multiple=True,
     callback=callbacks.transform_attributes,
 )
+@click.option(
+    '-b',
+    '--bulk-update',
+    metavar='FILENAME',
+    help=(
+        'Bulk update Networks from the specified file (colon-delimited, .csv '
+        'or .jsonl).'
+    ),
+    type=click.File('rb'),
+    callback=callbacks.process_bulk_add,
+)
 @click.option(
     '-c',
     '--cidr',
@@ -579,6 +626,12 @@ def remove(ctx, id, site_id):
     type=int,
     help='Unique ID of the Network being updated.',
 )
+@click.option(
+    '-q',
+    '--query',
+    metavar='QUERY',
+    help='Update Networks matching this set query.',
+)
 @click.option(
     '-S',
     '--state',
@@ -629,7 +682,8 @@ def remove(ctx, id, site_id):
     help='Treat the specified attributes as a list type.',
 )
 @click.pass_context
-def update(ctx, attributes, cidr, id, state, site_id, attr_action, multi):
+def update(ctx, attributes, bulk_update, cidr, id, query, state, site_id,
+           attr_action, multi):
     """
     Update a Network.
 
@@ -655,15 +709,31 @@ def update(ctx, attributes, cidr, id, state, site_id, attr_action, multi):
     * Replace (--replace-attributes). This will cause attributes to
     replaced. If combined with --multi and multiple attributes of the same
     name are provided, only the last value provided will be used.
+
+    You may instead update many Networks at once, either from a file of
+    Networks identified by id or cidr (-b/--bulk-update), or every Network
+    matching a set query (-q/--query). Attributes provided in a file replace
+    the existing attributes.
     """
+    data = ctx.params
+    data.pop('bulk_update')
+
+    if bulk_update is not None:
+        return ctx.obj.bulk_update(bulk_update)
+
     if not any([attributes, state]):
         msg = 'You must supply at least one of the optional arguments.'
         raise click.UsageError(msg)
 
+    if query is not None:
+        data.pop('id')
+        data.pop('cidr')
+        return ctx.obj.bulk_update(data)
+
     if not id and not cidr:
         raise click.UsageError(
             'You must provide -c/--cidr when not providing -i/--id.'
         )
 
-    data = ctx.params
+    data.pop('query')
     ctx.obj.update(data)
@@ -41,6 +41,47 @@ OPTIONAL_FIELDS = {
     'api_version': None,
 }
 
+# Fields used to tune the client, which may be set in the dotfile but are not
+# prompted for when it is created. Unset fields use the defaults below.
+TUNING_FIELDS = (
+    'json_codec', 'compress', 'compress_threshold', 'pool_connections',
+    'pool_maxsize', 'max_retries', 'timeout', 'keep_alive',
+    'read_concurrency', 'write_concurrency', 'read_rate', 'write_rate',
+    'read_latency', 'write_latency', 'coalesce',
+)
+
+# Maximum number of concurrent requests made when fanning out across Sites or
+# performing bulk actions.
+MAX_CONCURRENCY = 8
+
+# Number of objects sent in each request when performing bulk actions.
+BULK_CHUNK_SIZE = 100
+
+# Minimum size in bytes of a request body to gzip when compression is enabled.
+GZIP_THRESHOLD = 16 * 1024
+
+# Number of hosts to keep HTTP connection pools for.
+POOL_CONNECTIONS = 10
+
+# Number of HTTP connections kept open to each host. This should be at least
+# the number of concurrent requests (``MAX_CONCURRENCY``), which may be nested.
+POOL_MAXSIZE = 2 * MAX_CONCURRENCY
+
+# Number of times a failed connection or idempotent request is retried.
+MAX_RETRIES = 3
+
+# Backoff factor in seconds between retries, doubled on each retry.
+RETRY_BACKOFF = 0.5
+
+# Maximum number of reads and writes in flight at once. These are lowered
+# while the server is slow or overloaded.
+READ_CONCURRENCY = 2 * MAX_CONCURRENCY
+WRITE_CONCURRENCY = MAX_CONCURRENCY // 2
+
+# Seconds a read or write may take before the server is considered slow.
+READ_TARGET_LATENCY = 5.0
+WRITE_TARGET_LATENCY = 30.0
+
 # Path stuff
 USER_HOME = os.path.expanduser('~')
 DOTFILE_NAME = '.pynsotrc'
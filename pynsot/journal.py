@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+On-disk journal of completed work, used to resume bulk jobs.
+
+Each line of a journal file is a JSON object recording the keys of items that
+an action completed (or failed) for a resource. When a journal is re-opened,
+items already recorded as completed may be skipped, so that a job which died
+partway through only retries the work that did not land.
+
+Example:
+
+>>> from pynsot.journal import Journal
+>>> with Journal('import.journal') as journal:
+...     for net in networks:
+...         net.ensure(journal=journal)
+"""
+
+from __future__ import unicode_literals
+import json
+import logging
+import threading
+
+
+__all__ = ('Journal',)
+
+
+log = logging.getLogger(__name__)
+
+
+class Journal(object):
+    """
+    An append-only record of completed items, keyed by action and resource.
+
+    :param path:
+        Path to the journal file. It is created if it does not exist.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.completed = set()
+        self.failed = {}
+        self._lock = threading.Lock()
+        self._torn = False
+        self.load()
+        self._fh = open(path, 'a')
+
+        # Terminate a torn final line so new entries start on their own line.
+        if self._torn:
+            self._fh.write('\n')
+            self._fh.flush()
+
+    def load(self):
+        """Read completed and failed items from an existing journal file."""
+        try:
+            fh = open(self.path)
+        except IOError:
+            return None
+
+        with fh:
+            for lineno, line in enumerate(fh, 1):
+                self._torn = not line.endswith('\n')
+
+                # A torn final line is expected if a job died mid-write.
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    log.warning(
+                        'Skipping unreadable journal entry on line %d', lineno
+                    )
+                    continue
+
+                scope = (entry['action'], entry['resource_name'])
+                for key in entry['keys']:
+                    item = scope + (key,)
+                    if entry.get('error') is None:
+                        self.completed.add(item)
+                        self.failed.pop(item, None)
+                    elif item not in self.completed:
+                        self.failed[item] = entry['error']
+
+        log.debug(
+            'Loaded journal %s: %d completed, %d failed',
+            self.path, len(self.completed), len(self.failed)
+        )
+
+    def is_done(self, action, resource_name, key):
+        """
+        Return whether an item has been completed.
+
+        :param action:
+            The action name (e.g. 'add')
+
+        :param resource_name:
+            API resource name (e.g. 'devices')
+
+        :param key:
+            Unique key of the item
+        """
+        return (action, resource_name, '%s' % key) in self.completed
+
+    def record(self, action, resource_name, keys, error=None):
+        """
+        Record that items were completed, or failed if ``error`` is set.
+
+        :param action:
+            The action name (e.g. 'add')
+
+        :param resource_name:
+            API resource name (e.g. 'devices')
+
+        :param keys:
+            List of unique keys of the items
+
+        :param error:
+            (Optional) Error message if the items failed
+        """
+        keys = ['%s' % key for key in keys]
+        entry = {
+            'action': action,
+            'resource_name': resource_name,
+            'keys': keys,
+            'error': None if error is None else '%s' % (error,),
+        }
+
+        with self._lock:
+            self._fh.write(json.dumps(entry) + '\n')
+            self._fh.flush()
+
+            for key in keys:
+                item = (action, resource_name, key)
+                if error is None:
+                    self.completed.add(item)
+                    self.failed.pop(item, None)
+                else:
+                    self.failed[item] = entry['error']
+
+    def close(self):
+        """Close the journal file."""
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+Client-side admission control for API requests.
+
+Every request of a client passes through a limiter for its class of request,
+reads or writes, that caps both the number of requests in flight and their
+rate. The cap on requests in flight adapts to the server (AIMD): it is cut in
+half when responses are slow or the server reports that it is overloaded
+(HTTP 429 or 503), and grows back by one each time a full window of requests
+succeeds in time. A big import therefore backs off on its own rather than
+melting the server for everyone else.
+
+Example:
+
+>>> limiters = get_limiters(write_concurrency=4, write_rate=10)
+>>> limiter = limiters[request_class('POST')]
+>>> ticket = limiter.acquire()
+>>> try:
+...     response = send(request)
+... finally:
+...     limiter.release(ticket, latency=0.2)
+"""
+
+from __future__ import unicode_literals
+import logging
+import threading
+import time
+
+from . import constants
+
+
+__author__ = 'Jathan McCollum'
+__maintainer__ = 'Jathan McCollum'
+__email__ = 'jathan@dropbox.com'
+__copyright__ = 'Copyright (c) 2015-2016 Dropbox, Inc.'
+
+
+__all__ = (
+    'OVERLOAD_STATUSES', 'TokenBucket', 'AdaptiveLimiter', 'get_limiters',
+    'request_class',
+)
+
+
+log = logging.getLogger(__name__)
+
+# Response statuses meaning the server is overloaded.
+OVERLOAD_STATUSES = (429, 503)
+
+# Methods of requests limited as reads. Every other method is a write.
+READ_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+
+def request_class(method):
+    """
+    Return the class of a request, 'read' or 'write', by its HTTP method.
+
+    :param method:
+        HTTP method (e.g. 'GET')
+    """
+    return 'read' if method.upper() in READ_METHODS else 'write'
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket limiting the rate of requests.
+
+    :param rate:
+        Tokens added per second, or None for no limit
+
+    :param burst:
+        (Optional) Number of tokens the bucket holds, which may be used at
+        once. Defaults to one second's worth.
+    """
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate
+        if burst is None:
+            burst = max(1, rate or 0)
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting until one is available."""
+        if not self.rate:
+            return None
+
+        while True:
+            with self._lock:
+                now = time.time()
+                elapsed = max(now - self.updated, 0)
+                self.tokens = min(
+                    self.burst, self.tokens + elapsed * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return None
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimiter(object):
+    """
+    Limit of requests in flight that adapts to the server's responses, with
+    an optional rate limit.
+
+    Requests in flight when the limit is cut don't cut it again, so a burst of
+    slow responses only halves it once.
+
+    :param name:
+        Name used in log messages (e.g. 'read')
+
+    :param max_limit:
+        Maximum, and initial, number of requests in flight
+
+    :param rate:
+        (Optional) Maximum number of requests per second
+
+    :param target_latency:
+        (Optional) Seconds a response may take before it counts as slow
+
+    :param min_limit:
+        Minimum number of requests in flight
+
+    :param backoff:
+        Factor the limit is multiplied by when it is cut
+    """
+    def __init__(self, name, max_limit, rate=None, target_latency=None,
+                 min_limit=1, backoff=0.5):
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = float(max_limit)
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate)
+        self.in_flight = 0
+        self.epoch = 0
+        self._cond = threading.Condition()
+
+    def __repr__(self):
+        return '<AdaptiveLimiter %s: %d/%d in flight>' % (
+            self.name, self.in_flight, int(self.limit)
+        )
+
+    def acquire(self):
+        """
+        Wait until a request may be sent.
+
+        :returns:
+            Ticket to pass to ``release()``
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            ticket = self.epoch
+        self.bucket.acquire()
+        return ticket
+
+    def release(self, ticket, latency=None, overloaded=False):
+        """
+        Finish a request and adjust the limit by its outcome.
+
+        :param ticket:
+            Ticket returned by ``acquire()``
+
+        :param latency:
+            (Optional) Seconds the response took
+
+        :param overloaded:
+            Whether the server reported that it is overloaded, or the request
+            failed to complete
+        """
+        slow = (
+            self.target_latency is not None and latency is not None and
+            latency > self.target_latency
+        )
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded or slow:
+                if ticket == self.epoch:
+                    self.epoch += 1
+                    self.limit = max(
+                        float(self.min_limit), self.limit * self.backoff
+                    )
+                    log.debug(
+                        'Limiting %s requests to %d in flight (%s)',
+                        self.name, int(self.limit),
+                        'overloaded' if overloaded else 'slow'
+                    )
+            elif self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+def _number(value, cast=float):
+    """Return a setting as a number, or None if it isn't set."""
+    if value is None or value == '':
+        return None
+    return cast(value)
+
+
+def get_limiters(read_concurrency=None, write_concurrency=None,
+                 read_rate=None, write_rate=None, read_latency=None,
+                 write_latency=None):
+    """
+    Return a limiter for each class of request, keyed by 'read' and 'write'.
+
+    Settings that aren't given use their defaults from ``constants``.
+
+    :param read_concurrency:
+        Maximum number of reads in flight
+
+    :param write_concurrency:
+        Maximum number of writes in flight
+
+    :param read_rate:
+        Maximum number of reads per second, if any
+
+    :param write_rate:
+        Maximum number of writes per second, if any
+
+    :param read_latency:
+        Seconds a read may take before the limit is cut
+
+    :param write_latency:
+        Seconds a write may take before the limit is cut
+    """
+    if read_concurrency is None:
+        read_concurrency = constants.READ_CONCURRENCY
+    if write_concurrency is None:
+        write_concurrency = constants.WRITE_CONCURRENCY
+    if read_latency is None:
+        read_latency = constants.READ_TARGET_LATENCY
+    if write_latency is None:
+        write_latency = constants.WRITE_TARGET_LATENCY
+
+    return {
+        'read': AdaptiveLimiter(
+            'read', _number(read_concurrency, int), rate=_number(read_rate),
+            target_latency=_number(read_latency),
+        ),
+        'write': AdaptiveLimiter(
+            'write', _number(write_concurrency, int),
+            rate=_number(write_rate), target_latency=_number(write_latency),
+        ),
+    }
@@ -61,10 +61,125 @@ True
 from __future__ import unicode_literals
 import logging
 import collections
+import threading
+from itertools import islice
 from abc import abstractproperty, abstractmethod, ABCMeta
 from netaddr import IPNetwork
-from pynsot.util import get_result
-from pynsot.client import get_api_client
+from pynsot import constants
+from pynsot.util import chunked, get_result
+from pynsot.client import get_api_client, stream_results
+
+
+class Session(object):
+    '''Identity map of upstream objects shared by many resources
+
+    Resources given the same session share their lookups, so each upstream
+    object is fetched at most once per session no matter how many resources
+    refer to it. Entries are keyed by site, resource type and natural key,
+    and are invalidated whenever a resource of the session writes to it.
+
+    >>> session = Session()
+    >>> ifaces = [
+    ...     Interface(site_id=1, device='router1', name=name, session=session)
+    ...     for name in names
+    ... ]
+
+    Above, ``router1`` is only looked up once rather than once per interface.
+
+    :param client: Pynsot client shared by the resources of this session.
+        Resources not given a client use this one.
+    :type client: pynsot.client.BaseClient
+    '''
+
+    def __init__(self, client=None):
+        self.client = client
+        self._objects = {}
+        # (site_id, resource_name) pairs fully fetched by ``load()``, and keys
+        # since invalidated in them.
+        self._loaded = set()
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._objects)
+
+    def get(self, key):
+        '''Get the cached upstream object for ``key``
+
+        :param key: Tuple of (site_id, resource_name, natural key)
+        :type key: tuple
+        :returns: Upstream object, empty dict if known not to exist, or None
+            if not cached
+        :rtype: dict
+        '''
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is None and key[:2] in self._loaded:
+                if key not in self._stale:
+                    obj = {}
+            return obj
+
+    def load(self, site_id, resource_name):
+        '''Fetch all objects of a resource type in a site with one GET
+
+        Afterward, any object of that type and site missing from the session
+        is known not to exist without another lookup. For example, loading
+        the devices of a site before creating many interfaces resolves all of
+        their device hostnames without a GET per interface.
+
+        >>> session.load(1, 'devices')
+        2000
+
+        :param site_id: Site ID
+        :type site_id: int
+        :param resource_name: Name of resource, e.g. 'devices'
+        :type resource_name: str
+        :returns: Number of objects loaded
+        :rtype: int
+        '''
+        model = RESOURCE_MODELS[resource_name]
+        site = self.client.sites(site_id)
+        objects = get_result(getattr(site, resource_name).get())
+        with self._lock:
+            for obj in objects:
+                key = (site_id, resource_name, model.natural_key(obj))
+                self._objects[key] = obj
+                self._stale.discard(key)
+            self._loaded.add((site_id, resource_name))
+        return len(objects)
+
+    def add(self, key, obj):
+        '''Cache the upstream object for ``key``
+
+        :param key: Tuple of (site_id, resource_name, natural key)
+        :type key: tuple
+        :param obj: Upstream object, or empty dict if it doesn't exist
+        :type obj: dict
+        '''
+        with self._lock:
+            self._objects[key] = obj
+
+    def invalidate(self, key):
+        '''Drop the cached upstream object for ``key``, if any
+
+        :param key: Tuple of (site_id, resource_name, natural key)
+        :type key: tuple
+        '''
+        with self._lock:
+            self._objects.pop(key, None)
+            if key[:2] in self._loaded:
+                self._stale.add(key)
+
+    def clear(self):
+        '''Drop all cached upstream objects'''
+        with self._lock:
+            self._objects.clear()
+            self._loaded.clear()
+            self._stale.clear()
 
 
 class Resource(collections.MutableMapping):
@@ -104,16 +219,25 @@ class Resource(collections.MutableMapping):
         POST, PUT, or PATCH operation for a single resource. Gets mapped
         directly to payload
     :type raw: dict
+    :param session: Session whose identity map is shared with other
+        resources, so that upstream lookups aren't repeated across them
+    :type session: pynsot.models.Session
     '''
 
     __metaclass__ = ABCMeta
 
+    # Related objects that may be prefetched by a QuerySet. Maps a relation
+    # name to a tuple of (related resource name, local field, related field,
+    # many). A related field of None matches on the related natural key.
+    RELATIONS = {}
+
     def __init__(
         self,
         site_id=None,
         client=None,
         raw=None,
         attributes=None,
+        session=None,
         **kwargs
     ):
         if raw is None:
@@ -122,6 +246,8 @@ class Resource(collections.MutableMapping):
             attributes = {}
 
         self.logger = logging.getLogger(__name__)
+        # Related resources by relation name, set by QuerySet prefetching
+        self.related = {}
         self.errors = []
         self.last_error = None
         # Placeholder for .existing_resource() state
@@ -141,6 +267,9 @@ class Resource(collections.MutableMapping):
             )
 
         self._site_id = site_id
+        self.session = session
+        if client is None and session is not None:
+            client = session.client
         self.client = client
         self.raw = raw
         self.attributes = attributes
@@ -198,6 +327,36 @@ class Resource(collections.MutableMapping):
         '''
         pass
 
+    @classmethod
+    def natural_key(cls, obj):
+        '''Natural key of a resource payload or API object of this type
+
+        Used to match resources to existing objects in bulk operations such as
+        :func:`ensure_many`.
+
+        :param obj: Payload or raw API object
+        :type obj: dict
+        :rtype: str
+        '''
+        raise NotImplementedError
+
+    @classmethod
+    def objects(cls, site_id, client=None, session=None):
+        '''Query for objects of this type in a site
+
+        >>> Device.objects(site_id=1).filter(hostname='router1').count()
+        1
+
+        :param site_id: Site ID to query
+        :type site_id: int
+        :param client: Pynsot client. Will be lazily loaded if not provided.
+        :type client: pynsot.client.BaseClient
+        :param session: Session given to the resulting resources
+        :type session: pynsot.models.Session
+        :rtype: pynsot.models.QuerySet
+        '''
+        return QuerySet(cls, site_id, client=client, session=session)
+
     @property
     def resource(self):
         '''Pynsot client for resource type
@@ -316,7 +475,13 @@ class Resource(collections.MutableMapping):
         :rtype: dict
         '''
         self.ensure_client()
-        if self._existing_resource:
+        # With a session, its identity map is authoritative since another
+        # resource may have written to the same object.
+        cached = self.session_lookup()
+        if cached is not None:
+            self._existing_resource = cached
+            return self._existing_resource
+        elif self._existing_resource and self.session is None:
             return self._existing_resource
         else:
             cur = dict(self)
@@ -346,10 +511,10 @@ class Resource(collections.MutableMapping):
             if existing:
                 # This is where state will be kept for this
                 self._existing_resource = lookup[0]
-                return self._existing_resource
             else:
                 self._existing_resource = {}
-                return self._existing_resource
+            self.session_store(self._existing_resource)
+            return self._existing_resource
 
     def clear_cache(self):
         '''Clears state of certain properties
@@ -357,8 +522,55 @@ class Resource(collections.MutableMapping):
         This is ideally done during a write operation against the API, such as
         ``.purge()`` or ``.ensure()``. Helps prevent representing out-of-date
         information
+
+        The entry for this resource in its session, if any, is dropped too.
         '''
         self._existing_resource = {}
+        if self.session is not None:
+            self.session.invalidate(self.session_key)
+
+    @property
+    def session_key(self):
+        '''Key identifying the upstream object in a :class:`Session`
+
+        :rtype: tuple
+        '''
+        return (self['site_id'], self.resource_name, self.natural_key(self))
+
+    def session_lookup(self):
+        '''Return the upstream object cached in the session
+
+        :returns: Upstream object, empty dict if known not to exist, or None
+            if there is no session or nothing is cached
+        :rtype: dict
+        '''
+        if self.session is None:
+            return None
+        return self.session.get(self.session_key)
+
+    def session_store(self, obj):
+        '''Cache the upstream object in the session, if any
+
+        :param obj: Upstream object, or empty dict if it doesn't exist
+        :type obj: dict
+        '''
+        if self.session is not None:
+            self.session.add(self.session_key, obj)
+
+    def diff(self, current):
+        '''Fields of the payload that differ from an upstream object
+
+        :param current: Upstream object, e.g. from ``existing_resource()``
+        :type current: dict
+        :returns: Mapping of changed field to desired value. Empty if nothing
+            needs to be written. Fields the upstream object doesn't include
+            (e.g. ``site_id`` of Interfaces) aren't compared.
+        :rtype: dict
+        '''
+        return dict(
+            (field, value) for (field, value) in self.payload.iteritems()
+            if field in current and current[field] != value
+        )
 
     def exists(self):
         '''Does the current resource exist?
@@ -367,7 +579,15 @@ class Resource(collections.MutableMapping):
         '''
         return bool(self.existing_resource())
 
-    def ensure(self):
+    @property
+    def journal_key(self):
+        '''Key identifying this resource in a :class:`pynsot.journal.Journal`
+
+        :rtype: str
+        '''
+        return '%s:%s' % (self._site_id, self.identifier)
+
+    def ensure(self, journal=None):
         '''Ensure object in current state exists in NSoT
 
         By site, make sure resource exists. True if it is or was able to get to
@@ -381,17 +601,42 @@ class Resource(collections.MutableMapping):
         Sending in bulk halts at the first error and fails the following
         so it requires more handling.
 
-        Cache is cleared first thing and before return.
+        Cache is cleared first thing and before return. A session's entry for
+        the resource is only invalidated by a write.
+
+        If the resource exists, only the fields that differ from it are
+        PATCHed, and nothing is written if none do. See ``diff()``.
 
+        :param journal: If given, do nothing when this resource was already
+            ensured according to the journal, and otherwise record the outcome
+            in it. This allows an interrupted loop over many resources to be
+            resumed.
+        :type journal: pynsot.journal.Journal
         :rtype: bool
         '''
-        self.clear_cache()
+        if self.journaled(journal, 'ensure'):
+            return True
+
+        ok = self._ensure()
+        self.journal_record(journal, 'ensure', ok)
+        return ok
+
+    def _ensure(self):
+        '''Perform ``ensure()`` without consulting a journal'''
+        # Only this resource's own cache is dropped. Its session entry, if
+        # any, is kept until a write makes it stale.
+        self._existing_resource = {}
         to_ensure = dict(self)
 
         try:
-            # PATCH instead of POST
+            if self.exists() and not self.diff(self.existing_resource()):
+                self.logger.debug('[%s] Unchanged', self.identifier)
+                return True
+
+            # PATCH instead of POST, only sending what changed
             if self.exists() and self.resource_name != 'interfaces':
                 self.logger.debug('[%s] Patching', self.identifier)
+                to_ensure = self.diff(self.existing_resource())
                 to_ensure['id'] = self.existing_resource()['id']
                 self.resource.patch([to_ensure])
                 self.logger.info('[%s] has been patched!', self.identifier)
@@ -402,23 +647,36 @@ class Resource(collections.MutableMapping):
                 self.logger.debug('[%s] Creating', self.identifier)
                 self.resource.post([to_ensure])
                 self.logger.info('[%s] has been created!', self.identifier)
+                self.clear_cache()
                 return True
         except Exception as e:
             self.log_error(e)
             self.clear_cache()
             return False
 
-    def purge(self):
+    def purge(self, journal=None):
         '''Ensure resource doesn't exist upstream
 
         By site, make sure resource is deleted. True if it is or was able to
         get to the desired state, False if not and logged in ``last_error``.
 
-        Cache is cleared first thing and before return.
+        Cache is cleared first thing and before return. A session's entry for
+        the resource is only invalidated by a write.
 
+        :param journal: Journal used to resume loops. See ``ensure()``.
+        :type journal: pynsot.journal.Journal
         :rtype: bool
         '''
-        self.clear_cache()
+        if self.journaled(journal, 'purge'):
+            return True
+
+        ok = self._purge()
+        self.journal_record(journal, 'purge', ok)
+        return ok
+
+    def _purge(self):
+        '''Perform ``purge()`` without consulting a journal'''
+        self._existing_resource = {}
         try:
             if self.exists():
                 self.logger.debug('[%s] Deleting', self.identifier)
@@ -438,6 +696,35 @@ class Resource(collections.MutableMapping):
             self.clear_cache()
             return False
 
+    def journaled(self, journal, action):
+        '''Whether ``action`` was already completed according to ``journal``
+
+        :param journal: Journal, or None
+        :type journal: pynsot.journal.Journal
+        :param action: 'ensure' or 'purge'
+        :rtype: bool
+        '''
+        if journal is None:
+            return False
+        done = journal.is_done(action, self.resource_name, self.journal_key)
+        if done:
+            self.logger.debug('[%s] Already %sd, skipping', self, action)
+        return done
+
+    def journal_record(self, journal, action, ok):
+        '''Record the outcome of ``action`` in ``journal``, if given
+
+        :param journal: Journal, or None
+        :type journal: pynsot.journal.Journal
+        :param action: 'ensure' or 'purge'
+        :param ok: Whether the action succeeded
+        :type ok: bool
+        '''
+        if journal is None:
+            return
+        error = None if ok else (self.last_error or 'failed')
+        journal.record(action, self.resource_name, [self.journal_key], error)
+
 
 class Network(Resource):
     '''Network API Abstraction Model
@@ -487,6 +774,10 @@ class Network(Resource):
     def identifier(self):
         return '%s/%d' % (self['network_address'], self['prefix_length'])
 
+    @classmethod
+    def natural_key(cls, obj):
+        return '%s/%s' % (obj['network_address'], obj['prefix_length'])
+
     @property
     def resource_name(self):
         return 'networks'
@@ -551,6 +842,10 @@ class Device(Resource):
     :param hostname: Device hostname
     '''
 
+    RELATIONS = {
+        'interfaces': ('interfaces', 'id', 'device', True),
+    }
+
     def postinit(self, hostname=None):
         if not any([hostname, self.raw]):
             raise TypeError('Devices require a hostname')
@@ -561,6 +856,10 @@ class Device(Resource):
     def identifier(self):
         return self.hostname
 
+    @classmethod
+    def natural_key(cls, obj):
+        return obj['hostname']
+
     @property
     def resource_name(self):
         return 'devices'
@@ -568,6 +867,7 @@ class Device(Resource):
     def init_payload(self):
         if self.raw:
             self.payload = self.raw
+            self.hostname = self.raw['hostname']
             return
 
         self.payload = {
@@ -598,6 +898,11 @@ class Interface(Resource):
     :type speed: int
     '''
 
+    RELATIONS = {
+        'device': ('devices', 'device', 'id', False),
+        'addresses': ('networks', 'addresses', None, True),
+    }
+
     def postinit(self, **kwargs):
         self.addresses = kwargs.get('addresses') or []
         self.description = kwargs.get('description') or ''
@@ -636,25 +941,56 @@ class Interface(Resource):
            str.
         '''
 
-        rerun = isinstance(self._original_device, str) and self.device == 0
-        first_run = isinstance(self.device, str)
         # If equal to 0, means it had failed before
-        if rerun or first_run:
+        if self.device_pending:
             d = Device(
                 client=self.client,
                 site_id=self._site_id,
                 hostname=self._original_device,
+                session=self.session,
             )
             if d.exists():
-                self.device = d.existing_resource()['id']
+                self.set_device(d.existing_resource()['id'])
                 return True
             else:
-                self.device = 0
+                self.set_device(0)
                 return False
 
+    @property
+    def device_pending(self):
+        '''Whether the device was given by a hostname not yet resolved
+
+        :rtype: bool
+        '''
+        hostname = getattr(self, '_original_device', None)
+        return (
+            isinstance(hostname, basestring) and
+            self.device in (0, hostname)
+        )
+
+    def set_device(self, device_id):
+        '''Set the device ID, e.g. once resolved from the hostname
+
+        :param device_id: Device ID, or 0 if the device doesn't exist yet
+        :type device_id: int
+        '''
+        self.device = device_id
+        if 'device' in self.payload:
+            self['device'] = device_id
+
     @property
     def identifier(self):
-        return '%s on %s' % (self.name, self.device)
+        device = self._original_device if self.device_pending else self.device
+        return '%s on %s' % (self.name, device)
+
+    @classmethod
+    def natural_key(cls, obj):
+        # Interfaces of devices that don't exist yet all have a device ID of
+        # 0, so they're told apart by the hostname they were given.
+        device = obj['device']
+        if isinstance(obj, Interface) and obj.device_pending:
+            device = obj._original_device
+        return '%s:%s' % (device, obj['name'])
 
     @property
     def resource_name(self):
@@ -663,6 +999,8 @@ class Interface(Resource):
     def init_payload(self):
         if self.raw:
             self.payload = self.raw
+            self.name = self.raw['name']
+            self.device = self.raw['device']
             return
 
         # TODO: This currently will only work on init and not later since
@@ -683,3 +1021,878 @@ class Interface(Resource):
             'attributes': self.attributes,
             'site_id': self._site_id,
         }
+
+
+class Attribute(Resource):
+    '''Attribute Resource
+
+    Subclass of Resource. Represents the definition of an attribute that may
+    be set on other resources, not an attribute value.
+
+    >>> attr = Attribute(name='owner', resource_name='Device', site_id=1)
+    >>> attr.ensure()
+    True
+
+    :param name: Required, name of the attribute
+    :param resource_name: Required, resource type the attribute applies to
+        (e.g. 'Device')
+    :param description: Attribute description
+    :param display: Whether the attribute is displayed by default
+    :type display: bool
+    :param multi: Whether the attribute is a list type
+    :type multi: bool
+    :param required: Whether the attribute is required
+    :type required: bool
+    :param constraints: Constraints on values of the attribute
+    :type constraints: dict
+    '''
+
+    # Optional fields sent only if they were provided.
+    OPTIONAL_FIELDS = (
+        'description', 'display', 'multi', 'required', 'constraints'
+    )
+
+    def postinit(self, name=None, resource_name=None, **kwargs):
+        if not all([name, resource_name]):
+            raise TypeError(
+                'Attributes require both a name and resource_name!'
+            )
+        self.name = name
+        self.attribute_resource_name = resource_name
+        self.options = dict(
+            (field, kwargs[field]) for field in self.OPTIONAL_FIELDS
+            if kwargs.get(field) is not None
+        )
+        self.init_payload()
+
+    @property
+    def identifier(self):
+        return self.natural_key(self)
+
+    @classmethod
+    def natural_key(cls, obj):
+        return '%s:%s' % (obj['resource_name'], obj['name'])
+
+    @property
+    def resource_name(self):
+        return 'attributes'
+
+    def init_payload(self):
+        if self.raw:
+            self.payload = self.raw
+            return
+
+        self.payload = {
+            'name': self.name,
+            'resource_name': self.attribute_resource_name,
+            'site_id': self._site_id,
+        }
+        self.payload.update(self.options)
+
+
+# Model for each resource name.
+RESOURCE_MODELS = {
+    'attributes': Attribute,
+    'devices': Device,
+    'interfaces': Interface,
+    'networks': Network,
+}
+
+
+class InternTable(object):
+    '''Interned strings and field layouts shared by a batch of Records
+
+    Records built with the same table share their field names and attribute
+    strings. A table is scoped to a single query iteration or response, so
+    its entries are freed along with the records rather than kept for the
+    life of the process.
+    '''
+
+    __slots__ = ('_strings', '_layouts')
+
+    def __init__(self):
+        self._strings = {}
+        self._layouts = {}
+
+    def intern(self, value):
+        '''Return a shared copy of a string, or the value if not a string'''
+        if isinstance(value, basestring):
+            return self._strings.setdefault(value, value)
+        return value
+
+    def layout(self, fields):
+        '''Return the shared (fields, index) layout for a tuple of field names
+        '''
+        layout = self._layouts.get(fields)
+        if layout is None:
+            fields = tuple(self.intern(f) for f in fields)
+            index = dict((f, i) for (i, f) in enumerate(fields))
+            layout = self._layouts.setdefault(fields, (fields, index))
+        return layout
+
+
+class _Items(tuple):
+    '''Sorted (key, value) pairs of a dict stored in a Record'''
+
+    __slots__ = ()
+
+
+class Record(object):
+    '''Compact, read-only view of an upstream object
+
+    Records are meant for reading large numbers of objects, e.g. from
+    ``QuerySet.records()``, where full resources would be too heavy. Each
+    holds only a tuple of values: field names are shared by the records of a
+    batch (e.g. a query) with the same fields, attribute names and values are
+    interned within the batch, and lists and dicts are stored as tuples.
+
+    Records act as read-only dicts. Call ``to_resource()`` to get a full
+    resource when a write is needed.
+
+    >>> nets = Network.objects(site_id=1).records()
+    >>> big = [n for n in nets if n['prefix_length'] < 16]
+    >>> net = big[0].to_resource()
+    >>> net['attributes'] = {'owner': 'jathan'}
+    >>> net.ensure()
+    True
+
+    :param model: Resource subclass of the object, e.g. :class:`Network`
+    :type model: type
+    :param obj: Raw NSoT resource object, or a list of its (field, value)
+        pairs such as from a JSON ``object_pairs_hook``
+    :type obj: dict
+    :param interns: Table shared with the other records of a batch. A new
+        one by default.
+    :type interns: pynsot.models.InternTable
+    '''
+
+    __slots__ = ('model', '_layout', '_values')
+
+    def __init__(self, model, obj, interns=None):
+        if interns is None:
+            interns = InternTable()
+        if isinstance(obj, dict):
+            obj = obj.items()
+        items = sorted(obj)
+        self.model = model
+        self._layout = interns.layout(tuple(field for (field, _) in items))
+        self._values = tuple(
+            self._freeze(value, interns) for (_, value) in items
+        )
+
+    @staticmethod
+    def _freeze(value, interns, nested=False):
+        '''Convert a value to a compact, immutable form
+
+        Lists are stored as tuples and dicts as :class:`_Items`. Keys and
+        strings within dicts (e.g. attributes) are interned.
+        '''
+        if isinstance(value, dict):
+            return _Items(
+                (interns.intern(k), Record._freeze(v, interns, True))
+                for (k, v) in sorted(value.items())
+            )
+        if isinstance(value, list):
+            return tuple(Record._freeze(v, interns, nested) for v in value)
+        return interns.intern(value) if nested else value
+
+    @staticmethod
+    def _thaw(value):
+        '''Return a mutable copy of a value stored by ``_freeze()``'''
+        if isinstance(value, _Items):
+            return dict((k, Record._thaw(v)) for (k, v) in value)
+        if isinstance(value, tuple):
+            return [Record._thaw(v) for v in value]
+        return value
+
+    def __getitem__(self, key):
+        return self._thaw(self._values[self._layout[1][key]])
+
+    def get(self, key, default=None):
+        if key in self._layout[1]:
+            return self[key]
+        return default
+
+    def __contains__(self, key):
+        return key in self._layout[1]
+
+    def __iter__(self):
+        return iter(self._layout[0])
+
+    def __len__(self):
+        return len(self._values)
+
+    def keys(self):
+        return list(self._layout[0])
+
+    def items(self):
+        return [(key, self[key]) for key in self._layout[0]]
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self.items() == other.items()
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<Record %s: %s>' % (
+            self.model.__name__, self.model.natural_key(self)
+        )
+
+    def __getstate__(self):
+        return self.model, dict(self.items())
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def to_resource(self, client=None, session=None):
+        '''Return a full, mutable resource for this object
+
+        :param client: Pynsot client
+        :type client: pynsot.client.BaseClient
+        :param session: Session of the resource
+        :type session: pynsot.models.Session
+        :rtype: pynsot.models.Resource
+        '''
+        return self.model(
+            raw=dict(self.items()), client=client, session=session
+        )
+
+
+class QuerySet(object):
+    '''Lazy, chainable query for objects of a resource type in a site
+
+    Nothing is fetched until the query is iterated, counted or indexed.
+    Results are yielded as instances of the model, fetched in pages.
+
+    >>> devices = Device.objects(site_id=1).filter(attributes={'metro': 'lax'})
+    >>> devices.count()
+    2000
+    >>> [d['hostname'] for d in devices[:2]]
+    [u'lax-router1', u'lax-router2']
+    >>> for device in devices.filter(hostname__startswith='lax-sw'):
+    ...     print device
+
+    Usually obtained from ``Model.objects()`` rather than directly.
+
+    :param model: Resource subclass, e.g. :class:`Device`
+    :type model: type
+    :param site_id: Site ID to query
+    :type site_id: int
+    :param client: Pynsot client. Will be lazily loaded if not provided.
+    :type client: pynsot.client.BaseClient
+    :param session: Session given to the resulting resources
+    :type session: pynsot.models.Session
+    '''
+
+    # Lookups not supported by the API, which are evaluated client-side.
+    LOCAL_LOOKUPS = {
+        'startswith': lambda value, arg: ('%s' % value).startswith(arg),
+        'endswith': lambda value, arg: ('%s' % value).endswith(arg),
+        'contains': lambda value, arg: arg in ('%s' % value),
+        'in': lambda value, arg: value in arg,
+    }
+
+    def __init__(self, model, site_id, client=None, session=None):
+        if client is None and session is not None:
+            client = session.client
+        self.model = model
+        self.site_id = site_id
+        self.client = client
+        self.session = session
+        self.resource_name = dict(
+            (m, name) for (name, m) in RESOURCE_MODELS.iteritems()
+        )[model]
+        self._params = {}
+        self._lookups = []
+        self._query = None
+        self._prefetch = ()
+        self._records = False
+        self._low = 0
+        self._high = None
+
+    def __repr__(self):
+        return '<QuerySet: %s in site %s>' % (
+            self.resource_name, self.site_id
+        )
+
+    def _clone(self):
+        '''Return a copy of this query to be refined'''
+        clone = QuerySet(self.model, self.site_id, self.client, self.session)
+        clone._params = dict(self._params)
+        clone._lookups = list(self._lookups)
+        clone._query = self._query
+        clone._prefetch = self._prefetch
+        clone._records = self._records
+        clone._low = self._low
+        clone._high = self._high
+        return clone
+
+    def filter(self, **kwargs):
+        '''Return a query narrowed by field values
+
+        Fields are matched exactly by the API. ``attributes`` may be a dict of
+        attribute names and values to match. The ``__startswith``,
+        ``__endswith``, ``__contains`` and ``__in`` lookups aren't supported
+        by the API, and are instead evaluated on the fetched objects.
+
+        :rtype: pynsot.models.QuerySet
+        '''
+        clone = self._clone()
+        for key, value in kwargs.iteritems():
+            field, _, lookup = key.partition('__')
+            if field == 'attributes' and isinstance(value, dict):
+                attrs = list(clone._params.get('attributes', []))
+                attrs.extend('%s=%s' % item for item in value.iteritems())
+                clone._params['attributes'] = attrs
+            elif lookup in ('', 'exact'):
+                clone._params[field] = value
+            elif lookup in self.LOCAL_LOOKUPS:
+                clone._lookups.append((field, lookup, value))
+            else:
+                raise TypeError('Unsupported lookup: %s' % key)
+        return clone
+
+    def query(self, query, unique=False):
+        '''Return a query narrowed by a set query, e.g. ``'metro=lax -owner'``
+
+        :param query: Set query string
+        :type query: str
+        :param unique: Whether the query must match exactly one object
+        :type unique: bool
+        :rtype: pynsot.models.QuerySet
+        '''
+        clone = self._clone()
+        clone._query = query
+        if unique:
+            clone._params['unique'] = True
+        return clone
+
+    def prefetch_related(self, *names):
+        '''Return a query that also fetches related resources
+
+        Each relation is fetched for the whole site in one paged query when
+        the results are iterated, and joined locally into the ``related``
+        dict of each resource, rather than looked up once per resource.
+
+        >>> devices = Device.objects(site_id=1).prefetch_related('interfaces')
+        >>> for device in devices:
+        ...     print device, len(device.related['interfaces'])
+
+        :param names: Relation names from the model's ``RELATIONS``, e.g.
+            'interfaces' for Devices or 'device' and 'addresses' for
+            Interfaces
+        :rtype: pynsot.models.QuerySet
+        '''
+        for name in names:
+            if name not in self.model.RELATIONS:
+                raise TypeError(
+                    'Unknown relation for %s: %s' % (self.resource_name, name)
+                )
+        clone = self._clone()
+        clone._prefetch = self._prefetch + names
+        return clone
+
+    def records(self):
+        '''Return a query yielding compact, read-only :class:`Record` objects
+        instead of resources
+
+        Use this to read large numbers of objects. Records can't hold
+        prefetched related objects.
+
+        :rtype: pynsot.models.QuerySet
+        '''
+        clone = self._clone()
+        clone._records = True
+        return clone
+
+    def fetch_related(self, name, chunk_size=constants.BULK_CHUNK_SIZE):
+        '''Fetch all related resources of a relation in the site
+
+        :param name: Relation name
+        :type name: str
+        :returns: Tuple of (local field, many, mapping of key to list of
+            related resources)
+        :rtype: tuple
+        '''
+        related_name, local, remote, many = self.model.RELATIONS[name]
+        model = RESOURCE_MODELS[related_name]
+        related = model.objects(
+            self.site_id, client=self.client, session=self.session
+        )
+
+        index = {}
+        for resource in related.iterator(chunk_size):
+            if remote is None:
+                key = model.natural_key(resource)
+            else:
+                key = resource[remote]
+            index.setdefault(key, []).append(resource)
+        return local, many, index
+
+    @property
+    def endpoint(self):
+        '''API endpoint the query is sent to'''
+        if self.client is None:
+            self.client = get_api_client()
+        endpoint = getattr(self.client.sites(self.site_id), self.resource_name)
+        if self._query is not None:
+            endpoint = endpoint.query
+        return endpoint
+
+    def fetch_page(self, limit, offset):
+        '''Fetch one page of raw objects
+
+        :param limit: Maximum number of objects to fetch
+        :type limit: int
+        :param offset: Number of objects to skip
+        :type offset: int
+        :returns: Tuple of (list of objects, total count or None if the API
+            didn't page the response)
+        :rtype: tuple
+        '''
+        params = dict(self._params, limit=limit, offset=offset)
+        if self._query is not None:
+            params['query'] = self._query
+        response = self.endpoint.get(**params)
+        total = response.get('count') if isinstance(response, dict) else None
+        return get_result(response), total
+
+    def matches(self, obj):
+        '''Whether a raw object satisfies the client-side lookups'''
+        return all(
+            self.LOCAL_LOOKUPS[lookup](obj.get(field), arg)
+            for (field, lookup, arg) in self._lookups
+        )
+
+    def stream(self):
+        '''Generate raw objects from a single streamed request
+
+        See :func:`pynsot.client.stream_results`.
+        '''
+        params = dict(self._params)
+        if self._query is not None:
+            params['query'] = self._query
+
+        # Slices can only be sent to the API when it does all of the filtering,
+        # and an offset is only honored along with a limit.
+        low, high = self._low, self._high
+        if not self._lookups and high is not None:
+            params.update(limit=high - low, offset=low)
+            low, high = 0, None
+
+        objects = stream_results(self.endpoint, **params)
+        matched = (obj for obj in objects if self.matches(obj))
+        return islice(matched, low, high)
+
+    def raw_iterator(self, chunk_size=constants.BULK_CHUNK_SIZE,
+                     stream=False):
+        '''Generate raw objects, fetched ``chunk_size`` at a time
+
+        If ``stream`` is set, they are instead decoded one at a time from a
+        single streamed request. See ``stream()``.
+        '''
+        if stream:
+            for obj in self.stream():
+                yield obj
+            return
+
+        # Slices can only be sent to the API when it does all of the filtering.
+        low, high = self._low, self._high
+        if self._lookups:
+            offset, remaining = 0, None
+        else:
+            offset = low
+            remaining = None if high is None else high - low
+
+        matched = 0
+        while remaining is None or remaining > 0:
+            limit = chunk_size
+            if remaining is not None:
+                limit = min(limit, remaining)
+            objects, total = self.fetch_page(limit, offset)
+            if total is None:
+                # The API returned everything rather than a page.
+                objects = objects[offset:]
+                if remaining is not None:
+                    objects = objects[:remaining]
+            for obj in objects:
+                if not self.matches(obj):
+                    continue
+                if self._lookups:
+                    matched += 1
+                    if matched <= low:
+                        continue
+                    if high is not None and matched > high:
+                        return
+                yield obj
+
+            offset += len(objects)
+            if remaining is not None:
+                remaining -= len(objects)
+            if total is None or len(objects) < limit or offset >= total:
+                return
+
+    def _with_site(self, obj):
+        '''Add the site_id of the query to a raw object that lacks one'''
+        obj.setdefault('site_id', self.site_id)
+        return obj
+
+    def iterator(self, chunk_size=constants.BULK_CHUNK_SIZE, stream=False):
+        '''Generate resources (or records, see ``records()``), fetched
+        ``chunk_size`` at a time
+
+        :param chunk_size: Number of objects fetched per request
+        :type chunk_size: int
+        :param stream: Whether to fetch all objects in one request, decoding
+            them one at a time as the response is read. Memory use then
+            doesn't grow with the size of the response.
+        :type stream: bool
+        '''
+        # Some objects (e.g. Interfaces) don't include their site_id.
+        objects = self.raw_iterator(chunk_size, stream)
+        objects = (self._with_site(obj) for obj in objects)
+
+        if self._records:
+            if self._prefetch:
+                raise TypeError('Records do not support prefetch_related()')
+            interns = InternTable()
+            for obj in objects:
+                yield Record(self.model, obj, interns)
+            return
+
+        relations = [
+            (name, self.fetch_related(name, chunk_size))
+            for name in self._prefetch
+        ]
+
+        for obj in objects:
+            resource = self.model(
+                raw=obj, client=self.client, session=self.session
+            )
+            for name, (local, many, index) in relations:
+                value = obj.get(local)
+                if isinstance(value, list):
+                    related = [r for v in value for r in index.get(v, [])]
+                elif many:
+                    related = index.get(value, [])
+                else:
+                    related = (index.get(value) or [None])[0]
+                resource.related[name] = related
+            yield resource
+
+    def __iter__(self):
+        return self.iterator()
+
+    def count(self):
+        '''Number of matching objects
+
+        Unless client-side lookups are used, this fetches a single object
+        rather than all of them.
+
+        :rtype: int
+        '''
+        if self._lookups:
+            return sum(1 for _ in self.raw_iterator())
+
+        objects, total = self.fetch_page(1, 0)
+        if total is None:
+            total = len(objects)
+        total = max(total - self._low, 0)
+        if self._high is not None:
+            total = min(total, self._high - self._low)
+        return total
+
+    def exists(self):
+        '''Whether any object matches
+
+        :rtype: bool
+        '''
+        return self[:1].count() > 0
+
+    def __getitem__(self, key):
+        '''Slice the query, which maps to the API's limit and offset
+
+        An integer index returns a single resource. A slice returns a new
+        query.
+        '''
+        if isinstance(key, slice):
+            if key.step is not None or (key.start or 0) < 0 or (
+                    key.stop is not None and key.stop < 0):
+                raise ValueError('Only non-negative slices without a step')
+            clone = self._clone()
+            start = key.start or 0
+            clone._low = self._low + start
+            if key.stop is not None:
+                stop = self._low + key.stop
+                if self._high is not None:
+                    stop = min(stop, self._high)
+                clone._high = max(stop, clone._low)
+            return clone
+
+        if key < 0:
+            raise ValueError('Negative indexing is not supported')
+        for resource in self[key:key + 1]:
+            return resource
+        raise IndexError('QuerySet index out of range')
+
+
+def resolve_devices(interfaces):
+    '''Resolve the device hostnames of many interfaces in bulk
+
+    The bulk equivalent of :meth:`Interface.attempt_device`. The devices of
+    each site are fetched with one GET instead of one per interface.
+    Interfaces whose device still doesn't exist keep a device ID of 0, and may
+    be resolved again later, e.g. once their devices are created.
+
+    :param interfaces: Interfaces, of which only those with a pending device
+        hostname are resolved
+    :type interfaces: list
+    :returns: Number of interfaces left unresolved
+    :rtype: int
+    '''
+    pending = [i for i in interfaces if i.device_pending]
+    by_site = collections.OrderedDict()
+    for iface in pending:
+        by_site.setdefault(iface['site_id'], []).append(iface)
+
+    unresolved = 0
+    for site_id, ifaces in by_site.iteritems():
+        first = ifaces[0]
+        first.ensure_client()
+        # An empty session is falsy, but must still be kept.
+        session = first.session if first.session is not None else Session()
+        session.client = session.client or first.client
+        session.load(site_id, 'devices')
+        for iface in ifaces:
+            key = (site_id, 'devices', iface._original_device)
+            device_id = (session.get(key) or {}).get('id', 0)
+            iface.set_device(device_id)
+            unresolved += not device_id
+
+    return unresolved
+
+
+def _group_by_site(resources):
+    '''Group resources by site and resource type, keeping their positions
+
+    :param resources: Resources
+    :type resources: list
+    :returns: Mapping of (site_id, resource_name) to lists of
+        (position, resource)
+    :rtype: collections.OrderedDict
+    '''
+    groups = collections.OrderedDict()
+    for position, resource in enumerate(resources):
+        group = (resource['site_id'], resource.resource_name)
+        groups.setdefault(group, []).append((position, resource))
+    return groups
+
+
+def _skip_journaled(group, action, journal, results):
+    '''Drop resources already completed according to ``journal``
+
+    :param group: List of (position, resource)
+    :param action: 'ensure' or 'purge'
+    :param journal: Journal, or None
+    :param results: List of results to update by position
+    :returns: List of (position, resource) still to be done
+    '''
+    remaining = []
+    for position, resource in group:
+        if resource.journaled(journal, action):
+            results[position] = True
+        else:
+            remaining.append((position, resource))
+    return remaining
+
+
+def _fetch_existing(group):
+    '''Fetch existing objects for a group of resources, by natural key
+
+    One GET is made for the whole site and resource type of the group. If it
+    fails, the error is logged on every resource and ``None`` is returned in
+    place of the mapping.
+
+    :param group: List of (position, resource) of a single group
+    :returns: Tuple of (site endpoint, mapping of natural key to object)
+    '''
+    first = group[0][1]
+    first.ensure_client()
+    site = first.client.sites(first['site_id'])
+    endpoint = getattr(site, first.resource_name)
+    try:
+        objects = get_result(endpoint.get())
+    except Exception as e:
+        for _, resource in group:
+            resource.log_error(e)
+        return endpoint, None
+
+    existing = dict((first.natural_key(obj), obj) for obj in objects)
+    for _, resource in group:
+        key = resource.natural_key(resource)
+        resource.session_store(existing.get(key, {}))
+    return endpoint, existing
+
+
+def _send_chunks(endpoint, method, items, results, verb):
+    '''Send payloads to the list endpoint in chunks
+
+    A chunk fails as a whole, so the objects of a failed chunk are retried one
+    at a time to find which of them failed.
+
+    :param endpoint: Site endpoint of the resource type
+    :param method: 'post' or 'patch'
+    :param items: List of (position, resource, payload)
+    :param results: List of results to update by position
+    :param verb: Past tense of the action, for logging
+    '''
+    for chunk in chunked(items, constants.BULK_CHUNK_SIZE):
+        try:
+            getattr(endpoint, method)([payload for (_, _, payload) in chunk])
+        except Exception as e:
+            if len(chunk) > 1:
+                for item in chunk:
+                    _send_chunks(endpoint, method, [item], results, verb)
+                continue
+            position, resource, _ = chunk[0]
+            resource.log_error(e)
+            resource.clear_cache()
+            results[position] = False
+        else:
+            for position, resource, _ in chunk:
+                resource.logger.info('[%s] has been %s!', resource, verb)
+                resource.clear_cache()
+                results[position] = True
+
+
+def _journal_results(journal, action, group, results):
+    '''Record the results for a group in ``journal``, if given'''
+    if journal is None:
+        return
+
+    keys = []
+    for position, resource in group:
+        if results[position]:
+            keys.append(resource.journal_key)
+        else:
+            resource.journal_record(journal, action, False)
+
+    if keys:
+        journal.record(action, group[0][1].resource_name, keys)
+
+
+def ensure_many(resources, journal=None):
+    '''Ensure that many resources exist in their current state
+
+    The bulk equivalent of :meth:`Resource.ensure`. Existing objects are
+    fetched with one GET per site and resource type and matched to
+    ``resources`` by natural key. Only resources that are missing or differ
+    are then sent, in chunked POSTs and PATCHes.
+
+    >>> nets = [Network(site_id=1, cidr=cidr) for cidr in cidrs]
+    >>> results = ensure_many(nets)
+    >>> [n.last_error for (n, ok) in zip(nets, results) if not ok]
+    []
+
+    :param resources: Resources to ensure
+    :type resources: list
+    :param journal: If given, skip resources already ensured according to the
+        journal and record the outcome of the rest in it
+    :type journal: pynsot.journal.Journal
+    :returns: For each resource, True if it is in the desired state, or False
+        if not and logged in its ``errors`` and ``last_error``
+    :rtype: list
+    '''
+    resources = list(resources)
+    results = [None] * len(resources)
+
+    for group in _group_by_site(resources).itervalues():
+        group = _skip_journaled(group, 'ensure', journal, results)
+        if not group:
+            continue
+        if group[0][1].resource_name == 'interfaces':
+            resolve_devices([resource for (_, resource) in group])
+
+        endpoint, existing = _fetch_existing(group)
+        if existing is None:
+            for position, _ in group:
+                results[position] = False
+            _journal_results(journal, 'ensure', group, results)
+            continue
+
+        to_create, to_patch = [], []
+        for position, resource in group:
+            payload = dict(resource)
+            current = existing.get(resource.natural_key(resource))
+            if current is None:
+                to_create.append((position, resource, payload))
+                continue
+
+            changed = resource.diff(current)
+            if not changed:
+                resource._existing_resource = current
+                results[position] = True
+            elif resource.resource_name == 'interfaces':
+                # Like ensure(), POST interfaces in full instead of PATCHing
+                to_create.append((position, resource, payload))
+            else:
+                changed['id'] = current['id']
+                to_patch.append((position, resource, changed))
+
+        _send_chunks(endpoint, 'post', to_create, results, 'created')
+        _send_chunks(endpoint, 'patch', to_patch, results, 'patched')
+        _journal_results(journal, 'ensure', group, results)
+
+    return results
+
+
+def purge_many(resources, journal=None):
+    '''Ensure that many resources don't exist upstream
+
+    The bulk equivalent of :meth:`Resource.purge`. Existing objects are
+    fetched with one GET per site and resource type, and only resources that
+    exist are deleted. The API has no bulk delete, so each is deleted by id.
+
+    :param resources: Resources to purge
+    :type resources: list
+    :param journal: Journal used to resume. See :func:`ensure_many`.
+    :type journal: pynsot.journal.Journal
+    :returns: For each resource, True if it does not exist upstream, or False
+        if not and logged in its ``errors`` and ``last_error``
+    :rtype: list
+    '''
+    resources = list(resources)
+    results = [None] * len(resources)
+
+    for group in _group_by_site(resources).itervalues():
+        group = _skip_journaled(group, 'purge', journal, results)
+        if not group:
+            continue
+
+        endpoint, existing = _fetch_existing(group)
+        for position, resource in group:
+            if existing is None:
+                results[position] = False
+                continue
+
+            current = existing.get(resource.natural_key(resource))
+            if current is None:
+                results[position] = True
+                continue
+
+            try:
+                endpoint(current['id']).delete()
+            except Exception as e:
+                resource.log_error(e)
+                results[position] = False
+            else:
+                resource.logger.info('[%s] has been deleted!', resource)
+                results[position] = True
+            resource.clear_cache()
+
+        _journal_results(journal, 'purge', group, results)
+
+    return results
@@ -7,16 +7,17 @@ This is an example of how you would use this with the Client object, to make it
 return objects instead of dicts::
 
     >>> serializer = ModelSerializer()
-    >>> api = Client(url, serializer=serializer)
-    >>> obj = api.sites(1).get()
-    >>> obj
-    <Site(id=1, description=u'Foo site', name=u'Foo')>
+    >>> api = Client(url, email=email, secret_key=key, serializer=serializer)
+    >>> api.sites(1).devices.get()
+    [<Record Device: foo-bar1>, <Record Device: foo-bar2>]
 """
 
 from __future__ import unicode_literals
+import importlib
+import json
+import logging
 
 from .vendor.slumber.serialize import JsonSerializer
-from .import models
 
 
 __author__ = 'Jathan McCollum'
@@ -25,13 +26,130 @@ __email__ = 'jathan@dropbox.com'
 __copyright__ = 'Copyright (c) 2015-2016 Dropbox, Inc.'
 
 
+# Logger
+log = logging.getLogger(__name__)
+
+# JSON codecs used by ``CodecSerializer`` in order of preference when none is
+# selected. Each must provide ``loads()`` and ``dumps()``.
+JSON_CODECS = ('ujson', 'simplejson', 'json')
+
+# Codec setting that selects the fastest installed codec.
+AUTO_CODEC = 'auto'
+
+
+def get_json_codec(name=None):
+    """
+    Return the name and module of a JSON codec.
+
+    If ``name`` isn't installed, a warning is logged and the fastest installed
+    codec is used instead. The stdlib ``json`` module is always available.
+
+    :param name:
+        (Optional) Name of the codec module (e.g. 'ujson'). If not set or
+        'auto', the fastest installed codec from ``JSON_CODECS`` is used.
+    """
+    names = JSON_CODECS
+    if name and name != AUTO_CODEC:
+        names = (name,) + JSON_CODECS
+
+    for codec in names:
+        try:
+            module = importlib.import_module(codec)
+        except ImportError:
+            if codec == name:
+                log.warning(
+                    'JSON codec %r is not installed; falling back.', name
+                )
+            continue
+        log.debug('Using JSON codec: %s', codec)
+        return codec, module
+
+
+# Fields identifying each type of object in a response, checked in order.
+# Objects matching none of them (e.g. Sites, Changes, or the envelope of a
+# paginated response) are decoded as dicts.
+MODEL_FIELDS = (
+    (frozenset(['device', 'name', 'mac_address', 'addresses']), 'Interface'),
+    (frozenset(['network_address', 'prefix_length', 'is_ip']), 'Network'),
+    (frozenset(['name', 'resource_name', 'constraints']), 'Attribute'),
+    (frozenset(['hostname', 'attributes']), 'Device'),
+)
+
+
+def get_model_name(fields):
+    """
+    Return the name of the model for an object with the given fields, or None.
+
+    :param fields:
+        Field names of the object
+    """
+    fields = frozenset(fields)
+    for required, model_name in MODEL_FIELDS:
+        if required <= fields:
+            return model_name
+    return None
+
+
 class ModelSerializer(JsonSerializer):
-    """This serializes to a model instead of a dict."""
+    """
+    This serializes to a model instead of a dict.
+
+    Objects of a known model are decoded straight into read-only
+    :class:`pynsot.models.Record` objects while the JSON is parsed, so no
+    intermediate dict is built for them. Their attributes are only turned into
+    a dict when accessed. Use ``Record.to_resource()`` for a full resource.
+    """
     key = 'model'
 
+    def __init__(self):
+        from . import models  # To avoid circular import
+        self.models = models
+
     def get_serializer(self, *args, **kwargs):
         return self
 
+    def object_pairs_hook(self, pairs, interns=None):
+        """
+        Decode a JSON object from its list of (key, value) pairs.
+
+        :param pairs:
+            List of (key, value) pairs
+
+        :param interns:
+            (Optional) :class:`pynsot.models.InternTable` shared by the
+            records of a response
+        """
+        model_name = get_model_name(key for (key, _) in pairs)
+        if model_name is None:
+            return dict(pairs)
+        model = getattr(self.models, model_name)
+        return self.models.Record(model, pairs, interns)
+
     def loads(self, data):
-        obj_data = super(ModelSerializer, self).loads(data)
-        return models.ApiModel(obj_data)
+        interns = self.models.InternTable()
+        return json.loads(
+            data,
+            object_pairs_hook=lambda pairs: self.object_pairs_hook(
+                pairs, interns
+            )
+        )
+
+
+class CodecSerializer(JsonSerializer):
+    """
+    JSON serializer using a pluggable codec, the fastest installed by default.
+
+    This is the client's default serializer. The codec may be selected with
+    the ``json_codec`` setting in ``~/.pynsotrc``.
+
+    :param codec:
+        (Optional) Name of the codec module. See ``get_json_codec()``.
+    """
+    def __init__(self, codec=None):
+        self.codec_name, self.codec = get_json_codec(codec)
+
+    def loads(self, data):
+        return self.codec.loads(data)
+
+    def dumps(self, data):
+        return self.codec.dumps(data)
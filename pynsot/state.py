@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+
+"""
+Plan and apply a desired state of resources.
+
+Rather than calling ``ensure()`` on every resource, the desired inventory is
+compared to the current state of the server in a handful of bulk reads (one
+per site and resource type). This yields a :class:`Plan` of only the creates,
+updates and deletes that are needed, which may be reviewed and then applied in
+dependency order.
+
+Example:
+
+>>> from pynsot.models import Device, Network
+>>> from pynsot.state import plan
+>>> desired = [
+...     Device(client=c, site_id=1, hostname='router1'),
+...     Network(client=c, site_id=1, cidr='10.0.0.0/8'),
+... ]
+>>> p = plan(desired, prune=True)
+>>> print p
++ devices router1
+- devices router2
+Plan: 1 to create, 0 to update, 1 to delete.
+>>> p.apply()
+True
+"""
+
+from __future__ import unicode_literals
+import collections
+import logging
+from multiprocessing.pool import ThreadPool
+
+from . import constants
+from .models import _group_by_site, resolve_devices
+from .util import chunked, get_result
+
+
+__all__ = ('APPLY_ORDER', 'Change', 'Plan', 'plan', 'prunable')
+
+
+log = logging.getLogger(__name__)
+
+# Resource types in the order their creates and updates are applied. Deletes
+# are applied afterward in the reverse order.
+APPLY_ORDER = ('attributes', 'devices', 'networks', 'interfaces')
+
+# Symbols used to display each action.
+ACTION_SYMBOLS = {
+    'create': '+',
+    'update': '~',
+    'delete': '-',
+}
+
+
+class Change(object):
+    """
+    A single create, update or delete of a resource.
+
+    :param action:
+        One of 'create', 'update' or 'delete'
+
+    :param resource_name:
+        API resource name (e.g. 'devices')
+
+    :param site_id:
+        Site ID of the resource
+
+    :param key:
+        Natural key of the resource
+
+    :param payload:
+        Dict sent to the API. For updates, only the changed fields and
+        ``id``. For deletes, the existing object.
+
+    :param resource:
+        (Optional) The desired :class:`pynsot.models.Resource`. Not set for
+        deletes.
+    """
+    def __init__(self, action, resource_name, site_id, key, payload,
+                 resource=None):
+        self.action = action
+        self.resource_name = resource_name
+        self.site_id = site_id
+        self.key = key
+        self.payload = payload
+        self.resource = resource
+        self.ok = None
+        self.error = None
+
+    def __repr__(self):
+        return '<Change: %s>' % (self,)
+
+    def __str__(self):
+        line = '%s %s %s' % (
+            ACTION_SYMBOLS[self.action], self.resource_name, self.key
+        )
+        if self.action == 'update':
+            fields = sorted(f for f in self.payload if f != 'id')
+            line += ': %s' % ', '.join(fields)
+        return line
+
+    def succeeded(self):
+        """Mark the change as applied."""
+        self.ok = True
+        if self.resource is not None:
+            self.resource.clear_cache()
+
+    def failed(self, error):
+        """
+        Mark the change as failed.
+
+        :param error:
+            Exception raised while applying it
+        """
+        self.ok = False
+        self.error = error
+        if self.resource is not None:
+            self.resource.log_error(error)
+            self.resource.clear_cache()
+        else:
+            log.warning('[%s] %s', self.key, error)
+
+
+class Plan(object):
+    """
+    The changes needed to bring the server to a desired state.
+
+    :param changes:
+        List of :class:`Change` objects
+
+    :param client:
+        API client used to apply the changes
+    """
+    def __init__(self, changes, client):
+        self.changes = changes
+        self.client = client
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __str__(self):
+        lines = [str(change) for change in self.changes]
+        counts = collections.Counter(change.action for change in self.changes)
+        lines.append(
+            'Plan: %d to create, %d to update, %d to delete.' % (
+                counts['create'], counts['update'], counts['delete']
+            )
+        )
+        return '\n'.join(lines)
+
+    @property
+    def failed(self):
+        """List of changes that failed to apply."""
+        return [change for change in self.changes if change.ok is False]
+
+    def stages(self):
+        """
+        Generate lists of changes that may be applied concurrently, in
+        dependency order.
+        """
+        def select(action, resource_name):
+            return [
+                change for change in self.changes
+                if change.action == action and
+                change.resource_name == resource_name
+            ]
+
+        def by_prefix(changes, children_first=False):
+            """Split network changes into a stage per prefix length."""
+            stages = collections.defaultdict(list)
+            for change in changes:
+                stages[change.payload['prefix_length']].append(change)
+            for length in sorted(stages, reverse=children_first):
+                yield stages[length]
+
+        for resource_name in APPLY_ORDER:
+            creates = select('create', resource_name)
+
+            # Create parent networks before their children, so that each
+            # is created under its parent.
+            if resource_name == 'networks':
+                for stage in by_prefix(creates):
+                    yield stage
+            else:
+                yield creates
+            yield select('update', resource_name)
+
+        for resource_name in reversed(APPLY_ORDER):
+            deletes = select('delete', resource_name)
+
+            # Delete child networks before their parents.
+            if resource_name == 'networks':
+                for stage in by_prefix(deletes, children_first=True):
+                    yield stage
+            else:
+                yield deletes
+
+    def apply(self):
+        """
+        Apply the changes in dependency order.
+
+        Creates and updates are sent in chunked requests and deletes are sent
+        one at a time, with the requests of each stage made concurrently.
+        Failures are recorded on each :class:`Change` (and logged on its
+        resource) rather than raised.
+
+        :returns:
+            True if every change was applied
+        """
+        pool = ThreadPool(constants.MAX_CONCURRENCY)
+        try:
+            for stage in self.stages():
+                if not stage:
+                    continue
+                if stage[0].resource_name == 'interfaces':
+                    self.resolve_devices(stage)
+                pool.map(self.send, self.batches(stage))
+        finally:
+            pool.close()
+            pool.join()
+
+        return not self.failed
+
+    def batches(self, stage):
+        """
+        Split a stage into lists of changes that are each sent in one request.
+
+        :param stage:
+            List of changes of a single action and resource type
+        """
+        by_site = collections.OrderedDict()
+        for change in stage:
+            by_site.setdefault(change.site_id, []).append(change)
+
+        for changes in by_site.itervalues():
+            if changes[0].action == 'delete':
+                for change in changes:
+                    yield [change]
+            else:
+                for chunk in chunked(changes, constants.BULK_CHUNK_SIZE):
+                    yield chunk
+
+    def endpoint(self, site_id, resource_name):
+        """Return the endpoint of a resource type in a site."""
+        return getattr(self.client.sites(site_id), resource_name)
+
+    def send(self, changes):
+        """
+        Send a batch of changes in one request.
+
+        A batch fails as a whole, so the changes of a failed batch are retried
+        one at a time to find which of them failed.
+
+        :param changes:
+            List of changes of a single action, resource type and site
+        """
+        first = changes[0]
+        endpoint = self.endpoint(first.site_id, first.resource_name)
+        try:
+            if first.action == 'delete':
+                endpoint(first.payload['id']).delete()
+            elif first.action == 'create':
+                endpoint.post([change.payload for change in changes])
+            else:
+                endpoint.patch([change.payload for change in changes])
+        except Exception as e:
+            if len(changes) > 1:
+                for change in changes:
+                    self.send([change])
+                return None
+            first.failed(e)
+        else:
+            for change in changes:
+                change.succeeded()
+
+    def resolve_devices(self, stage):
+        """
+        Set the device ID of Interfaces given by a hostname of a Device that
+        did not exist when the plan was made.
+
+        The Devices of each site are fetched at most once.
+
+        :param stage:
+            List of changes for Interfaces
+        """
+        pending = [
+            change for change in stage
+            if change.resource is not None and change.resource.device_pending
+        ]
+        resolve_devices([change.resource for change in pending])
+        for change in pending:
+            change.payload['device'] = change.resource['device']
+
+
+def prunable(resource_name, obj):
+    """
+    Return whether an existing object may be deleted by a pruning plan.
+
+    Host addresses assigned to interfaces are created implicitly when the
+    addresses are assigned, so they are managed through their interfaces and
+    never pruned as networks.
+
+    :param resource_name:
+        API resource name (e.g. 'networks')
+
+    :param obj:
+        Existing API object
+    """
+    if resource_name == 'networks':
+        return not (obj.get('is_ip') and obj.get('state') == 'assigned')
+    return True
+
+
+def plan(resources, prune=False):
+    """
+    Compute the changes needed to bring the server to the state of
+    ``resources``.
+
+    The existing objects are fetched with one GET per site and resource type,
+    and matched to ``resources`` by natural key.
+
+    :param resources:
+        Iterable of :class:`pynsot.models.Resource` objects for the desired
+        state
+
+    :param prune:
+        Whether to delete existing objects of the same site and resource type
+        that are not in ``resources``, except host addresses assigned to
+        interfaces (see ``prunable()``)
+
+    :returns:
+        :class:`Plan`
+    """
+    resources = list(resources)
+    if not resources:
+        return Plan([], None)
+
+    client = resources[0].client
+    changes = []
+    for (site_id, resource_name), group in _group_by_site(resources).items():
+        # Interfaces of devices created since they were built are keyed by
+        # their device ID, like the existing ones.
+        if resource_name == 'interfaces':
+            resolve_devices([resource for (_, resource) in group])
+
+        first = group[0][1]
+        first.ensure_client()
+        client = client or first.client
+        endpoint = getattr(first.client.sites(site_id), resource_name)
+        existing = dict(
+            (first.natural_key(obj), obj)
+            for obj in get_result(endpoint.get())
+        )
+
+        desired = set()
+        for _, resource in group:
+            payload = dict(resource)
+            key = resource.natural_key(resource)
+            desired.add(key)
+            current = existing.get(key)
+
+            if current is None:
+                changes.append(Change(
+                    'create', resource_name, site_id, key, payload, resource
+                ))
+                continue
+
+            resource._existing_resource = current
+            changed = resource.diff(current)
+            if changed:
+                changed['id'] = current['id']
+                changes.append(Change(
+                    'update', resource_name, site_id, key, changed, resource
+                ))
+
+        if prune:
+            for key, current in existing.iteritems():
+                if key not in desired and prunable(resource_name, current):
+                    changes.append(Change(
+                        'delete', resource_name, site_id, key, current
+                    ))
+
+    log.debug('PLAN: %d changes', len(changes))
+    return Plan(changes, client)
@@ -0,0 +1,555 @@
+# -*- coding: utf-8 -*-
+
+"""
+HTTP transport used by the API client.
+
+Every request of a client, including authentication, is sent through a single
+``requests`` session whose connection pools, retries, timeouts and keep-alive
+are configurable (see ``get_session()``). Its transport adapter may also gzip
+large request bodies, and counts the bytes sent and received by the client
+before and after compression::
+
+    >>> api = get_api_client(extra_args={'compress': True})
+    >>> api.sites(1).networks.post(networks)
+    >>> api.transfer_stats
+    <TransferStats: 1 requests, 412803 bytes saved>
+
+Identical GET requests made at the same time by several threads are coalesced
+into one: the first is sent, and the others wait for and share its response
+(see ``SingleFlight``).
+
+The threads of a process share the client's session, and each process forked
+after the client was created gets a new one of its own the first time it is
+used (see ``ForkSafeSession``).
+"""
+
+from __future__ import unicode_literals
+import copy
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+
+from .vendor import slumber
+
+from . import constants
+from .limiter import OVERLOAD_STATUSES, request_class
+
+# Use the same requests library as slumber, which imports it absolutely, so
+# that sessions and exceptions are compatible with it.
+requests = slumber.requests
+HTTPAdapter = requests.adapters.HTTPAdapter
+Retry = requests.packages.urllib3.util.retry.Retry
+
+
+__author__ = 'Jathan McCollum'
+__maintainer__ = 'Jathan McCollum'
+__email__ = 'jathan@dropbox.com'
+__copyright__ = 'Copyright (c) 2015-2016 Dropbox, Inc.'
+
+
+# Logger
+log = logging.getLogger(__name__)
+
+
+__all__ = (
+    'ForkSafeSession', 'SingleFlight', 'TransferStats', 'TransportAdapter',
+    'get_session', 'gzip_encode', 'parse_timeout',
+)
+
+
+def gzip_encode(data, level=6):
+    """
+    Return ``data`` compressed in the gzip format.
+
+    :param data:
+        Byte string to compress
+
+    :param level:
+        Compression level from 1 (fastest) to 9 (smallest)
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class TransferStats(object):
+    """
+    Running totals of the bytes sent and received by a client.
+
+    Sizes are counted both as sent over the wire (``*_wire``) and before
+    compression (``*_raw``). Requests that shared the response of an identical
+    request in flight are counted as ``coalesced_requests`` rather than sent.
+    Updates are thread-safe.
+    """
+    FIELDS = (
+        'requests', 'compressed_requests', 'coalesced_requests', 'sent_raw',
+        'sent_wire', 'received_raw', 'received_wire',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Set all of the totals to zero."""
+        with self._lock:
+            for field in self.FIELDS:
+                setattr(self, field, 0)
+
+    def record_sent(self, raw, wire):
+        """
+        Count a request body.
+
+        :param raw:
+            Size of the body before compression
+
+        :param wire:
+            Size of the body as sent
+        """
+        with self._lock:
+            self.requests += 1
+            if wire < raw:
+                self.compressed_requests += 1
+            self.sent_raw += raw
+            self.sent_wire += wire
+
+    def record_received(self, raw, wire):
+        """
+        Count a response body.
+
+        :param raw:
+            Size of the body after decompression
+
+        :param wire:
+            Size of the body as received
+        """
+        with self._lock:
+            self.received_raw += raw
+            self.received_wire += wire
+
+    def record_coalesced(self):
+        """Count a request that shared the response of another."""
+        with self._lock:
+            self.coalesced_requests += 1
+
+    @property
+    def saved(self):
+        """Number of bytes that compression kept off the wire."""
+        return (
+            self.sent_raw - self.sent_wire +
+            self.received_raw - self.received_wire
+        )
+
+    def as_dict(self):
+        """Return the totals, and the bytes ``saved``, as a dict."""
+        with self._lock:
+            stats = dict((f, getattr(self, f)) for f in self.FIELDS)
+        stats['saved'] = (
+            stats['sent_raw'] - stats['sent_wire'] +
+            stats['received_raw'] - stats['received_wire']
+        )
+        return stats
+
+    def __repr__(self):
+        return '<TransferStats: %d requests, %d bytes saved>' % (
+            self.requests, self.saved
+        )
+
+
+def parse_timeout(value):
+    """
+    Return a timeout for ``requests`` from a setting.
+
+    :param value:
+        None to wait forever, a number of seconds, or a ``(connect, read)``
+        pair, which may also be given as a string such as '5, 30'
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, basestring):
+        value = value.split(',')
+    if isinstance(value, (list, tuple)):
+        connect, read = [float(v) if v else None for v in value]
+        return connect, read
+    return float(value)
+
+
+class _Flight(object):
+    """A call in flight and, once it's done, its outcome."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key into one call.
+
+    The first caller of a key runs the call, and callers of the same key who
+    arrive before it's done wait for it and share its result (or exception).
+    Callers who arrive afterwards make a new call.
+
+    Example:
+
+    >>> flights = SingleFlight()
+    >>> result, shared = flights.do(url, lambda: fetch(url))
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    def do(self, key, func):
+        """
+        Call ``func``, or wait for the call in flight with the same key.
+
+        :param key:
+            Hashable key of the call
+
+        :param func:
+            Callable taking no arguments
+
+        :returns:
+            Tuple of the result and whether it was shared with another caller
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.exc_info is not None:
+                exc_type, exc, tb = flight.exc_info
+                raise exc_type, exc, tb
+            return flight.result, True
+
+        try:
+            flight.result = func()
+        except Exception:
+            flight.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def forget(self):
+        """
+        Stop new callers from joining the calls in flight.
+
+        The calls in flight still complete, and share their results with
+        those already waiting.
+        """
+        with self._lock:
+            self._flights.clear()
+
+
+class TransportAdapter(HTTPAdapter):
+    """
+    Transport adapter that applies a default timeout, gzips large request
+    bodies and records transfer sizes in a :class:`TransferStats`.
+
+    Bodies are only compressed when ``compress`` is set, because the server
+    (or a proxy in front of it) must be able to decode them. Responses are
+    always counted; whether they are compressed is up to the server.
+
+    :param compress:
+        Whether to gzip request bodies
+
+    :param threshold:
+        Minimum size in bytes of a body to compress
+
+    :param stats:
+        (Optional) :class:`TransferStats` to update. A new one by default.
+
+    :param timeout:
+        (Optional) Timeout of requests that don't set one. See
+        ``parse_timeout()``.
+
+    :param limiters:
+        (Optional) Mapping of request class to the
+        :class:`pynsot.limiter.AdaptiveLimiter` each request must pass. See
+        :func:`pynsot.limiter.get_limiters`.
+
+    :param coalesce:
+        Whether identical GET requests in flight at the same time share one
+        response. Once a write completes, GET requests no longer join those
+        sent before it, so that a thread always reads its own writes.
+
+    :param kwargs:
+        Pool and retry settings passed to ``HTTPAdapter``
+    """
+    def __init__(self, compress=False, threshold=None, stats=None,
+                 timeout=None, limiters=None, coalesce=True, **kwargs):
+        if threshold is None:
+            threshold = constants.GZIP_THRESHOLD
+        if stats is None:
+            stats = TransferStats()
+        self.compress = compress
+        self.threshold = int(threshold)
+        self.stats = stats
+        self.timeout = parse_timeout(timeout)
+        self.limiters = limiters or {}
+        self.coalesce = coalesce
+        self.flights = SingleFlight()
+        super(TransportAdapter, self).__init__(**kwargs)
+
+    def compress_body(self, request):
+        """
+        Gzip the body of a prepared request in place if it's large enough.
+
+        :param request:
+            ``requests.PreparedRequest`` about to be sent
+
+        :returns:
+            Tuple of the body size before and after compression
+        """
+        body = request.body
+        if not isinstance(body, basestring):
+            # Nothing, or a stream that can't be measured up front.
+            return 0, 0
+
+        if isinstance(body, unicode):
+            body = body.encode('utf-8')
+        raw = len(body)
+
+        if (not self.compress or raw < self.threshold or
+                'Content-Encoding' in request.headers):
+            return raw, raw
+
+        request.body = gzip_encode(body)
+        request.headers['Content-Encoding'] = 'gzip'
+        request.headers['Content-Length'] = str(len(request.body))
+        log.debug(
+            'Compressed %s %s body: %d -> %d bytes', request.method,
+            request.url, raw, len(request.body)
+        )
+        return raw, len(request.body)
+
+    def record_response(self, response, raw=None):
+        """
+        Count the body of a response that has been read.
+
+        :param response:
+            ``requests.Response`` object
+
+        :param raw:
+            (Optional) Decoded size of the body, if it was streamed rather
+            than stored in ``response.content``
+        """
+        if raw is None:
+            raw = len(response.content)
+
+        # Bytes actually read off the socket, before decoding.
+        try:
+            wire = response.raw.tell()
+        except AttributeError:
+            wire = int(response.headers.get('Content-Length', raw))
+
+        self.stats.record_received(raw, wire)
+
+    def flight_key(self, request):
+        """
+        Return the key under which a request may be coalesced, or None if it
+        may not be.
+
+        :param request:
+            ``requests.PreparedRequest`` about to be sent
+        """
+        if not self.coalesce or request.method != 'GET' or request.body:
+            return None
+        headers = tuple(sorted(
+            (k.lower(), v) for (k, v) in request.headers.items()
+        ))
+        return request.url, headers
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+
+        # Streamed responses can only be read once, so aren't shared.
+        key = None if stream else self.flight_key(request)
+        if key is None:
+            try:
+                return self._send(request, stream, timeout, **kwargs)
+            finally:
+                if request_class(request.method) == 'write':
+                    self.flights.forget()
+
+        response, shared = self.flights.do(
+            key, lambda: self._send(request, stream, timeout, **kwargs)
+        )
+        if shared:
+            # A copy holds the same (already read) body but can be handled by
+            # this thread's session independently of the original.
+            self.stats.record_coalesced()
+            response = copy.copy(response)
+        return response
+
+    def _send(self, request, stream, timeout, **kwargs):
+        """Send a request through the limiter and record its sizes."""
+        raw, wire = self.compress_body(request)
+        self.stats.record_sent(raw, wire)
+
+        # Wait for a slot, and report how the server coped once the response
+        # (but not yet its body) has arrived.
+        limiter = self.limiters.get(request_class(request.method))
+        if limiter is not None:
+            ticket = limiter.acquire()
+        started = time.time()
+        overloaded = True
+        try:
+            response = super(TransportAdapter, self).send(
+                request, stream=stream, timeout=timeout, **kwargs
+            )
+            overloaded = response.status_code in OVERLOAD_STATUSES
+        finally:
+            if limiter is not None:
+                limiter.release(ticket, time.time() - started, overloaded)
+
+        # Streamed responses are counted by whoever reads them.
+        if not stream:
+            self.record_response(response)
+        return response
+
+
+class ForkSafeSession(object):
+    """
+    Proxy to a ``requests`` session of the current process.
+
+    The threads of a process share one session, and with it one connection
+    pool, set of limiters and map of requests in flight. A process forked
+    from another (e.g. by ``multiprocessing``) must not use any of these: its
+    parent's connections may be in use by the parent, and locks held or
+    requests in flight at the time of the fork are never released in the
+    child. So the first time the proxy is used in a new process, it builds a
+    new session with ``factory`` that keeps the auth and headers of the old
+    one. Clients therefore don't need to authenticate again in each worker.
+
+    Attributes are read from and set on the session of the current process.
+
+    :param factory:
+        Callable taking no arguments that returns a new session
+    """
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_pid', os.getpid())
+        object.__setattr__(self, '_session', factory())
+
+    @property
+    def current(self):
+        """The session of the current process."""
+        pid = os.getpid()
+        if self._pid != pid:
+            self.reinit(pid)
+        return self._session
+
+    def reinit(self, pid=None):
+        """
+        Replace the session with a new one for the process ``pid``.
+
+        The old session is dropped rather than closed, because closing its
+        pools would need locks that another thread of the parent may have
+        held at the time of the fork.
+
+        :param pid:
+            (Optional) Process ID. Defaults to the current process.
+        """
+        if pid is None:
+            pid = os.getpid()
+        old = self._session
+        session = self._factory()
+        session.auth = old.auth
+        session.headers = old.headers.copy()
+        object.__setattr__(self, '_session', session)
+        object.__setattr__(self, '_pid', pid)
+        log.debug('Using a new session in process %d', pid)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.current, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.current, name, value)
+
+    def __repr__(self):
+        return '<ForkSafeSession: pid %d>' % self._pid
+
+
+def get_session(compress=False, compress_threshold=None, stats=None,
+                pool_connections=None, pool_maxsize=None, max_retries=None,
+                timeout=None, keep_alive=True, limiters=None, coalesce=True):
+    """
+    Return a ``requests`` session tuned for the API client.
+
+    The session is safe to share between the threads of a client: each thread
+    checks a connection out of the pool for the duration of a request. The
+    pool should hold at least as many connections as there are concurrent
+    requests, or the extra connections are closed rather than reused.
+
+    :param compress:
+        Whether to gzip large request bodies
+
+    :param compress_threshold:
+        (Optional) Minimum size in bytes of a request body to compress
+
+    :param stats:
+        (Optional) :class:`TransferStats` to update
+
+    :param pool_connections:
+        Number of hosts to keep connection pools for
+
+    :param pool_maxsize:
+        Number of connections kept open to each host
+
+    :param max_retries:
+        Number of times to retry a request that failed to connect, or a
+        request of an idempotent method (e.g. GET) whose response failed to
+        be read
+
+    :param timeout:
+        Timeout of each request. See ``parse_timeout()``.
+
+    :param keep_alive:
+        Whether to reuse connections between requests
+
+    :param limiters:
+        (Optional) Limiters of requests in flight. See ``TransportAdapter``.
+
+    :param coalesce:
+        Whether concurrent identical GET requests share one response. See
+        ``TransportAdapter``.
+    """
+    if pool_connections is None:
+        pool_connections = constants.POOL_CONNECTIONS
+    if pool_maxsize is None:
+        pool_maxsize = constants.POOL_MAXSIZE
+    if max_retries is None:
+        max_retries = constants.MAX_RETRIES
+
+    retries = Retry(
+        total=int(max_retries), backoff_factor=constants.RETRY_BACKOFF
+    )
+    adapter = TransportAdapter(
+        compress=compress, threshold=compress_threshold, stats=stats,
+        timeout=timeout, limiters=limiters, coalesce=coalesce,
+        pool_connections=int(pool_connections),
+        pool_maxsize=int(pool_maxsize), max_retries=retries,
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
@@ -5,6 +5,9 @@ Utilities and stuff.
 """
 
 from __future__ import unicode_literals
+import codecs
+from itertools import islice
+import json
 
 from .vendor import netaddr
 
@@ -27,6 +30,150 @@ def get_result(response):
     return payload
 
 
+def chunked(iterable, size):
+    """
+    Lazily split an iterable into lists of at most ``size`` items.
+
+    :param iterable:
+        Any iterable, which is only consumed as chunks are requested
+
+    :param size:
+        Maximum number of items in each chunk
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class JsonReader(object):
+    """
+    Incrementally read JSON values from an iterable of byte strings.
+
+    Only the unconsumed part of the input is buffered, so values are decoded
+    one at a time as the input arrives rather than all at once.
+
+    :param chunks:
+        Iterable of UTF-8 encoded byte strings
+    """
+    WHITESPACE = ' \t\r\n'
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+
+    def fill(self):
+        """
+        Read more input, dropping what was consumed. Returns False at the end
+        of the input.
+        """
+        for chunk in self.chunks:
+            data = self.text.decode(chunk)
+            if data:
+                self.buf = self.buf[self.pos:] + data
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character without consuming it,
+        or '' at the end of the input.
+        """
+        while True:
+            buf = self.buf
+            while self.pos < len(buf) and buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(buf):
+                return buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        """
+        Consume and return the next character, which must be one of
+        ``chars``.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                'Expected one of %r but got %r' % (chars, char or 'EOF')
+            )
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Consume and return the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+
+            # A value ending with the buffer (e.g. a number) may be truncated.
+            if end == len(self.buf) and self.fill():
+                continue
+
+            self.pos = end
+            return obj
+
+
+def iter_json_results(chunks):
+    """
+    Lazily decode the objects of a JSON list response.
+
+    Objects are yielded one at a time from either a top-level array or the
+    ``results`` array of a paginated response, without decoding the whole
+    response first.
+
+    :param chunks:
+        Iterable of UTF-8 encoded byte strings, e.g. from
+        ``response.iter_content()``
+    """
+    reader = JsonReader(chunks)
+
+    # Find the results array of a paginated response.
+    if reader.expect('[{') == '{':
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key == 'results':
+                reader.expect('[')
+                break
+            reader.value()
+            if reader.expect(',}') == '}':
+                return
+
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
+
+
+def parse_bool(value):
+    """
+    Return a boolean for a setting that may have been read as a string.
+
+    :param value:
+        A bool, None, or a string such as 'true', 'yes', 'on' or '1'
+    """
+    if isinstance(value, basestring):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
 def validate_cidr(cidr):
     """
     Return whether ``cidr`` is valid.
@@ -129,6 +129,16 @@ def test_circuits_list_grep_output(runner, circuit):
         assert result.output == expected_output
 
 
+def test_circuits_list_prefetch(runner, circuit):
+    """ Endpoints are displayed by natural key with --prefetch """
+
+    with runner.isolated_filesystem():
+        result = runner.run('circuits list --prefetch')
+        assert_output(
+            result, ['test_circuit', 'foo-bar01:eth0', 'foo-bar02:eth0']
+        )
+
+
 def test_circuits_list_addresses(runner, circuit, interface_a, interface_z):
     """ Test listing out a circuit's interface addresses """
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the JSON codecs available to the client serializer.
+
+Decodes and encodes list responses shaped like those of the Devices and
+Networks endpoints, using each installed codec from ``JSON_CODECS``. Run it
+from the repository root::
+
+    $ python -m tests.bench_json_codecs --num-items 50000
+"""
+
+from __future__ import unicode_literals
+import argparse
+import json
+import timeit
+
+from pynsot.serializers import JSON_CODECS, get_json_codec
+from .util import generate_devices, generate_networks
+
+
+def make_payloads(num_items):
+    """Return a dict of payload names to JSON list responses."""
+    devices = generate_devices(num_items)
+    for i, device in enumerate(devices, 1):
+        device.update(id=i, site_id=1)
+
+    networks = []
+    for i, network in enumerate(generate_networks(num_items), 1):
+        address, prefix_length = network.pop('cidr').split('/')
+        network.update(
+            id=i, site_id=1, network_address=address,
+            prefix_length=int(prefix_length), ip_version='4', is_ip=False,
+            parent_id=None, state='allocated',
+        )
+        networks.append(network)
+
+    return {
+        'devices': json.dumps(devices),
+        'networks': json.dumps(networks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--num-items', type=int, default=10000)
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.num_items)
+    for payload_name, data in sorted(payloads.items()):
+        print '%s: %d objects, %d bytes' % (
+            payload_name, args.num_items, len(data)
+        )
+        objects = json.loads(data)
+        for codec_name in JSON_CODECS:
+            name, codec = get_json_codec(codec_name)
+            if name != codec_name:
+                print '  %-10s not installed' % codec_name
+                continue
+
+            loads = min(timeit.repeat(
+                lambda: codec.loads(data), number=1, repeat=args.repeat
+            ))
+            dumps = min(timeit.repeat(
+                lambda: codec.dumps(objects), number=1, repeat=args.repeat
+            ))
+            print '  %-10s loads %8.1f ms   dumps %8.1f ms' % (
+                name, loads * 1000, dumps * 1000
+            )
+
+
+if __name__ == '__main__':
+    main()
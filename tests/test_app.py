@@ -9,9 +9,10 @@ import logging
 
 import pytest
 
+from pynsot import constants
 from .fixtures import (attribute, attributes, client, config, device, network,
                        interface, site, site_client)
-from .util import CliRunner, assert_output
+from .util import CliRunner, assert_output, count_requests
 
 
 log = logging.getLogger(__name__)
@@ -256,6 +257,101 @@ def test_devices_bulk_add(site_client):
         assert expected_output in result.output
 
 
+def test_devices_bulk_add_formats(site_client):
+    """Test ``nsot devices add -b`` w/ .csv and .jsonl files."""
+    BULK_CSV = (
+        'hostname,attributes\n'
+        'csv-host1,"owner=jathan,metro=lax"\n'
+    )
+    BULK_JSONL = (
+        '{"hostname": "jsonl-host1", "attributes": {"owner": "jathan"}}\n'
+        '\n'
+        '{"hostname": "jsonl-host2", "attributes": {"metro": "iad"}}\n'
+    )
+
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        runner.run('attributes add -n owner -r device')
+        runner.run('attributes add -n metro -r device')
+
+        with open('devices.csv', 'w') as fh:
+            fh.writelines(BULK_CSV)
+        with open('devices.jsonl', 'w') as fh:
+            fh.writelines(BULK_JSONL)
+        with open('bad.jsonl', 'w') as fh:
+            fh.writelines('{"hostname": \n')
+
+        result = runner.run('devices add -b devices.csv')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Added device!\n'
+
+        result = runner.run('devices add -b devices.jsonl')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Added device!\n' * 2
+
+        result = runner.run('devices list -q metro=lax')
+        assert result.output == 'csv-host1\n'
+
+        result = runner.run('devices add -b bad.jsonl')
+        assert result.exit_code == 2
+        assert 'Invalid JSON on line 1' in result.output
+
+
+def test_devices_bulk_add_chunked(site_client, monkeypatch):
+    """Test that ``nsot devices add -b`` streams the file in chunks."""
+    monkeypatch.setattr(constants, 'BULK_CHUNK_SIZE', 2)
+    hostnames = ['chunk-%d' % i for i in range(5)]
+
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        with open('bulk_file', 'w') as fh:
+            fh.write('hostname\n' + '\n'.join(hostnames) + '\n')
+
+        with count_requests() as requests_made:
+            result = runner.run('devices add -b bulk_file')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Added device!\n' * 5
+        assert [m for (m, _) in requests_made] == ['POST'] * 3
+
+        result = runner.run('devices list -N')
+        for hostname in hostnames:
+            assert hostname in result.output
+
+
+def test_devices_bulk_add_journal(site_client):
+    """Test that ``nsot -j journal devices add -b`` resumes."""
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        with open('bulk_file', 'w') as fh:
+            fh.write('hostname\njournal-host1\n')
+
+        result = runner.run('-j journal devices add -b bulk_file')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Added device!\n'
+
+        # Append a row as if the file was only partially added before.
+        with open('bulk_file', 'a') as fh:
+            fh.write('journal-host2\n')
+
+        with count_requests() as requests_made:
+            result = runner.run('-j journal devices add -b bulk_file')
+        assert result.exit_code == 0
+        assert result.output == (
+            '[SUCCESS] Added device!\n'
+            'Skipped 1 devices already completed in journal journal.\n'
+        )
+        assert len(requests_made) == 1
+
+        # The journal only applies to the site it was written for.
+        site = site_client.sites.post({'name': 'Journal Site'})
+        result = runner.run(
+            '-j journal devices add -s %s -b bulk_file' % site['id']
+        )
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Added device!\n' * 2
+        assert len(site_client.sites(site['id']).devices.get()) == 2
+
+
 def test_devices_list(site_client):
     """Test ``nsot devices list``."""
     runner = CliRunner(site_client.config)
@@ -333,6 +429,75 @@ def test_devices_list(site_client):
         assert 'No closing quotation' in result.output
 
 
+def test_devices_list_prefetch(site_client):
+    """Test ``nsot devices list --prefetch``."""
+    devices = site_client.sites(site_client.default_site).devices
+    device_id = devices.post({'hostname': 'foo-bar1'})['id']
+    devices.post({'hostname': 'foo-bar2'})
+
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        runner.run('interfaces add -D %s -n eth0' % device_id)
+
+        # One request for the devices, and one for all of their interfaces.
+        with count_requests() as requests_made:
+            result = runner.run('devices list --prefetch')
+        assert [m for (m, _) in requests_made] == ['GET', 'GET']
+        assert_output(result, ['Interfaces'])
+        assert_output(result, ['foo-bar1', 'foo-bar1:eth0'])
+        assert_output(result, ['foo-bar2'])
+
+        # A single listed device only has its own interfaces fetched.
+        with count_requests() as requests_made:
+            result = runner.run('devices list -H foo-bar1 --prefetch')
+        assert [m for (m, _) in requests_made] == ['GET', 'GET']
+        assert_output(result, ['foo-bar1', 'foo-bar1:eth0'])
+
+        # Multiple sites are prefetched too.
+        result = runner.run('devices list --prefetch -s all')
+        assert_output(result, ['foo-bar1', 'foo-bar1:eth0'])
+
+
+def test_devices_list_multi_site(site_client):
+    """Test ``nsot devices list`` across multiple sites."""
+    site1 = site_client.default_site
+    site2 = site_client.sites.post({'name': 'Bar'})['id']
+
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        runner.run('devices add -H foo-bar1 -s %s' % site1)
+        runner.run('devices add -H foo-bar2 -s %s' % site2)
+
+        # Natural keys are prefixed with the site_id.
+        result = runner.run('devices list -N -s %s,%s' % (site1, site2))
+        expected_output = '%s foo-bar1\n%s foo-bar2\n' % (site1, site2)
+        assert result.exit_code == 0
+        assert result.output == expected_output
+
+        # "all" is the same as listing every site.
+        result = runner.run('devices list -N -s all')
+        assert result.exit_code == 0
+        assert result.output == expected_output
+
+        # The table includes a Site column.
+        result = runner.run('devices list -s all')
+        assert result.exit_code == 0
+        assert 'Site' in result.output
+        assert 'foo-bar1' in result.output
+        assert 'foo-bar2' in result.output
+
+        # Subcommands still require a single site.
+        result = runner.run('devices list -s all -H foo-bar1 interfaces')
+        assert result.exit_code == 2
+        assert 'Multiple sites' in result.output
+
+        # Site IDs must be integers.
+        for value in ('foo', '%s,foo' % site1, ','):
+            result = runner.run('devices list -s %s' % value)
+            assert result.exit_code == 2
+            assert 'Invalid value for "-s" / "--site-id"' in result.output
+
+
 def test_devices_subcommands(site_client, device):
     """Test ``nsot devices list ... interfaces`` sub-command."""
     runner = CliRunner(site_client.config)
@@ -362,6 +527,36 @@ def test_devices_subcommands(site_client, device):
         for e in expected:
             assert e in result.output
 
+        # Lookup using a natural_key that doesn't exist
+        result = runner.run('devices list -H bogus interfaces')
+        assert result.exit_code == 1
+
+
+def test_list_request_counts(site_client, device, network):
+    """Test that ``nsot ... list`` commands make a single request."""
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        cmds = [
+            'devices list',
+            'devices list -i %s' % device['id'],
+            'devices list -H %s' % device['hostname'],
+            'devices list -H bogus',
+            'devices list -a foo=test_device',
+            'devices list -H %s interfaces' % device['hostname'],
+            'networks list -c 10.20.30.0/24',
+            'networks list -c 10.20.30.0/24 subnets',
+        ]
+
+        for cmd in cmds:
+            with count_requests() as requests_made:
+                result = runner.run(cmd)
+            assert result.exit_code == 0
+            assert len(requests_made) == 1, (cmd, requests_made)
+
+        # A natural key that doesn't exist is not an error.
+        result = runner.run('devices list -H bogus')
+        assert 'No device found' in result.output
+
 
 def test_devices_update(site_client):
     """Test ``nsot devices update``."""
@@ -397,6 +592,37 @@ def test_devices_update(site_client):
         assert 'monitored=' not in result.output
 
 
+def test_update_request_counts(site_client, device, network):
+    """Test that ``nsot ... update`` only GETs when it must."""
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        # Scalar fields are PATCHed directly by natural key or id.
+        cmds = [
+            'networks update -c 10.20.30.0/24 -S reserved',
+            'devices update -i %s -H foo-bar2' % device['id'],
+        ]
+        for cmd in cmds:
+            with count_requests() as requests_made:
+                result = runner.run(cmd)
+            assert result.exit_code == 0
+            assert [m for (m, _) in requests_made] == ['PATCH']
+
+        # Attributes must be reconciled w/ the existing object.
+        with count_requests() as requests_made:
+            result = runner.run('devices update -H foo-bar2 -a foo=bar')
+        assert result.exit_code == 0
+        assert [m for (m, _) in requests_made] == ['GET', 'PATCH']
+
+        # Nothing changed, so nothing is sent.
+        with count_requests() as requests_made:
+            result = runner.run('devices update -H foo-bar2 -a foo=bar')
+        assert result.exit_code == 0
+        assert [m for (m, _) in requests_made] == ['GET']
+
+        result = runner.run('devices list -H foo-bar2')
+        assert 'foo=bar' in result.output
+
+
 def test_attribute_modify_multi(site_client):
     """Test modification of list-type attributes (multi=True)."""
     runner = CliRunner(site_client.config)
@@ -519,6 +745,64 @@ def test_devices_remove(site_client, device):
         assert_output(result, ['Removed device!'])
 
 
+def test_devices_bulk_update_remove(site_client):
+    """Test ``nsot devices update|remove -b`` and ``-q``."""
+    BULK_UPDATE = (
+        'hostname:attributes\n'
+        'foo-bar1:owner=gary\n'
+        'foo-bar2:owner=gary\n'
+    )
+    BULK_REMOVE = (
+        'hostname\n'
+        'foo-bar1\n'
+    )
+
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        runner.run('attributes add -n owner -r device')
+        runner.run('attributes add -n metro -r device')
+        for hostname in ('foo-bar1', 'foo-bar2', 'foo-bar3'):
+            runner.run('devices add -H %s -a owner=jathan' % hostname)
+
+        with open('bulk_update', 'w') as fh:
+            fh.writelines(BULK_UPDATE)
+        with open('bulk_remove', 'w') as fh:
+            fh.writelines(BULK_REMOVE)
+
+        # Update by natural key from a file.
+        result = runner.run('devices update -b bulk_update')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Updated device!\n' * 2
+
+        result = runner.run('devices list -q owner=gary')
+        assert result.output == 'foo-bar1\nfoo-bar2\n'
+
+        # Update every match of a set query w/ a single PATCH.
+        with count_requests() as requests_made:
+            result = runner.run('devices update -q owner=gary -a metro=lax')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Updated device!\n' * 2
+        assert [m for (m, _) in requests_made] == ['GET', 'PATCH']
+
+        result = runner.run('devices list -q metro=lax')
+        assert result.output == 'foo-bar1\nfoo-bar2\n'
+
+        # Remove by natural key from a file, then by set query.
+        result = runner.run('devices remove -b bulk_remove')
+        assert_output(result, ['Removed device!'])
+
+        result = runner.run('devices remove -q owner=jathan')
+        assert_output(result, ['Removed device!'])
+
+        result = runner.run('devices list -N')
+        assert result.output == 'foo-bar2\n'
+
+        # Neither an id nor a bulk option.
+        result = runner.run('devices remove')
+        assert result.exit_code == 2
+        assert 'Missing option "-i" / "--id".' in result.output
+
+
 ############
 # Networks #
 ############
@@ -893,6 +1177,42 @@ def test_interfaces_add(site_client, device):
         assert 'Added interface!' in result.output
 
 
+def test_interfaces_bulk_add(site_client, device):
+    """Test ``nsot interfaces add -b`` w/ addresses."""
+    BULK_ADD = (
+        'device:name:addresses\n'
+        '{device_id}:eth0:10.20.30.1/32,10.20.30.2/32\n'
+        '{device_id}:eth1:\n'
+    )
+    BULK_JSONL = (
+        '{{"device": {device_id}, "name": "eth2", '
+        '"addresses": ["10.20.30.3/32"]}}\n'
+    )
+    device_id = device['id']
+
+    runner = CliRunner(site_client.config)
+    with runner.isolated_filesystem():
+        runner.run('networks add -c 10.20.30.0/24')
+
+        with open('bulk_file', 'w') as fh:
+            fh.writelines(BULK_ADD.format(device_id=device_id))
+        with open('bulk_file.jsonl', 'w') as fh:
+            fh.writelines(BULK_JSONL.format(device_id=device_id))
+
+        result = runner.run('interfaces add -b bulk_file')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Added interface!\n' * 2
+
+        result = runner.run('interfaces add -b bulk_file.jsonl')
+        assert result.exit_code == 0
+        assert result.output == '[SUCCESS] Added interface!\n'
+
+        result = runner.run('interfaces list -D %s' % device_id)
+        assert result.exit_code == 0
+        for e in ('eth0', 'eth1', 'eth2', '10.20.30.2/32', '10.20.30.3/32'):
+            assert e in result.output
+
+
 def test_interfaces_list(site_client, device):
     """Test ``nsot interfaces list``."""
     device_id = device['id']
@@ -1159,21 +1479,19 @@ def test_interfaces_update(site_client, device):
         for e in expected:
             assert e in result.output
 
-        # Test addresses  - We know they will be empty
-        # FIXME(jathan): Once we have a better story about differential
-        # assignment of addresses to interfaces, make it so that addresses can
-        # be persistent on updates.
+        # Test addresses - Only changed fields are sent, so they persist.
         result = runner.run('interfaces list -i %s' % parent_id)
         assert result.exit_code == 0
-        assert '10.10.10.1/32' not in result.output
+        assert '10.10.10.1/32' in result.output
 
-        # So let's add it back and verify...
+        # And can be replaced...
         runner.run(
-            'interfaces update -i %s -c 10.10.10.1/32' % parent_id
+            'interfaces update -i %s -c 10.10.10.3/32' % parent_id
         )
         result = runner.run('interfaces list -i %s' % parent_id)
         assert result.exit_code == 0
-        assert '10.10.10.1/32' in result.output
+        assert '10.10.10.1/32' not in result.output
+        assert '10.10.10.3/32' in result.output
 
         # Test description.
         # FIXME(jathan): It doesn't currently show in the CLI output. So we're
@@ -5,14 +5,28 @@ Test the API client.
 """
 
 from __future__ import unicode_literals
+import json
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import pytest
+import threading
+import time
+import zlib
 
+from pynsot import constants
+from pynsot.client import AuthTokenClient, stream_results
+from pynsot.models import Device, Network, Record
+from pynsot.serializers import JSON_CODECS, ModelSerializer, get_json_codec
+from pynsot.transport import ForkSafeSession, SingleFlight, TransportAdapter
 from pynsot.util import get_result
-from .fixtures import config, client
+from pynsot.vendor import requests
+from pynsot.vendor.requests import Request
+from pynsot.vendor.slumber.exceptions import HttpClientError
+from .fixtures import config, client, site
 
 
-__all__ = ('client', 'config', 'pytest')
+__all__ = ('client', 'config', 'pytest', 'site')
 
 
 log = logging.getLogger(__name__)
@@ -35,3 +49,306 @@ def test_sites(client):
     site = client.sites.post({'name': 'Foo'})
     assert client.sites.get() == [site]
     assert client.sites(site['id']).get() == site
+
+
+def test_site_client(client):
+    """Test site-scoped views of the client."""
+    site1 = client.sites.post({'name': 'Foo'})
+    site2 = client.sites.post({'name': 'Bar'})
+    base_url = client._store['base_url']
+
+    view1 = client.site(site1['id'])
+    view2 = client.site(site2['id'])
+    device = view1.devices.post({'hostname': 'foo-bar1'})
+
+    # Each view only sees its own site, and the client is left untouched.
+    assert view1.devices.get() == [device]
+    assert view2.devices.get() == []
+    assert client.sites(site1['id']).devices.get() == [device]
+    assert client._store['base_url'] == base_url
+
+    # Views are read-only.
+    with pytest.raises(AttributeError):
+        view1.site_id = site2['id']
+
+
+def test_model_serializer(client):
+    """Test decoding responses straight into records."""
+    site = client.sites.post({'name': 'Foo'})
+    devices = client.sites(site['id']).devices
+    device = devices.post({'hostname': 'foo-bar1', 'attributes': {}})
+    client.sites(site['id']).networks.post({'cidr': '10.0.0.0/8'})
+
+    config = client.config
+    api = AuthTokenClient(
+        config['url'], email=config['email'],
+        secret_key=config['secret_key'], api_version=config['api_version'],
+        serializer=ModelSerializer(),
+    )
+    site_api = api.sites(site['id'])
+
+    # Resource objects are records, and everything else is a dict.
+    assert isinstance(api.sites(site['id']).get(), dict)
+    result = site_api.devices.get()
+    assert [type(r) for r in result] == [Record]
+    assert result[0].model is Device
+    assert result[0] == device
+    assert site_api.networks.get()[0].model is Network
+
+    # Paginated responses are decoded too.
+    page = site_api.devices.get(limit=1)
+    assert page['count'] == 1
+    assert get_result(page)[0] == device
+
+
+def test_json_codec(client):
+    """Test selecting the JSON codec of the client."""
+    assert get_json_codec('json')[0] == 'json'
+    assert get_json_codec()[0] in JSON_CODECS
+
+    # A codec that isn't installed falls back to an installed one.
+    assert get_json_codec('bogus')[0] in JSON_CODECS
+
+    config = client.config
+    api = AuthTokenClient(
+        config['url'], email=config['email'],
+        secret_key=config['secret_key'], json_codec='json',
+    )
+    serializer = api._store['serializer'].get_serializer('json')
+    assert serializer.codec_name == 'json'
+    site = api.sites.post({'name': 'Foo'})
+    assert api.sites.get() == [site]
+
+
+def test_stream_results(client):
+    """Test streaming the results of a list response."""
+    site = client.sites.post({'name': 'Foo'})
+    devices = client.sites(site['id']).devices
+    created = devices.post([
+        {'hostname': 'foo-bar%d' % i, 'attributes': {}} for i in range(3)
+    ])
+
+    assert list(stream_results(devices, chunk_size=16)) == created
+    assert list(stream_results(devices, limit=2, offset=1)) == created[1:]
+    assert list(stream_results(devices, hostname='foo-bar2')) == created[2:]
+
+    with pytest.raises(HttpClientError):
+        list(stream_results(devices(999999)))
+
+
+def test_compression(client):
+    """Test compressing request bodies and counting the bytes saved."""
+    config = client.config
+    api = AuthTokenClient(
+        config['url'], email=config['email'],
+        secret_key=config['secret_key'], compress='true',
+        compress_threshold=1024,
+    )
+    adapter = api._store['session'].get_adapter(config['url'])
+    assert adapter.compress and adapter.threshold == 1024
+    assert adapter.stats is api.transfer_stats
+
+    # Small bodies are sent as-is, and every request is counted.
+    api.transfer_stats.reset()
+    site = api.sites.post({'name': 'Foo'})
+    assert api.sites(site['id']).get() == site
+    stats = api.transfer_stats.as_dict()
+    assert stats['requests'] == 2
+    assert stats['compressed_requests'] == 0
+    assert stats['sent_raw'] == stats['sent_wire'] > 0
+    assert stats['received_raw'] > 0 and stats['received_wire'] > 0
+
+    # Large bodies are gzipped.
+    body = '[%s]' % ', '.join(['{"cidr": "10.0.0.0/8"}'] * 100)
+    request = Request('POST', config['url'], data=body).prepare()
+    raw, wire = adapter.compress_body(request)
+    assert raw == len(body) and wire < raw
+    assert request.headers['Content-Encoding'] == 'gzip'
+    assert zlib.decompress(request.body, 16 + zlib.MAX_WBITS) == body
+
+    # Compression is off by default.
+    adapter = TransportAdapter()
+    request = Request('POST', config['url'], data=body).prepare()
+    assert adapter.compress_body(request) == (len(body), len(body))
+    assert 'Content-Encoding' not in request.headers
+
+
+def test_session_settings(client, monkeypatch):
+    """Test tuning the session shared by every request of a client."""
+    config = client.config
+    api = AuthTokenClient(
+        config['url'], email=config['email'],
+        secret_key=config['secret_key'], pool_maxsize='4', max_retries='2',
+        timeout='5, 30', keep_alive='false', write_concurrency='2',
+        read_rate='100',
+    )
+    session = api._store['session']
+    assert session is api._session
+    adapter = session.get_adapter(config['url'])
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+    assert adapter.timeout == (5.0, 30.0)
+    assert session.headers['Connection'] == 'close'
+    assert adapter.limiters is api.limiters
+    assert api.limiters['write'].max_limit == 2
+    assert api.limiters['read'].bucket.rate == 100
+
+    # Authentication and resource discovery go through the session too.
+    assert api.transfer_stats.requests == 1
+    api._fetch_resources()
+    assert api.transfer_stats.requests == 2
+
+    # Defaults
+    adapter = client._session.get_adapter(config['url'])
+    assert adapter._pool_maxsize == constants.POOL_MAXSIZE
+    assert adapter.max_retries.total == constants.MAX_RETRIES
+    assert adapter.timeout is None
+    assert client.limiters['read'].max_limit == constants.READ_CONCURRENCY
+    assert client.limiters['read'].in_flight == 0
+    assert client._session.headers['Connection'] == 'keep-alive'
+
+    # A given session is used as-is, and no tuned session is built.
+    def get_session(self, kwargs):
+        raise AssertionError('A session was built')
+    monkeypatch.setattr(AuthTokenClient, 'get_session', get_session)
+    session = requests.Session()
+    api = AuthTokenClient(
+        config['url'], email=config['email'],
+        secret_key=config['secret_key'], session=session, pool_maxsize='4',
+    )
+    assert api._session is session
+    assert api.transfer_stats is None
+
+
+def test_single_flight():
+    """Test coalescing concurrent calls with the same key."""
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait()
+        return 'result'
+
+    # Callers who arrive while the first call is in flight share its result.
+    pool = ThreadPool(4)
+    results = pool.map_async(lambda _: flights.do('key', call), range(4))
+    time.sleep(0.1)
+    release.set()
+    assert sorted(results.get()) == [
+        ('result', False), ('result', True), ('result', True),
+        ('result', True)
+    ]
+    assert len(calls) == 1 and len(flights) == 0
+
+    # Later callers make a new call, as do callers after forget().
+    assert flights.do('key', call) == ('result', False)
+    release.clear()
+    result = pool.apply_async(flights.do, ('key', call))
+    time.sleep(0.1)
+    flights.forget()
+    assert flights.do('key', lambda: 'new') == ('new', False)
+    release.set()
+    assert result.get() == ('result', False)
+
+    # Exceptions are shared too.
+    def fail():
+        release.wait()
+        raise ValueError('boom')
+
+    release.clear()
+    results = [pool.apply_async(flights.do, ('key', fail)) for _ in range(2)]
+    time.sleep(0.1)
+    release.set()
+    for result in results:
+        with pytest.raises(ValueError):
+            result.get()
+    pool.close()
+    pool.join()
+
+
+def test_coalesce(client, site):
+    """Test that concurrent identical GET requests share one response."""
+    adapter = client._session.get_adapter(client.config['url'])
+    assert adapter.coalesce
+    release = threading.Event()
+    send = adapter._send
+
+    def slow_send(*args, **kwargs):
+        release.wait()
+        return send(*args, **kwargs)
+
+    adapter._send = slow_send
+    client.transfer_stats.reset()
+    try:
+        pool = ThreadPool(4)
+        results = pool.map_async(
+            lambda _: client.sites(site['id']).get(), range(4)
+        )
+        time.sleep(0.1)
+        release.set()
+        assert results.get() == [site] * 4
+        pool.close()
+        pool.join()
+    finally:
+        del adapter._send
+    assert client.transfer_stats.requests == 1
+    assert client.transfer_stats.coalesced_requests == 3
+
+    # A completed write stops GET requests from joining those before it.
+    adapter.flights._flights['stale'] = object()
+    client.sites(site['id']).put({'name': 'Bar'})
+    assert len(adapter.flights) == 0
+    assert client.sites(site['id']).get()['name'] == 'Bar'
+
+    # Coalescing may be turned off.
+    assert not TransportAdapter(coalesce=False).flight_key(
+        Request('GET', client.config['url']).prepare()
+    )
+
+
+def test_fork_safe_session(client, site):
+    """Test that each process uses its own session of a shared client."""
+    proxy = client._store['session']
+    assert isinstance(proxy, ForkSafeSession)
+    session = proxy.current
+    adapter = client._adapter
+    auth = session.auth
+
+    # The session is kept within a process, and replaced in a new one with
+    # the same auth and headers but its own pools, limiters and stats.
+    assert proxy.current is session
+    proxy.reinit()
+    assert proxy.current is not session
+    assert proxy.auth is auth
+    assert proxy.headers == session.headers
+    assert client._adapter is not adapter
+    assert client.limiters is not adapter.limiters
+    assert client.transfer_stats.requests == 0
+    assert client.sites(site['id']).get() == site
+    assert client.transfer_stats.requests == 1
+
+    # A forked process doesn't authenticate again or reuse its parent's
+    # connections.
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            result = {
+                'site': client.sites(site['id']).get(),
+                'new_session': proxy._pid == os.getpid(),
+                'requests': client.transfer_stats.requests,
+            }
+            os.write(write_fd, json.dumps(result))
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as fh:
+        result = json.loads(fh.read())
+    os.waitpid(pid, 0)
+    assert result == {'site': site, 'new_session': True, 'requests': 1}
+    assert proxy._pid == os.getpid()
+    assert client.transfer_stats.requests == 1
@@ -73,6 +73,33 @@ class TestDotFile(unittest.TestCase):
 
         self._validate_test_fields('auth_header', config)
 
+    def test_get_config_data_prompts(self):
+        """Test that tuning fields aren't prompted for."""
+        prompts = []
+
+        def prompt(text, **kwargs):
+            prompts.append(text)
+            return ''
+
+        orig_prompt = dotfile.click.prompt
+        dotfile.click.prompt = prompt
+        try:
+            config_data = dotfile.Dotfile.get_config_data(
+                **self.config_data['auth_token']
+            )
+        finally:
+            dotfile.click.prompt = orig_prompt
+
+        self.assertEqual(prompts, [
+            'Please enter %s (optional)' % field
+            for field in constants.OPTIONAL_FIELDS
+        ])
+        self.assertEqual(
+            sorted(constants.OPTIONAL_FIELDS), ['api_version', 'default_site']
+        )
+        for field in constants.TUNING_FIELDS:
+            self.assertNotIn(field, config_data)
+
     def _validate_test_fields(self, auth_method, config):
         config_data = self.config_data[auth_method]
 
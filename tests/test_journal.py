@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test the journal.
+"""
+
+from __future__ import unicode_literals
+import pytest  # noqa
+
+from pynsot.journal import Journal
+
+
+def test_journal_resume(tmpdir):
+    """Test that a reopened journal knows what was completed."""
+    path = str(tmpdir.join('journal'))
+
+    with Journal(path) as journal:
+        journal.record('add', 'devices', ['foo-bar1', 'foo-bar2'])
+        journal.record('add', 'devices', ['foo-bar3'], error='Boom')
+        assert journal.is_done('add', 'devices', 'foo-bar1')
+        assert not journal.is_done('add', 'devices', 'foo-bar3')
+
+    # Simulate a job that died mid-write.
+    with open(path, 'a') as fh:
+        fh.write('{"action": "add", "resou')
+
+    journal = Journal(path)
+    assert journal.is_done('add', 'devices', 'foo-bar2')
+    assert not journal.is_done('remove', 'devices', 'foo-bar2')
+    assert not journal.is_done('add', 'networks', 'foo-bar2')
+    assert journal.failed == {('add', 'devices', 'foo-bar3'): 'Boom'}
+
+    # A retried failure that succeeds is no longer failed.
+    journal.record('add', 'devices', ['foo-bar3'])
+    journal.close()
+    assert Journal(path).failed == {}
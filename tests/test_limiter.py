@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test the request limiter.
+"""
+
+from __future__ import unicode_literals
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+
+import pytest  # noqa
+
+from pynsot.limiter import (AdaptiveLimiter, TokenBucket, get_limiters,
+                            request_class)
+
+
+def test_request_class():
+    """Test classifying requests as reads or writes."""
+    assert request_class('GET') == 'read'
+    assert request_class('head') == 'read'
+    assert request_class('POST') == 'write'
+    assert request_class('DELETE') == 'write'
+
+
+def test_token_bucket():
+    """Test that a token bucket limits the rate after a burst."""
+    bucket = TokenBucket(rate=50, burst=5)
+    started = time.time()
+    for _ in range(10):
+        bucket.acquire()
+    # 5 at once, then 5 more at 50/s.
+    assert time.time() - started >= 0.09
+
+    # No rate means no limit.
+    TokenBucket().acquire()
+
+
+def test_adaptive_limiter():
+    """Test that the limit is cut when overloaded and grows back."""
+    limiter = AdaptiveLimiter('write', 8, target_latency=1)
+
+    # Requests in flight when the limit is cut don't cut it again.
+    tickets = [limiter.acquire() for _ in range(4)]
+    limiter.release(tickets[0], overloaded=True)
+    assert limiter.limit == 4
+    for ticket in tickets[1:]:
+        limiter.release(ticket, latency=2)
+    assert limiter.limit == 4
+
+    # A later slow request does.
+    limiter.release(limiter.acquire(), latency=2)
+    assert limiter.limit == 2
+
+    # Never below the minimum.
+    for _ in range(3):
+        limiter.release(limiter.acquire(), overloaded=True)
+    assert limiter.limit == 1
+
+    # Successes grow it back, up to the maximum.
+    for _ in range(100):
+        limiter.release(limiter.acquire(), latency=0.1)
+    assert limiter.limit == 8
+    assert limiter.in_flight == 0
+
+
+def test_adaptive_limiter_concurrency():
+    """Test that no more requests than the limit are in flight."""
+    limiter = AdaptiveLimiter('read', 3)
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'peak': 0}
+
+    def request(_):
+        ticket = limiter.acquire()
+        with lock:
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+        time.sleep(0.01)
+        with lock:
+            state['in_flight'] -= 1
+        limiter.release(ticket)
+
+    pool = ThreadPool(8)
+    pool.map(request, range(32))
+    pool.close()
+    pool.join()
+    assert state['peak'] == 3
+
+
+def test_get_limiters():
+    """Test building limiters from settings."""
+    limiters = get_limiters(
+        write_concurrency='2', write_rate='10', read_latency=''
+    )
+    assert limiters['write'].max_limit == 2
+    assert limiters['write'].bucket.rate == 10
+    assert limiters['read'].target_latency is None
+    assert limiters['read'].bucket.rate is None
@@ -9,9 +9,14 @@ import pytest
 
 from pytest import raises
 
-from pynsot.models import Resource, Network, Device, Interface
+from pynsot.journal import Journal
+from pynsot.models import (Resource, Network, Device, Interface, Attribute,
+                           Record, Session, ensure_many, purge_many,
+                           resolve_devices)
+from pynsot.state import plan
 from pynsot.util import get_result
 from .fixtures import config, client, site
+from .util import count_requests
 
 __all__ = ('client', 'config', 'pytest', 'site')
 
@@ -336,3 +341,412 @@ def test_device_send(client, site):
 #     assert i['device'] != 0
 #
 #     d.purge()
+
+
+def test_journal(client, site, tmpdir):
+    '''Test that ensure() and purge() skip work recorded in a journal'''
+    path = str(tmpdir.join('journal'))
+    d = Device(client=client, site_id=site['id'], hostname='journal1')
+
+    with Journal(path) as journal:
+        assert d.ensure(journal=journal)
+        assert journal.is_done('ensure', 'devices', d.journal_key)
+
+    # Out-of-band removal isn't noticed while the journal says it's done.
+    assert d.purge()
+    with Journal(path) as journal:
+        assert d.ensure(journal=journal)
+        assert not d.exists()
+
+
+def test_ensure_purge_many(client, site):
+    '''Test that ensure_many() and purge_many() only send what's needed'''
+    devices = [
+        Device(client=client, site_id=site['id'], hostname='many%d' % i)
+        for i in range(3)
+    ]
+    assert devices[0].ensure()
+
+    # One GET for the existing devices, and one POST for the missing ones.
+    with count_requests() as requests_made:
+        assert ensure_many(devices) == [True, True, True]
+    assert [m for (m, _) in requests_made] == ['GET', 'POST']
+
+    # Nothing changed, so nothing is sent.
+    with count_requests() as requests_made:
+        assert ensure_many(devices) == [True, True, True]
+    assert [m for (m, _) in requests_made] == ['GET']
+
+    # Only the changed device is patched.
+    devices[1]['attributes'] = {'bogus': 'attribute'}
+    assert ensure_many(devices) == [True, False, True]
+    assert devices[1].last_error
+    assert not devices[0].errors
+
+    assert purge_many(devices) == [True, True, True]
+    assert not any(d.exists() for d in devices)
+
+
+def test_ensure_many_interfaces(client, site):
+    '''Test that ensure_many() sends interfaces like ensure() does'''
+    site_id = site['id']
+    device = Device(client=client, site_id=site_id, hostname='many-ifaces')
+    assert device.ensure()
+    device_id = device.existing_resource()['id']
+
+    i = Interface(
+        client=client, site_id=site_id, device=device_id, name='eth0'
+    )
+    assert ensure_many([i]) == [True]
+
+    # An unchanged interface isn't sent.
+    with count_requests() as requests_made:
+        assert ensure_many([i]) == [True]
+    assert [m for (m, _) in requests_made] == ['GET']
+
+    # A changed interface is sent in full in a POST, never PATCHed, with the
+    # same outcome as ensure().
+    i['description'] = 'uplink'
+    with count_requests() as requests_made:
+        results = ensure_many([i])
+    assert [m for (m, _) in requests_made] == ['GET', 'POST']
+    assert results == [i.ensure()]
+
+
+def test_plan_apply(client, site):
+    '''Test that a plan only holds the changes needed, in bulk reads'''
+    site_id = site['id']
+    stale = Device(client=client, site_id=site_id, hostname='stale1')
+    assert stale.ensure()
+
+    desired = [
+        Attribute(
+            client=client, site_id=site_id, name='owner',
+            resource_name='Device'
+        ),
+        Device(
+            client=client, site_id=site_id, hostname='plan1',
+            attributes={'owner': 'jathan'}
+        ),
+        Network(client=client, site_id=site_id, cidr='10.20.0.0/16'),
+        Interface(
+            client=client, site_id=site_id, device='plan1', name='eth0',
+            addresses=['10.20.0.1/32']
+        ),
+    ]
+
+    # Nothing is deleted unless the plan prunes.
+    assert sorted(c.action for c in plan(desired)) == ['create'] * 4
+
+    # One GET per resource type, and one for the devices of the pending
+    # interface. Nothing is written.
+    with count_requests() as requests_made:
+        p = plan(desired, prune=True)
+    assert [m for (m, _) in requests_made] == ['GET'] * 5
+    assert sorted(c.action for c in p) == ['create'] * 4 + ['delete']
+    assert 'Plan: 4 to create, 0 to update, 1 to delete.' in str(p)
+
+    # The interface is created on the device created before it.
+    assert p.apply()
+    assert not stale.exists()
+    iface = get_result(client.sites(site_id).interfaces.get())[0]
+    assert iface['device'] == desired[1].existing_resource()['id']
+
+    # Nothing is left to do, and the address assigned to the interface isn't
+    # pruned.
+    assert len(plan(desired, prune=True)) == 0
+
+    # Only the changed field is updated.
+    desired[1]['attributes'] = {'owner': 'gary'}
+    p = plan(desired)
+    assert [str(c) for c in p] == ['~ devices plan1: attributes']
+    assert p.apply()
+
+    # Interfaces built before their device existed are matched once it does.
+    ifaces = [
+        Interface(client=client, site_id=site_id, device='plan2', name='eth0')
+        for _ in range(2)
+    ]
+    assert all(i.device_pending for i in ifaces)
+    assert Device(client=client, site_id=site_id, hostname='plan2').ensure()
+    assert [c.action for c in plan(ifaces[:1])] == ['create']
+    assert plan(ifaces[:1]).apply()
+    assert len(plan(desired[3:] + ifaces[1:], prune=True)) == 0
+
+
+def test_plan_networks(client, site):
+    '''Test that parent networks are created before their children'''
+    site_id = site['id']
+    desired = [
+        Network(client=client, site_id=site_id, cidr='10.1.2.0/24'),
+        Network(client=client, site_id=site_id, cidr='10.0.0.0/8'),
+    ]
+    p = plan(desired)
+    stages = [[c.key for c in stage] for stage in p.stages() if stage]
+    assert stages == [['10.0.0.0/8'], ['10.1.2.0/24']]
+
+    assert p.apply()
+    parent = desired[1].existing_resource()
+    assert desired[0].existing_resource()['parent_id'] == parent['id']
+
+    # Children are deleted before their parents.
+    p = plan(
+        [Network(client=client, site_id=site_id, cidr='192.168.0.0/16')],
+        prune=True
+    )
+    stages = [[c.key for c in stage] for stage in p.stages() if stage]
+    assert stages == [['192.168.0.0/16'], ['10.1.2.0/24'], ['10.0.0.0/8']]
+
+
+def test_session(client, site):
+    '''Test that resources of a session share lookups until a write'''
+    session = Session(client=client)
+    device = Device(session=session, site_id=site['id'], hostname='shared1')
+    assert device.client is client
+    assert device.ensure()
+
+    # The device is only looked up once for all of the interfaces.
+    with count_requests() as requests_made:
+        ifaces = [
+            Interface(
+                session=session, site_id=site['id'], device='shared1',
+                name='eth%d' % i
+            )
+            for i in range(3)
+        ]
+    assert len(requests_made) == 1
+    assert all(i['device'] == device.existing_resource()['id'] for i in ifaces)
+
+    # Another resource for the same device hits the session, not the server.
+    other = Device(session=session, site_id=site['id'], hostname='shared1')
+    with count_requests() as requests_made:
+        assert other.exists()
+    assert not requests_made
+
+    # Nor does ensuring it again while it's unchanged.
+    with count_requests() as requests_made:
+        assert device.ensure()
+    assert not requests_made
+
+    # Interfaces of devices that don't exist yet are told apart by hostname.
+    pending = [
+        Interface(
+            session=session, site_id=site['id'], device=hostname, name='eth0'
+        )
+        for hostname in ('new1', 'new2')
+    ]
+    assert all(i['device'] == 0 for i in pending)
+    assert pending[0].session_key != pending[1].session_key
+    assert pending[0].journal_key != pending[1].journal_key
+
+    # A write invalidates the entry.
+    assert device.purge()
+    assert device.session_key not in session
+    assert not other.exists()
+
+
+def test_resolve_devices(client, site):
+    '''Test that device hostnames of interfaces are resolved in bulk'''
+    site_id = site['id']
+    session = Session(client=client)
+    assert session.load(site_id, 'devices') == 0
+
+    # The devices are known not to exist, so nothing is looked up.
+    with count_requests() as requests_made:
+        ifaces = [
+            Interface(
+                session=session, site_id=site_id, device=hostname,
+                name='eth%d' % i
+            )
+            for hostname in ('switch1', 'switch2') for i in range(2)
+        ]
+    assert not requests_made
+    assert all(i.device_pending and i['device'] == 0 for i in ifaces)
+
+    devices = [
+        Device(client=client, site_id=site_id, hostname=hostname)
+        for hostname in ('switch1', 'switch2')
+    ]
+    assert ensure_many(devices) == [True, True]
+
+    # One GET resolves all of them.
+    with count_requests() as requests_made:
+        assert resolve_devices(ifaces) == 0
+    assert len(requests_made) == 1
+
+    ids = dict((d['hostname'], d.existing_resource()['id']) for d in devices)
+    for iface in ifaces:
+        assert not iface.device_pending
+        assert iface['device'] == ids[iface._original_device]
+
+    # The devices were loaded into the caller's (empty) session, so new
+    # interfaces of the session resolve them without another lookup.
+    with count_requests() as requests_made:
+        iface = Interface(
+            session=session, site_id=site_id, device='switch1', name='eth9'
+        )
+    assert not requests_made
+    assert iface['device'] == ids['switch1']
+
+
+def test_ensure_only_changes(client, site):
+    '''Test that ensure() only writes the fields that changed'''
+    site_id = site['id']
+    attr = Attribute(
+        client=client, site_id=site_id, name='owner', resource_name='Device'
+    )
+    assert attr.ensure()
+    dev = Device(client=client, site_id=site_id, hostname='dirty1')
+    assert dev.ensure()
+
+    # Nothing differs, so nothing is written.
+    with count_requests() as requests_made:
+        assert dev.ensure()
+    assert [m for (m, _) in requests_made] == ['GET']
+
+    dev['attributes'] = {'owner': 'jathan'}
+    assert dev.diff(dev.existing_resource()) == {
+        'attributes': {'owner': 'jathan'}
+    }
+    with count_requests() as requests_made:
+        assert dev.ensure()
+    assert [m for (m, _) in requests_made] == ['GET', 'PATCH']
+    assert dev.existing_resource()['attributes'] == {'owner': 'jathan'}
+    assert not dev.diff(dev.existing_resource())
+
+
+def test_objects(client, site):
+    '''Test the lazy query API of the models'''
+    site_id = site['id']
+    attr = Attribute(
+        client=client, site_id=site_id, name='owner', resource_name='Device'
+    )
+    assert attr.ensure()
+    devices = [
+        Device(client=client, site_id=site_id, hostname='qs%d' % i)
+        for i in range(5)
+    ]
+    devices.append(Device(
+        client=client, site_id=site_id, hostname='other1',
+        attributes={'owner': 'jathan'}
+    ))
+    assert all(ensure_many(devices))
+
+    # Nothing is fetched until the query is used.
+    with count_requests() as requests_made:
+        qs = Device.objects(site_id=site_id, client=client)
+        assert qs.count() == 6
+    assert len(requests_made) == 1
+
+    # Results are fetched in pages.
+    with count_requests() as requests_made:
+        results = list(qs.iterator(chunk_size=2))
+    assert len(requests_made) == 3
+    assert all(isinstance(d, Device) for d in results)
+    assert len(results) == 6
+
+    # Or streamed from a single request.
+    with count_requests() as requests_made:
+        streamed = list(qs.iterator(stream=True))
+    assert len(requests_made) == 1
+    assert streamed == results
+    assert list(qs[1:3].iterator(stream=True)) == results[1:3]
+    records = list(qs.records().iterator(stream=True))
+    assert [r['hostname'] for r in records] == [
+        d['hostname'] for d in results
+    ]
+
+    assert qs.filter(hostname='qs1').count() == 1
+    assert qs.filter(hostname__startswith='qs').count() == 5
+    assert qs.filter(attributes={'owner': 'jathan'})[0]['hostname'] == 'other1'
+    assert qs.query('owner=jathan').count() == 1
+
+    # Slices map to limit and offset.
+    assert qs[1:3].count() == 2
+    assert [d['hostname'] for d in qs[1:3]] == [
+        d['hostname'] for d in results[1:3]
+    ]
+    assert len(list(qs.filter(hostname__startswith='qs')[3:])) == 2
+    with raises(IndexError):
+        qs[10]
+
+
+def test_objects_prefetch_related(client, site):
+    '''Test that related resources are prefetched in bulk'''
+    site_id = site['id']
+    net = Network(client=client, site_id=site_id, cidr='10.30.0.0/16')
+    devices = [
+        Device(client=client, site_id=site_id, hostname='pre%d' % i)
+        for i in range(3)
+    ]
+    assert all(ensure_many([net] + devices))
+    ifaces = [
+        Interface(
+            client=client, site_id=site_id, device=d['hostname'], name='eth0',
+            addresses=['10.30.0.%d/32' % (i + 1)]
+        )
+        for (i, d) in enumerate(devices)
+    ]
+    assert all(ensure_many(ifaces))
+
+    # One GET for the devices, and one for all of their interfaces.
+    qs = Device.objects(site_id=site_id, client=client)
+    with count_requests() as requests_made:
+        results = list(qs.prefetch_related('interfaces'))
+    assert len(requests_made) == 2
+    for device in results:
+        names = [i['name'] for i in device.related['interfaces']]
+        assert names == ['eth0']
+
+    qs = Interface.objects(site_id=site_id, client=client)
+    for iface in qs.prefetch_related('device', 'addresses'):
+        assert iface.related['device']['id'] == iface['device']
+        assert [Network.natural_key(n) for n in iface.related['addresses']] \
+            == iface['addresses']
+
+    with raises(TypeError):
+        qs.prefetch_related('circuits')
+
+
+def test_objects_records(client, site):
+    '''Test compact records and their upgrade to resources'''
+    site_id = site['id']
+    attr = Attribute(
+        client=client, site_id=site_id, name='owner', resource_name='Device'
+    )
+    assert attr.ensure()
+    devices = [
+        Device(
+            client=client, site_id=site_id, hostname='rec%d' % i,
+            attributes={'owner': 'jathan'}
+        )
+        for i in range(2)
+    ]
+    assert all(ensure_many(devices))
+
+    records = list(Device.objects(site_id=site_id, client=client).records())
+    assert all(isinstance(r, Record) for r in records)
+    assert not hasattr(records[0], '__dict__')
+    assert records[0] == devices[0].existing_resource()
+    assert records[0]['attributes'] == {'owner': 'jathan'}
+    assert records[0]._layout is records[1]._layout
+
+    # Records are read-only.
+    with raises(TypeError):
+        records[0]['hostname'] = 'nope'
+    records[0]['attributes']['owner'] = 'nope'
+    assert records[0]['attributes'] == {'owner': 'jathan'}
+    record = Record(Device, {'hostname': 'rec', 'attributes': {'a': ['b']}})
+    record['attributes']['a'].append('c')
+    assert record['attributes'] == {'a': ['b']}
+
+    # Layouts are only shared within a query.
+    again = Device.objects(site_id=site_id, client=client).records()
+    assert next(iter(again))._layout is not records[0]._layout
+
+    device = records[0].to_resource(client=client)
+    assert isinstance(device, Device)
+    device['attributes'] = {'owner': 'gary'}
+    assert device.ensure()
+    devices[0].clear_cache()
+    assert devices[0].existing_resource()['attributes'] == {'owner': 'gary'}
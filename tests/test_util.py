@@ -4,9 +4,10 @@
 Test the utils lib.
 """
 
+import json
 import pytest  # noqa
 
-from pynsot.util import slugify, validate_cidr
+from pynsot.util import chunked, iter_json_results, slugify, validate_cidr
 
 
 def test_validate_cidr():
@@ -40,3 +41,44 @@ def test_slugify():
 
     for case, expected in cases:
         assert slugify(case) == expected
+
+
+def test_chunked():
+    """Test ``chunked()``."""
+    assert list(chunked([], 2)) == []
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+    # Only consumed as chunks are requested.
+    items = iter(range(5))
+    chunks = chunked(items, 2)
+    assert next(chunks) == [0, 1]
+    assert next(items) == 2
+
+
+def test_iter_json_results():
+    """Test ``iter_json_results()``."""
+    objects = [{'id': 1, 'name': u'f\xf8\xf8'}, {'id': 2, 'tags': [1, 2]}]
+    text = json.dumps(objects, ensure_ascii=False).encode('utf-8')
+    envelope = json.dumps(
+        {'count': 2, 'next': None, 'results': objects, 'previous': None}
+    ).encode('utf-8')
+
+    def split(data, size):
+        return (data[i:i + size] for i in range(0, len(data), size))
+
+    # Values may be split anywhere across chunks, even within a character.
+    for data in (text, envelope):
+        for size in (1, 2, 7, len(data)):
+            assert list(iter_json_results(split(data, size))) == objects
+
+    # Only consumed as objects are requested.
+    chunks = iter([b'[{"id": 1},', b' {"id": 2}]'])
+    results = iter_json_results(chunks)
+    assert next(results) == {'id': 1}
+    assert next(chunks) == b' {"id": 2}]'
+
+    assert list(iter_json_results([b'[]'])) == []
+    assert list(iter_json_results([b'{"count": 0, "results": []}'])) == []
+
+    with pytest.raises(ValueError):
+        list(iter_json_results([b'[{"id": 1}, {"id"']))
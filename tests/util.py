@@ -17,6 +17,8 @@ import socket
 import struct
 import tempfile
 
+import requests
+
 from pynsot.app import app
 from pynsot import client
 from pynsot import dotfile
@@ -143,6 +145,29 @@ def assert_outputs(result, expected_list, exit_code=0):
         assert_output(result, expected, exit_code)
 
 
+@contextlib.contextmanager
+def count_requests():
+    """
+    A context manager that records the API requests made while it is active.
+
+    Yields a list of ``(method, url)`` tuples. Authentication requests are not
+    recorded.
+    """
+    requests_made = []
+    orig_request = requests.Session.request
+
+    def request(self, method, url, *args, **kwargs):
+        if not url.rstrip('/').endswith('/authenticate'):
+            requests_made.append((method, url))
+        return orig_request(self, method, url, *args, **kwargs)
+
+    requests.Session.request = request
+    try:
+        yield requests_made
+    finally:
+        requests.Session.request = orig_request
+
+
 def rando():
     """Flip a coin."""
     return random.choice((True, False))